@@ -13,6 +13,7 @@ if str(project_root) not in sys.path:
 
 from db import buscar_dados_dashboard, conexao
 from utils import MESES, obter_ano_atual
+from formatacao import formatar_inteiro, formatar_moeda, formatar_moeda_coluna
 
 st.set_page_config(page_title='Dashboard de Aulas', layout='wide', page_icon='📊')
 
@@ -28,6 +29,17 @@ NOMES_MESES = {
     'set': 'Setembro', 'out': 'Outubro', 'nov': 'Novembro', 'dez': 'Dezembro'
 }
 
+# Número do mês -> nome completo (índice das séries por ano e mês)
+NOMES_POR_ORDEM = {ordem: NOMES_MESES[mes] for mes, ordem in ORDEM_MESES.items()}
+
+CORES_MODALIDADES = {
+    'Judo': '#1f77b4',
+    'Pilates': '#ff7f0e',
+    'Prime': '#2ca02c',
+    'Muay': '#d62728',
+    'Kravmaga': '#9467bd'
+}
+
 MODALIDADES = {
     'judo': 'Judo',
     'pilates': 'Pilates',
@@ -56,6 +68,32 @@ def processar_dados_dashboard(df):
     
     return df
 
+def montar_serie_mensal(df, valor='total_50_percent'):
+    """Série temporal indexada por (ano, ordem_mes), com uma coluna por modalidade
+    
+    Todos os meses entre o primeiro e o último com dados aparecem no índice; meses sem
+    planilha importada ficam NaN (não são receita zero).
+    """
+    serie = df.pivot_table(
+        index=['ano', 'ordem_mes'],
+        columns='modalidade_nome',
+        values=valor,
+        aggfunc='sum'
+    )
+    anos = serie.index.get_level_values('ano')
+    todos_meses = pd.MultiIndex.from_product(
+        [range(anos.min(), anos.max() + 1), range(1, 13)],
+        names=['ano', 'ordem_mes']
+    )
+    serie = serie.reindex(todos_meses)
+    return serie.loc[serie.first_valid_index():serie.last_valid_index()]
+
+def serie_para_grafico(serie, nome_valor):
+    """Converte a série (ano, ordem_mes) em formato longo com a data do primeiro dia do mês"""
+    df = serie.stack().dropna().rename(nome_valor).reset_index()
+    df['data'] = pd.to_datetime(pd.DataFrame({'year': df['ano'], 'month': df['ordem_mes'], 'day': 1}))
+    return df
+
 st.title('📊 Dashboard de Aulas')
 st.markdown('---')
 
@@ -65,6 +103,113 @@ st.sidebar.header('Filtros')
 # Filtro por ano
 ano_atual = obter_ano_atual()
 anos_disponiveis = list(range(2020, ano_atual + 2))  # Inclui ano atual e próximo
+
+modo_visualizacao = st.sidebar.radio('Visualização', ['Um ano', 'Vários anos'], horizontal=True)
+
+if modo_visualizacao == 'Vários anos':
+    ano_inicial, ano_final = st.sidebar.select_slider(
+        'Intervalo de anos',
+        options=anos_disponiveis,
+        value=(max(anos_disponiveis[0], ano_atual - 4), ano_atual)
+    )
+    
+    # Uma única consulta para todo o intervalo (resumo mensal: um documento por modalidade e mês)
+    with st.spinner('Carregando dados...'):
+        df_anos = buscar_dados_dashboard(ano=ano_inicial, ano_final=ano_final)
+        
+        if df_anos.empty:
+            st.warning(f'⚠️ Nenhum dado encontrado entre {ano_inicial} e {ano_final}.')
+            st.stop()
+        
+        df_anos = processar_dados_dashboard(df_anos)
+        serie_mensal = montar_serie_mensal(df_anos)
+    
+    modalidades_nomes = list(serie_mensal.columns)
+    modalidades_selecionadas = st.sidebar.multiselect(
+        'Modalidades',
+        options=modalidades_nomes,
+        default=modalidades_nomes
+    )
+    if not modalidades_selecionadas:
+        st.info('Selecione ao menos uma modalidade.')
+        st.stop()
+    
+    st.subheader(f'📆 Comparação entre {ano_inicial} e {ano_final}')
+    
+    tab_anos1, tab_anos2, tab_anos3 = st.tabs(['📊 Mesmo Mês em Cada Ano', '📈 Acumulado 12 Meses', '📋 Tabela por Ano'])
+    
+    # Total das modalidades selecionadas por (ano, mês); NaN quando nenhuma tem dados
+    total_selecionado = serie_mensal[modalidades_selecionadas].sum(axis=1, min_count=1)
+    
+    with tab_anos1:
+        df_comparacao = total_selecionado.dropna().rename('total_50_percent').reset_index()
+        df_comparacao['mes_nome'] = df_comparacao['ordem_mes'].map(NOMES_POR_ORDEM)
+        df_comparacao['ano'] = df_comparacao['ano'].astype(str)
+        
+        fig_comparacao = px.bar(
+            df_comparacao,
+            x='mes_nome',
+            y='total_50_percent',
+            color='ano',
+            barmode='group',
+            labels={
+                'mes_nome': 'Mês',
+                'total_50_percent': 'Valor 50% (R$)',
+                'ano': 'Ano'
+            },
+            title='Valores 50% do Mesmo Mês em Cada Ano'
+        )
+        fig_comparacao.update_xaxes(
+            categoryorder='array',
+            categoryarray=[NOMES_MESES[m] for m in ORDEM_MESES.keys()]
+        )
+        fig_comparacao.update_layout(height=500)
+        st.plotly_chart(fig_comparacao, use_container_width=True)
+    
+    with tab_anos2:
+        # Soma dos últimos 12 meses de cada modalidade, só com os 12 meses presentes:
+        # janelas com mês sem dados (início da série ou planilha não importada) ficam de fora
+        acumulado_12 = serie_mensal[modalidades_selecionadas].rolling(12, min_periods=12).sum()
+        df_acumulado = serie_para_grafico(acumulado_12, 'acumulado_12_meses')
+        
+        if df_acumulado.empty:
+            st.info('Nenhuma modalidade tem 12 meses seguidos com dados no intervalo selecionado.')
+        else:
+            st.caption('Cada ponto soma os 12 meses até o mês indicado; janelas com algum mês sem dados não aparecem.')
+        
+        fig_acumulado = px.line(
+            df_acumulado,
+            x='data',
+            y='acumulado_12_meses',
+            color='modalidade_nome',
+            markers=True,
+            labels={
+                'data': 'Mês',
+                'acumulado_12_meses': 'Valor 50% em 12 meses (R$)',
+                'modalidade_nome': 'Modalidade'
+            },
+            title='Valores 50% Acumulados nos Últimos 12 Meses',
+            color_discrete_map=CORES_MODALIDADES
+        )
+        fig_acumulado.update_xaxes(dtick='M1', tickformat='%m/%Y')
+        fig_acumulado.update_layout(height=500)
+        st.plotly_chart(fig_acumulado, use_container_width=True)
+    
+    with tab_anos3:
+        df_tabela_anos = total_selecionado.unstack('ano')
+        df_tabela_anos.index = df_tabela_anos.index.map(NOMES_POR_ORDEM)
+        df_tabela_anos.index.name = 'Mês'
+        df_tabela_anos.loc['Total'] = df_tabela_anos.sum()
+        df_tabela_anos.columns = [str(ano) for ano in df_tabela_anos.columns]
+        st.dataframe(
+            df_tabela_anos.apply(formatar_moeda_coluna, prefixo='R$ ').replace('R$ nan', '-'),
+            use_container_width=True
+        )
+    
+    st.markdown('---')
+    st.caption(f'Última atualização: {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}')
+    st.stop()
+
 ano_selecionado = st.sidebar.selectbox(
     'Selecione o Ano',
     options=anos_disponiveis,
@@ -96,17 +241,17 @@ col1, col2, col3 = st.columns(3)
 with col1:
     st.metric(
         'Total Valor Mensal',
-        f'R$ {total_valor_mensal:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+        formatar_moeda(total_valor_mensal, 'R$ ')
     )
 
 with col2:
     st.metric(
         'Total 50%',
-        f'R$ {total_50_percent:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+        formatar_moeda(total_50_percent, 'R$ ')
     )
 
 with col3:
-    st.metric('Total de Registros', f'{total_registros:,}'.replace(',', '.'))
+    st.metric('Total de Registros', formatar_inteiro(total_registros))
 
 # Segunda linha: Outras métricas (3 colunas)
 col4, col5, col6 = st.columns(3)
@@ -123,7 +268,7 @@ with col6:
         media_mensal = total_50_percent / num_meses
         st.metric(
             'Média Mensal 50%',
-            f'R$ {media_mensal:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+            formatar_moeda(media_mensal, 'R$ ')
         )
     else:
         st.metric('Média Mensal 50%', 'R$ 0,00')
@@ -152,20 +297,12 @@ with tab1:
     # Criar gráfico de barras
     fig_barras = go.Figure()
     
-    cores = {
-        'Judo': '#1f77b4',
-        'Pilates': '#ff7f0e',
-        'Prime': '#2ca02c',
-        'Muay': '#d62728',
-        'Kravmaga': '#9467bd'
-    }
-    
     for modalidade in df_pivot.columns:
         fig_barras.add_trace(go.Bar(
             name=modalidade,
             x=df_pivot.index,
             y=df_pivot[modalidade],
-            marker_color=cores.get(modalidade, '#888888')
+            marker_color=CORES_MODALIDADES.get(modalidade, '#888888')
         ))
     
     fig_barras.update_layout(
@@ -251,7 +388,7 @@ with tab3:
             values='total_50_percent',
             names='modalidade_nome',
             title='Distribuição Percentual dos Valores 50%',
-            color_discrete_map=cores
+            color_discrete_map=CORES_MODALIDADES
         )
         fig_pizza.update_traces(textposition='inside', textinfo='percent+label')
         st.plotly_chart(fig_pizza, use_container_width=True)
@@ -269,7 +406,7 @@ with tab3:
             },
             title='Total de Valores 50% por Modalidade',
             color='modalidade_nome',
-            color_discrete_map=cores
+            color_discrete_map=CORES_MODALIDADES
         )
         fig_barras_h.update_layout(showlegend=False, height=400)
         st.plotly_chart(fig_barras_h, use_container_width=True)
@@ -283,27 +420,23 @@ with tab3:
             with col1:
                 st.metric(
                     'Total Valor Mensal',
-                    f"R$ {row['total_valor_mensal']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+                    formatar_moeda(row['total_valor_mensal'], 'R$ ')
                 )
             with col2:
                 st.metric(
                     'Total 50%',
-                    f"R$ {row['total_50_percent']:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+                    formatar_moeda(row['total_50_percent'], 'R$ ')
                 )
             with col3:
-                st.metric('Registros', f"{row['num_registros']:,}".replace(',', '.'))
+                st.metric('Registros', formatar_inteiro(row['num_registros']))
 
 with tab4:
     st.subheader('Tabela Detalhada de Dados')
     
     # Preparar tabela para exibição
     df_tabela = df_dashboard.copy()
-    df_tabela['total_valor_mensal'] = df_tabela['total_valor_mensal'].apply(
-        lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-    )
-    df_tabela['total_50_percent'] = df_tabela['total_50_percent'].apply(
-        lambda x: f"R$ {x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
-    )
+    df_tabela['total_valor_mensal'] = formatar_moeda_coluna(df_tabela['total_valor_mensal'], 'R$ ')
+    df_tabela['total_50_percent'] = formatar_moeda_coluna(df_tabela['total_50_percent'], 'R$ ')
     
     # Selecionar colunas para exibição
     df_exibicao = df_tabela[['ano', 'mes_nome', 'modalidade_nome', 'total_valor_mensal', 'total_50_percent', 'num_registros']].copy()
@@ -0,0 +1,45 @@
+"""Compara a formatação de moeda célula a célula (apply + lambda) com formatar_moeda_coluna
+numa coluna sintética.
+
+Uso:
+    python benchmarks/benchmark_formatacao.py [numero_de_linhas]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Adicionar raiz do projeto ao path para imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from formatacao import formatar_moeda_coluna
+
+def formatar_celula_a_celula(coluna):
+    """Caminho anterior das páginas"""
+    return coluna.apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+
+def medir(funcao, *args, repeticoes=5):
+    """Retorna o menor tempo (s) entre as repetições e o resultado da última execução"""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+if __name__ == '__main__':
+    num_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    coluna = pd.Series(np.random.default_rng(42).uniform(0, 50_000, num_linhas))
+
+    tempo_antigo, antigo = medir(formatar_celula_a_celula, coluna)
+    tempo_novo, novo = medir(formatar_moeda_coluna, coluna)
+
+    print(f'Linhas: {num_linhas:,} | resultados iguais: {antigo.tolist() == novo.tolist()}')
+    print(f'apply + lambda:        {tempo_antigo * 1000:8.2f} ms')
+    print(f'formatar_moeda_coluna: {tempo_novo * 1000:8.2f} ms')
+    print(f'Ganho: {tempo_antigo / tempo_novo:.1f}x')
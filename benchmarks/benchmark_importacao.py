@@ -0,0 +1,100 @@
+"""Compara a transformação linha a linha (apply + iterrows) com a transformação vetorizada
+da importação de planilhas, usando uma planilha sintética.
+
+Uso:
+    python benchmarks/benchmark_importacao.py [numero_de_linhas]
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Adicionar raiz do projeto ao path para imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from db import calcular_valor_mensal, montar_contrato
+from planilhas import preparar_documentos_contratos
+
+PLANOS = [
+    'PILATES STUDIO 2X ANUAL',
+    'PILATES STUDIO 2X SEMESTRAL',
+    'PILATES STUDIO 3X TRIMESTRAL',
+    'JUDÔ INFANTIL 2X 15 MESES',
+    'QUATTOR PRIME 2X MENSAL',
+]
+
+def gerar_planilha_sintetica(num_linhas, semente=42):
+    """Gera um DataFrame com o mesmo formato das planilhas exportadas pelo sistema"""
+    rng = np.random.default_rng(semente)
+    ids = rng.integers(1000, 99999, num_linhas).astype(float)
+    ids[rng.random(num_linhas) < 0.01] = np.nan
+    inicio = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, num_linhas), unit='D')
+    professores = np.array(['ANA CLARA DE DEUS BRAGA', ' ANA LIDIA LEMOS ', '', None], dtype=object)
+    return pd.DataFrame({
+        'ID do cliente': ids,
+        'Nome': [f'ALUNO {i}' for i in range(num_linhas)],
+        'Sobrenome': [f'SOBRENOME {i}' for i in range(num_linhas)],
+        'Contratos': rng.choice(PLANOS, num_linhas),
+        'Início': inicio,
+        'Vencimento': inicio + pd.Timedelta(days=365),
+        'Valor': rng.uniform(100, 5000, num_linhas).round(2),
+        'Professor': rng.choice(professores, num_linhas),
+    })
+
+def transformar_linha_a_linha(df, modalidade, mes_abrev, ano):
+    """Caminho anterior: apply(axis=1) para o valor mensal e iterrows para montar os documentos"""
+    df = df.copy()
+    df['nome_completo'] = (df['Nome'].fillna('') + ' ' + df['Sobrenome'].fillna('')).str.strip()
+    df['Início'] = pd.to_datetime(df['Início'], errors='coerce').dt.strftime("%d/%m/%Y")
+    df['Vencimento'] = pd.to_datetime(df['Vencimento'], errors='coerce').dt.strftime("%d/%m/%Y")
+    df['valor_mensal'] = df.apply(
+        lambda row: calcular_valor_mensal(row.get('Contratos', ''), row.get('Valor', 0)),
+        axis=1
+    )
+    documentos = []
+    for _, row in df.iterrows():
+        id_cliente = row.get('ID do cliente', '')
+        if pd.isna(id_cliente) or id_cliente == '':
+            continue
+        contrato, _ = montar_contrato(
+            id_cliente=str(id_cliente),
+            nome_completo=row.get('nome_completo', ''),
+            contratos=str(row.get('Contratos', '')),
+            valor=row.get('Valor', 0),
+            inicio=row.get('Início', ''),
+            vencimento=row.get('Vencimento', ''),
+            valor_mensal=row.get('valor_mensal', 0),
+            professor=row.get('Professor'),
+            modalidade=modalidade,
+            mes_abrev=mes_abrev,
+            ano=ano
+        )
+        documentos.append(contrato)
+    return documentos
+
+def medir(funcao, *args, repeticoes=3):
+    """Retorna o menor tempo (s) entre as repetições e o resultado da última execução"""
+    melhor = float('inf')
+    resultado = None
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao(*args)
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, resultado
+
+if __name__ == '__main__':
+    num_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = gerar_planilha_sintetica(num_linhas)
+    argumentos = (df, 'pilates', 'jan', 2025)
+
+    tempo_antigo, docs_antigos = medir(transformar_linha_a_linha, *argumentos)
+    tempo_novo, (docs_novos, ignorados) = medir(preparar_documentos_contratos, *argumentos)
+
+    print(f'Linhas: {num_linhas:,} | documentos: {len(docs_novos):,} | ignorados: {ignorados:,}')
+    print(f'Linha a linha (apply + iterrows): {tempo_antigo:8.3f} s ({len(docs_antigos):,} documentos)')
+    print(f'Vetorizado:                       {tempo_novo:8.3f} s')
+    print(f'Ganho: {tempo_antigo / tempo_novo:.1f}x')
@@ -0,0 +1,43 @@
+"""Compara a leitura dos mesmos contratos em .xlsx (openpyxl read-only) e em .csv
+(leitor C do pandas, separador ; e vírgula decimal), usando uma planilha sintética.
+
+Uso:
+    python benchmarks/benchmark_leitura_csv.py [numero_de_linhas]
+"""
+import sys
+import tempfile
+from pathlib import Path
+
+# Adicionar raiz do projeto ao path para imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from benchmark_importacao import gerar_planilha_sintetica, medir
+from planilhas import documentos_da_planilha
+
+def gravar_arquivos(df, pasta):
+    """Grava o DataFrame como .xlsx e como .csv no formato das exportações (; e vírgula decimal)"""
+    caminho_xlsx = Path(pasta) / 'contratos.xlsx'
+    caminho_csv = Path(pasta) / 'contratos.csv'
+    df.to_excel(caminho_xlsx, index=False)
+    df_csv = df.copy()
+    df_csv['ID do cliente'] = df_csv['ID do cliente'].astype('Int64')
+    df_csv['Início'] = df_csv['Início'].dt.strftime('%d/%m/%Y')
+    df_csv['Vencimento'] = df_csv['Vencimento'].dt.strftime('%d/%m/%Y')
+    df_csv.to_csv(caminho_csv, sep=';', decimal=',', index=False)
+    return caminho_xlsx, caminho_csv
+
+if __name__ == '__main__':
+    num_linhas = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    df = gerar_planilha_sintetica(num_linhas)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho_xlsx, caminho_csv = gravar_arquivos(df, pasta)
+        tempo_xlsx, (docs_xlsx, _, _) = medir(documentos_da_planilha, caminho_xlsx, 'pilates', 'jan', 2025)
+        tempo_csv, (docs_csv, _, _) = medir(documentos_da_planilha, caminho_csv, 'pilates', 'jan', 2025)
+
+    print(f'Linhas: {num_linhas:,} | documentos: xlsx {len(docs_xlsx):,}, csv {len(docs_csv):,}')
+    print(f'xlsx (openpyxl read-only): {tempo_xlsx:8.3f} s')
+    print(f'csv (leitor C):            {tempo_csv:8.3f} s')
+    print(f'Ganho: {tempo_xlsx / tempo_csv:.1f}x')
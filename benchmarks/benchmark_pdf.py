@@ -0,0 +1,74 @@
+"""Mede a geração do PDF de pagamentos com 100, 1.000 e 10.000 linhas, comparando com o
+caminho anterior (uma única Table montada com iterrows e dividida pelo ReportLab).
+
+Uso:
+    python benchmarks/benchmark_pdf.py [linhas ...]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Adicionar raiz do projeto ao path para imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from relatorios import gerar_pdf_pagamentos
+
+def gerar_tabela_sintetica(num_linhas, semente=42):
+    """Tabela no formato usado pelas páginas (nome, início, vencimento e 50%)"""
+    rng = np.random.default_rng(semente)
+    inicio = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 365, num_linhas), unit='D')
+    return pd.DataFrame({
+        'nome_completo': [f'ALUNO {i} SOBRENOME COMPRIDO DA SILVA' for i in range(num_linhas)],
+        'Início': inicio.strftime('%d/%m/%Y'),
+        'Vencimento': (inicio + pd.Timedelta(days=365)).strftime('%d/%m/%Y'),
+        '50%': rng.uniform(50, 800, num_linhas).round(2),
+    })
+
+def gerar_pdf_tabela_unica(total_50_percent, tabela_dados, caminho):
+    """Caminho anterior: estilos recriados, iterrows com f-string por célula e uma única Table"""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    doc = SimpleDocTemplate(str(caminho), pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+    dados = [['Nome do Cliente', 'Início', 'Vencimento', 'Valor 50%']]
+    for _, row in tabela_dados.iterrows():
+        valor = f"R$ {row['50%']:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        dados.append([str(row['nome_completo']).upper().strip()[:30], str(row['Início']), str(row['Vencimento']), valor])
+    dados.append(['TOTAL', '', '', f"R$ {total_50_percent:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")])
+    tabela = Table(dados, colWidths=[7*cm, 3.5*cm, 3.5*cm, 4*cm])
+    tabela.setStyle(TableStyle([
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
+    ]))
+    doc.build([Paragraph("Relatório de Pagamentos", styles['Heading1']), tabela])
+
+def medir(funcao, *args):
+    inicio = time.perf_counter()
+    funcao(*args)
+    return time.perf_counter() - inicio
+
+if __name__ == '__main__':
+    tamanhos = [int(valor) for valor in sys.argv[1:]] or [100, 1_000, 10_000]
+
+    with tempfile.TemporaryDirectory() as pasta:
+        # Aquecimento (imports do reportlab e estilos)
+        gerar_pdf_pagamentos(0.0, 1, None, 'jan', 2025, pasta, 'aquecimento', gerar_tabela_sintetica(1))
+        for num_linhas in tamanhos:
+            tabela = gerar_tabela_sintetica(num_linhas)
+            total = float(tabela['50%'].sum())
+            tempo_antigo = medir(gerar_pdf_tabela_unica, total, tabela, Path(pasta) / 'antigo.pdf')
+            tempo_novo = medir(gerar_pdf_pagamentos, total, num_linhas, 'Todos', 'jan', 2025, pasta, 'novo', tabela)
+            print(
+                f'{num_linhas:>7,} linhas | tabela única: {tempo_antigo:7.3f} s | '
+                f'tabelas por página: {tempo_novo:7.3f} s | ganho: {tempo_antigo / tempo_novo:5.1f}x'
+            )
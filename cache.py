@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+# As cópias rasas devolvidas por CacheContratos.obter só isolam o cache com Copy-on-Write,
+# padrão a partir do pandas 3 (o uv.lock ainda fixa o 2.x)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+class CacheContratos:
+    """Cache em memória (por processo) dos DataFrames de contratos
+
+    As chaves são tuplas (modalidade, mes, ano, professor). Cada entrada expira após
+    ttl_segundos e, ao passar de max_entradas, a menos usada recentemente é descartada.
+    As escritas no banco chamam invalidar_periodo para remover todas as entradas do período.
+    """
+
+    def __init__(self, ttl_segundos=300, max_entradas=64):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        # Geração por período: leituras iniciadas antes de uma invalidação não são guardadas
+        self._geracoes = {}
+        self._geracao_global = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def chave(modalidade, mes_abrev, ano, professor=None):
+        """Monta a chave do cache"""
+        return (modalidade, mes_abrev, int(ano), professor)
+
+    def _geracao(self, periodo):
+        """Geração atual do período (chamar com o lock)"""
+        return (self._geracao_global, self._geracoes.get(periodo, 0))
+
+    def _buscar(self, chave):
+        """Retorna o valor da entrada se existir e não estiver expirada (chamar com o lock)"""
+        entrada = self._entradas.get(chave)
+        if entrada is None:
+            return None
+        valor, expira_em = entrada
+        if expira_em < time.monotonic():
+            del self._entradas[chave]
+            return None
+        self._entradas.move_to_end(chave)
+        return valor
+
+    def obter(self, chave, carregar):
+        """Retorna uma cópia rasa do valor em cache ou chama carregar() e guarda o resultado
+
+        A cópia rasa compartilha os dados com o cache (um único DataFrame por período no
+        processo); com Copy-on-Write, alterar valores dela copia só a coluna alterada.
+        """
+        with self._lock:
+            valor = self._buscar(chave)
+            geracao = self._geracao(chave[:3])
+
+        if valor is None:
+            valor = carregar()
+            self.guardar(chave, valor, geracao)
+
+        return valor.copy(deep=False)
+
+    def contem(self, chave):
+        """Indica se há uma entrada válida para a chave"""
+        with self._lock:
+            return self._buscar(chave) is not None
+
+    def geracao(self, chave):
+        """Geração atual do período da chave, para passar a guardar() depois de uma leitura"""
+        with self._lock:
+            return self._geracao(chave[:3])
+
+    def guardar(self, chave, valor, geracao=None):
+        """Guarda o valor, a menos que o período tenha sido invalidado desde a geração informada"""
+        with self._lock:
+            if geracao is not None and self._geracao(chave[:3]) != geracao:
+                return
+            self._entradas[chave] = (valor, time.monotonic() + self.ttl_segundos)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar_periodo(self, modalidade, mes_abrev, ano):
+        """Remove todas as entradas (de qualquer professor) do período"""
+        periodo = (modalidade, mes_abrev, int(ano))
+        with self._lock:
+            self._geracoes[periodo] = self._geracoes.get(periodo, 0) + 1
+            for chave in [chave for chave in self._entradas if chave[:3] == periodo]:
+                del self._entradas[chave]
+
+    def memoria(self):
+        """Bytes ocupados pelos DataFrames em cache"""
+        with self._lock:
+            valores = [valor for valor, _ in self._entradas.values()]
+        return sum(int(valor.memory_usage(deep=True).sum()) for valor in valores)
+
+    def limpar(self):
+        """Remove todas as entradas"""
+        with self._lock:
+            self._geracao_global += 1
+            self._entradas.clear()
+
+# Instância compartilhada por todas as sessões do processo Streamlit
+cache_contratos = CacheContratos()
+
+# Visão geral de planos por modalidade (db.buscar_planos_periodo): mesma estrutura, com
+# modalidade None na chave (todas as modalidades do mês)
+cache_visao_geral = CacheContratos(max_entradas=24)
+
+# Fluxo de caixa dos períodos encerrados (fluxo_caixa.agregar_lancamentos), chave
+# (colecao, granularidade, inicio, fim); expira em algumas horas para incluir lançamentos retroativos
+cache_fluxo_caixa = CacheContratos(ttl_segundos=6 * 3600, max_entradas=32)
+
+class CatalogoModalidades:
+    """Valores distintos (professores, planos) memorizados por modalidade
+
+    Invalidado pelas escritas que alteram professor ou contratos da modalidade.
+    """
+
+    def __init__(self, ttl_segundos=600):
+        self.ttl_segundos = ttl_segundos
+        self._valores = {}
+        self._geracoes = {}
+        self._lock = threading.Lock()
+
+    def obter(self, modalidade, campo, carregar):
+        """Retorna a lista de valores distintos do campo, chamando carregar() se necessário"""
+        chave = (modalidade, campo)
+        with self._lock:
+            entrada = self._valores.get(chave)
+            geracao = self._geracoes.get(modalidade, 0)
+        if entrada is not None and entrada[1] >= time.monotonic():
+            return list(entrada[0])
+
+        valores = carregar()
+        with self._lock:
+            if self._geracoes.get(modalidade, 0) == geracao:
+                self._valores[chave] = (valores, time.monotonic() + self.ttl_segundos)
+        return list(valores)
+
+    def invalidar(self, modalidade):
+        """Descarta os valores memorizados da modalidade"""
+        with self._lock:
+            self._geracoes[modalidade] = self._geracoes.get(modalidade, 0) + 1
+            for chave in [chave for chave in self._valores if chave[0] == modalidade]:
+                del self._valores[chave]
+
+catalogo_modalidades = CatalogoModalidades()
@@ -0,0 +1,238 @@
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import db
+from fluxo_caixa import GRANULARIDADES, fluxo_caixa
+from formatacao import formatar_moeda
+from ingestao import ALIASES_MODALIDADES, MESES_ABREV, PASTA_BASE, importar_pastas, imprimir_relatorio
+from relatorios import PASTAS_MODALIDADES, gerar_pdf_pagamentos, gerar_relatorios_mes, nome_arquivo_professor, tabela_para_pdf
+
+MODALIDADES = sorted(set(ALIASES_MODALIDADES.values()))
+
+def comando_importar(args):
+    """Substitui o período pelos contratos da planilha (com --upsert, só insere e atualiza)"""
+    if args.upsert:
+        resumo = db.importar_planilha_em_lote(
+            args.arquivo, args.modalidade, args.mes, args.ano, args.tamanho_lote, args.ordenado
+        )
+        print(
+            f"{args.modalidade} {args.mes}/{args.ano}: {resumo['inseridos']} inseridos, "
+            f"{resumo['atualizados']} atualizados, {resumo['ignorados']} linhas sem ID ({resumo['total']} linhas lidas)"
+        )
+        return 0
+
+    resumo = db.substituir_periodo_por_planilha(args.arquivo, args.modalidade, args.mes, args.ano, args.tamanho_lote)
+    print(
+        f"{args.modalidade} {args.mes}/{args.ano}: {resumo['inseridos']} importados, "
+        f"{resumo['removidos']} antigos removidos, {resumo['ignorados']} linhas sem ID ({resumo['modo']})"
+    )
+    return 0
+
+def comando_importar_pastas(args):
+    """Importa em lote as planilhas das pastas das modalidades"""
+    resultado = importar_pastas(args.pasta, args.ano, args.modalidade, args.processos, args.simular)
+    imprimir_relatorio(resultado, args.pasta)
+    print(f"{len(resultado['importados'])} períodos importados")
+    return 1 if resultado["erros"] else 0
+
+def comando_reimportar(args):
+    """Grava apenas as diferenças entre a planilha e o período já importado"""
+    diff = db.diff_periodo_por_planilha(args.arquivo, args.modalidade, args.mes, args.ano)
+    print(
+        f"{args.modalidade} {args.mes}/{args.ano}: {len(diff['inserir'])} novos, "
+        f"{len(diff['atualizar'])} alterados, {len(diff['remover'])} removidos, {diff['inalterados']} inalterados"
+    )
+    if args.simular:
+        return 0
+    resumo = db.aplicar_diff_periodo(diff)
+    print(f"Gravados: {resumo['inseridos']} inseridos, {resumo['atualizados']} atualizados, {resumo['removidos']} removidos")
+    return 0
+
+def comando_pdf(args):
+    """Gera o PDF de pagamentos do período (mesmo relatório do botão Exportar PDF)"""
+    contratos = db.buscar_contratos(args.modalidade, args.mes, args.ano, args.professor)
+    if contratos.empty:
+        print(f"Nenhum contrato encontrado para {args.modalidade} {args.mes}/{args.ano}", file=sys.stderr)
+        return 1
+
+    tabela = tabela_para_pdf(contratos)
+    nome_arquivo_base = f'{args.modalidade}_{args.mes}_{args.ano}'
+    nome_professor = None
+    if args.modalidade == 'pilates':
+        nome_professor = args.professor or 'Todos'
+        if args.professor:
+            nome_arquivo_base = f'pilates_{nome_arquivo_professor(args.professor)}_{args.mes}_{args.ano}'
+
+    pasta_destino = Path(args.pasta) if args.pasta else PASTA_BASE / PASTAS_MODALIDADES[args.modalidade]
+    pasta_destino.mkdir(parents=True, exist_ok=True)
+    caminho_pdf = gerar_pdf_pagamentos(
+        total_50_percent=float(tabela['50%'].sum()),
+        num_registros=len(tabela),
+        nome_professor=nome_professor,
+        mes_abrev=args.mes,
+        ano=args.ano,
+        pasta_destino=pasta_destino,
+        nome_arquivo_base=nome_arquivo_base,
+        tabela_dados=tabela
+    )
+    print(caminho_pdf)
+    return 0
+
+def comando_relatorios(args):
+    """Gera em paralelo todos os PDFs de fechamento do mês"""
+    resultado = gerar_relatorios_mes(args.mes, args.ano, args.modalidade, args.processos, args.pasta)
+    for gerado in resultado["gerados"]:
+        professor = f" ({gerado['professor']})" if gerado['professor'] else ""
+        print(f"{gerado['tempo']:6.2f}s  {gerado['registros']:>5} registros  {gerado['arquivo']}{professor}")
+    for modalidade in resultado["vazios"]:
+        print(f"Sem contratos: {modalidade} {args.mes}/{args.ano}")
+    for erro in resultado["erros"]:
+        print(f"Erro em {erro['arquivo']}: {erro['erro']}", file=sys.stderr)
+    print(f"{len(resultado['gerados'])} PDFs gerados")
+    return 1 if resultado["erros"] else 0
+
+def comando_totais(args):
+    """Mostra os totais do dashboard por modalidade e mês"""
+    df = db.buscar_dados_dashboard(
+        args.ano,
+        agregar_no_servidor=not args.agregar_no_cliente,
+        usar_resumo=not (args.sem_resumo or args.agregar_no_cliente)
+    )
+    if df.empty:
+        print("Nenhum dado encontrado")
+        return 0
+    df = df.assign(ordem_mes=df['mes'].map(MESES_ABREV.index)).sort_values(['ano', 'ordem_mes', 'modalidade'])
+    for linha in df.itertuples(index=False):
+        print(
+            f"{linha.ano} {linha.mes}  {linha.modalidade:<8} {linha.num_registros:>5} contratos  "
+            f"{formatar_moeda(linha.total_valor_mensal, 'R$ '):>15}  50%: {formatar_moeda(linha.total_50_percent, 'R$ '):>15}"
+        )
+    print(f"Total 50%: {formatar_moeda(df['total_50_percent'].sum(), 'R$ ')}")
+    return 0
+
+def comando_reconstruir_resumo(args):
+    """Recalcula a coleção resumo_mensal a partir dos contratos"""
+    resumo = db.reconstruir_resumo_mensal(args.ano)
+    print(f"{resumo['periodos']} períodos no resumo mensal, {resumo['removidos']} removidos")
+    return 0
+
+def comando_fluxo_caixa(args):
+    """Receitas, despesas pagas e saldo por dia, semana ou mês"""
+    df = fluxo_caixa(args.inicio, args.fim, args.granularidade)
+    if df.empty:
+        print("Nenhum lançamento no intervalo", file=sys.stderr)
+        return 1
+
+    for linha in df.itertuples(index=False):
+        print(
+            f"{linha.data:%d/%m/%Y}  receitas {formatar_moeda(linha.receitas, 'R$ '):>15}  "
+            f"despesas {formatar_moeda(linha.despesas, 'R$ '):>15}  saldo {formatar_moeda(linha.saldo, 'R$ '):>15}"
+        )
+    print(f"Saldo do intervalo: {formatar_moeda(df['saldo'].sum(), 'R$ ')}")
+    return 0
+
+def comando_verificar_indices(args):
+    """Mostra o plano (explain) das consultas principais e quais ainda fazem COLLSCAN"""
+    relatorio = db.verificar_indices()
+    problemas = 0
+    for nome, resultado in relatorio.items():
+        if "erro" in resultado:
+            problemas += 1
+            print(f"{nome:<32} erro: {resultado['erro']}")
+            continue
+        if resultado["collscan"]:
+            problemas += 1
+        situacao = "COLLSCAN" if resultado["collscan"] else "ok"
+        print(f"{nome:<32} {situacao:<8} {' > '.join(resultado['estagios'])}")
+    return 1 if problemas else 0
+
+def _data(texto):
+    """Data DD/MM/AAAA dos argumentos"""
+    return datetime.strptime(texto, '%d/%m/%Y')
+
+def _adicionar_periodo(parser):
+    parser.add_argument('--modalidade', '-m', required=True, choices=MODALIDADES)
+    parser.add_argument('--mes', required=True, choices=MESES_ABREV)
+    parser.add_argument('--ano', type=int, required=True)
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description='Operações de contratos sem a interface Streamlit')
+    parser.add_argument('--uri', help='URI do MongoDB (padrão: variável MONOGO_EASY_PAINEL)')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    importar = subparsers.add_parser('importar', help='Substitui um período pelos contratos de uma planilha')
+    importar.add_argument('arquivo')
+    _adicionar_periodo(importar)
+    importar.add_argument('--upsert', action='store_true', help='Inserir e atualizar sem remover os contratos que não estão na planilha')
+    importar.add_argument('--tamanho-lote', type=int, default=500, help='Operações por bulk_write (padrão: 500)')
+    importar.add_argument('--ordenado', action='store_true', help='Com --upsert, parar o lote no primeiro erro (ordered=True)')
+    importar.set_defaults(funcao=comando_importar)
+
+    importar_lote = subparsers.add_parser('importar-pastas', help='Importa todas as planilhas das pastas das modalidades')
+    importar_lote.add_argument('--pasta', default=str(PASTA_BASE))
+    importar_lote.add_argument('--ano', type=int)
+    importar_lote.add_argument('--modalidade', action='append', choices=MODALIDADES)
+    importar_lote.add_argument('--processos', type=int)
+    importar_lote.add_argument('--simular', action='store_true', help='Apenas ler as planilhas, sem gravar')
+    importar_lote.set_defaults(funcao=comando_importar_pastas)
+
+    reimportar = subparsers.add_parser('reimportar', help='Grava apenas as alterações de uma planilha')
+    reimportar.add_argument('arquivo')
+    _adicionar_periodo(reimportar)
+    reimportar.add_argument('--simular', action='store_true', help='Apenas mostrar as alterações')
+    reimportar.set_defaults(funcao=comando_reimportar)
+
+    pdf = subparsers.add_parser('pdf', help='Gera o PDF de pagamentos de um período')
+    _adicionar_periodo(pdf)
+    pdf.add_argument('--professor', help="Filtrar por professor (ou 'Sem Professor')")
+    pdf.add_argument('--pasta', help='Pasta de destino (padrão: pasta da modalidade)')
+    pdf.set_defaults(funcao=comando_pdf)
+
+    relatorios = subparsers.add_parser('relatorios', help='Gera todos os PDFs de fechamento do mês')
+    relatorios.add_argument('--mes', required=True, choices=MESES_ABREV)
+    relatorios.add_argument('--ano', type=int, required=True)
+    relatorios.add_argument('--modalidade', action='append', choices=MODALIDADES)
+    relatorios.add_argument('--processos', type=int)
+    relatorios.add_argument('--pasta', default=str(PASTA_BASE), help='Pasta que contém as pastas das modalidades')
+    relatorios.set_defaults(funcao=comando_relatorios)
+
+    totais = subparsers.add_parser('totais', help='Totais do dashboard por modalidade e mês')
+    totais.add_argument('--ano', type=int)
+    totais.add_argument('--agregar-no-cliente', action='store_true', help='Agregar no pandas em vez do MongoDB')
+    totais.add_argument('--sem-resumo', action='store_true', help='Agregar os contratos em vez de ler o resumo mensal')
+    totais.set_defaults(funcao=comando_totais)
+
+    reconstruir = subparsers.add_parser('reconstruir-resumo', help='Recalcula o resumo mensal usado pelo dashboard')
+    reconstruir.add_argument('--ano', type=int, help='Reconstruir apenas este ano')
+    reconstruir.set_defaults(funcao=comando_reconstruir_resumo)
+
+    indices = subparsers.add_parser('verificar-indices', help='Explain das consultas principais (aponta COLLSCAN)')
+    # explain não faz parte da Stable API: conexão sem o modo strict
+    indices.set_defaults(funcao=comando_verificar_indices, strict=False)
+
+    fluxo = subparsers.add_parser('fluxo-caixa', help='Receitas, despesas pagas e saldo por período')
+    fluxo.add_argument('--inicio', type=_data, help='DD/MM/AAAA (padrão: 12 meses atrás)')
+    fluxo.add_argument('--fim', type=_data, help='DD/MM/AAAA, exclusivo (padrão: sem limite)')
+    fluxo.add_argument('--granularidade', choices=list(GRANULARIDADES), default='mes')
+    fluxo.set_defaults(funcao=comando_fluxo_caixa)
+
+    return parser
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    inicio = time.perf_counter()
+    try:
+        if not (args.comando == 'importar-pastas' and args.simular):
+            db.usar_conexao(db.criar_conexao(args.uri, strict=getattr(args, 'strict', True)))
+        codigo = args.funcao(args)
+    except Exception as e:
+        print(f"Erro: {str(e)}", file=sys.stderr)
+        codigo = 1
+    print(f"{args.comando} concluído em {time.perf_counter() - inicio:.2f}s", file=sys.stderr)
+    return codigo
+
+if __name__ == '__main__':
+    raise SystemExit(main())
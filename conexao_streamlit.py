@@ -0,0 +1,10 @@
+import streamlit as st
+
+from db import criar_conexao
+
+@st.cache_resource
+def conexao_streamlit():
+    # Executado uma vez por processo (cache_resource)
+    db = criar_conexao()
+    st.session_state.db = db
+    return db
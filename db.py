@@ -1,68 +1,226 @@
 from bson import ObjectId
 from dotenv import load_dotenv
 import pandas as pd
-from pymongo import MongoClient
-import streamlit as st
+from pymongo import DeleteMany, InsertOne, MongoClient, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure, PyMongoError
 import pymongo
 from datetime import datetime
+import hashlib
+import json
+import logging
 import os
+import re
 import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-filtro = {
-    "data": {"$gte": datetime(2025, 1, 1)}  # Data maior ou igual a 1 de janeiro de 2025
+from planos import meses_do_plano
+from cache import cache_contratos, cache_visao_geral, catalogo_modalidades
+from planilhas import blocos_documentos_planilha
+
+logger = logging.getLogger(__name__)
+
+# Campos que identificam um contrato único (chave do upsert)
+CHAVE_CONTRATO = ("id_cliente", "modalidade", "mes", "ano")
+
+# Campos de negócio comparados na importação incremental
+CAMPOS_NEGOCIO = ("nome_completo", "contratos", "valor", "inicio", "vencimento", "valor_mensal", "professor")
+
+# Campo no banco -> nome da coluna exibida nas páginas (aplicado na projeção de buscar_contratos)
+COLUNAS_EXIBICAO = {
+    "id_cliente": "ID do cliente",
+    "nome_completo": "nome_completo",
+    "contratos": "Contratos",
+    "valor": "Valor",
+    "inicio": "Início",
+    "vencimento": "Vencimento",
+    "valor_mensal": "VALOR_MENSAL",
+    "professor": "Professor"
 }
 
-filtro_despesas = {
-    "data": {"$gte": datetime(2025, 1, 1)},  # Data maior ou igual a 1 de janeiro de 2025
-    "$or": [
-        {"pago": True},   # Registros onde pago é True
-        {"pago": {"$exists": False}}  # Registros onde pago não existe
-    ]
+# Documentos por lote lidos do cursor de buscar_contratos
+TAMANHO_LOTE_LEITURA = 1000
+
+# Opção de filtro para contratos sem professor (professor nulo ou ausente no banco)
+SEM_PROFESSOR = "Sem Professor"
+
+# Tipos das colunas devolvidas por buscar_contratos (planos e professores se repetem muito)
+COLUNAS_CATEGORICAS = ("Contratos", "Professor")
+COLUNAS_DATAS = ("Início", "Vencimento")
+COLUNAS_VALORES = ("Valor", "VALOR_MENSAL")
+
+# Índices da coleção de contratos: (chaves, opções)
+INDICES_CONTRATOS = [
+    # Chave do upsert de cadastrar_contrato/importação
+    ([(campo, pymongo.ASCENDING) for campo in CHAVE_CONTRATO], {"name": "chave_contrato", "unique": True}),
+    # buscar_contratos (com ou sem professor), buscar_professores_periodo,
+    # deletar_contratos_por_periodo e atualizar_contrato: o prefixo (modalidade, mes, ano)
+    # atende as consultas só por período
+    ([("modalidade", pymongo.ASCENDING), ("mes", pymongo.ASCENDING), ("ano", pymongo.ASCENDING), ("professor", pymongo.ASCENDING)], {"name": "periodo_professor"}),
+    # buscar_professores_unicos
+    ([("modalidade", pymongo.ASCENDING), ("professor", pymongo.ASCENDING)], {"name": "modalidade_professor"}),
+    # buscar_planos_unicos
+    ([("modalidade", pymongo.ASCENDING), ("contratos", pymongo.ASCENDING)], {"name": "modalidade_contratos"}),
+    # buscar_dados_dashboard (agregação direta) e reconstruir_resumo_mensal
+    ([("ano", pymongo.ASCENDING)], {"name": "ano"}),
+]
+
+# Índices da coleção resumo_mensal (um documento por modalidade, mês e ano)
+INDICES_RESUMO_MENSAL = [
+    ([("modalidade", pymongo.ASCENDING), ("mes", pymongo.ASCENDING), ("ano", pymongo.ASCENDING)], {"name": "resumo_periodo", "unique": True}),
+    ([("ano", pymongo.ASCENDING)], {"name": "resumo_ano"}),
+]
+
+# Índices do fluxo de caixa (fluxo_caixa.py): intervalo de datas e, nas despesas, o pagamento
+INDICES_DESPESAS = [
+    ([("data", pymongo.ASCENDING), ("pago", pymongo.ASCENDING)], {"name": "despesas_data_pago"}),
+]
+INDICES_RECEITAS = [
+    ([("data", pymongo.ASCENDING)], {"name": "receitas_data"}),
+]
+
+# Consultas representativas usadas por verificar_indices (nome -> filtro)
+CONSULTAS_CONTRATOS = {
+    "buscar_contratos": {"modalidade": "pilates", "mes": "jan", "ano": 2025},
+    "buscar_contratos_professor": {"modalidade": "pilates", "mes": "jan", "ano": 2025, "professor": "-"},
+    "buscar_contratos_sem_professor": {"modalidade": "pilates", "mes": "jan", "ano": 2025, "professor": None},
+    "cadastrar_contrato": {"id_cliente": "0", "modalidade": "pilates", "mes": "jan", "ano": 2025},
+    "buscar_professores_unicos": {"modalidade": "pilates", "professor": {"$ne": None, "$exists": True}},
+    "buscar_dados_dashboard": {"ano": 2025},
+    "buscar_planos_periodo": {"mes": "jan", "ano": 2025},
 }
-@st.cache_resource
-def conexao():
+
+def garantir_indices(db):
+    """Cria os índices de contratos, resumo mensal, despesas e receitas (idempotente)
+    
+    Returns:
+        dict com o nome de cada índice e 'ok' ou a mensagem de erro
+    """
+    resultado = {}
+    indices = [("contratos", indice) for indice in INDICES_CONTRATOS]
+    indices += [("resumo_mensal", indice) for indice in INDICES_RESUMO_MENSAL]
+    indices += [("despesas", indice) for indice in INDICES_DESPESAS]
+    indices += [("receitas", indice) for indice in INDICES_RECEITAS]
+    
+    for nome_colecao, (chaves, opcoes) in indices:
+        colecao = db[nome_colecao]
+        try:
+            colecao.create_index(chaves, **opcoes)
+            resultado[opcoes["name"]] = "ok"
+        except OperationFailure as e:
+            if not opcoes.get("unique"):
+                resultado[opcoes["name"]] = str(e)
+                continue
+            # Contratos duplicados antigos impedem o índice único: criar sem unicidade
+            try:
+                colecao.create_index(chaves, name=f'{opcoes["name"]}_nao_unico')
+                resultado[opcoes["name"]] = f"criado sem unicidade: {e}"
+            except PyMongoError as erro:
+                resultado[opcoes["name"]] = str(erro)
+        except PyMongoError as e:
+            resultado[opcoes["name"]] = str(e)
+    
+    return resultado
+
+def _estagios_do_plano(plano):
+    """Lista os estágios (COLLSCAN, IXSCAN, FETCH...) de um plano retornado pelo explain"""
+    if not isinstance(plano, dict):
+        return []
+    estagios = [plano["stage"]] if "stage" in plano else []
+    for chave in ("queryPlan", "inputStage"):
+        estagios += _estagios_do_plano(plano.get(chave))
+    for subplano in plano.get("inputStages", []):
+        estagios += _estagios_do_plano(subplano)
+    return estagios
+
+def verificar_indices(db=None):
+    """Executa explain() nas consultas principais e informa quais ainda fazem COLLSCAN
+    
+    Args:
+        db: Banco a usar (padrão: conexao()). O explain não faz parte da Stable API: use uma
+            conexão criada com criar_conexao(strict=False), como faz cli.py verificar-indices.
+    
+    Returns:
+        dict nome da consulta -> {'estagios': [...], 'collscan': bool} ou {'erro': mensagem}
+    """
+    db = db if db is not None else conexao()
+    contratos_collection = db["contratos"]
+    relatorio = {}
+    
+    for nome, filtro in CONSULTAS_CONTRATOS.items():
+        try:
+            plano = contratos_collection.find(filtro).explain()
+        except PyMongoError as e:
+            # Com a Stable API em modo strict o comando explain pode ser recusado
+            relatorio[nome] = {"erro": str(e)}
+            continue
+        estagios = _estagios_do_plano(plano.get("queryPlanner", {}).get("winningPlan", {}))
+        relatorio[nome] = {"estagios": estagios, "collscan": "COLLSCAN" in estagios}
+    
+    return relatorio
+
+def criar_conexao(uri=None, nome_banco="quattor", strict=True):
+    """Cria a conexão com o MongoDB sem depender do Streamlit (linha de comando e scripts)
+    
+    Args:
+        uri: URI do MongoDB (padrão: variável de ambiente MONOGO_EASY_PAINEL)
+        nome_banco: Nome do banco
+        strict: Stable API em modo strict (False permite comandos fora dela, como explain)
+    """
     try:
         load_dotenv()
-        uri = os.getenv("MONOGO_EASY_PAINEL")
+        uri = uri or os.getenv("MONOGO_EASY_PAINEL")
         client = MongoClient(uri, server_api=pymongo.server_api.ServerApi(
-        version="1", strict=True, deprecation_errors=True))
+        version="1", strict=strict, deprecation_errors=strict))
     except Exception as e:
         raise Exception(
             "Erro: ", e)
-    db = client["quattor"]
-    st.session_state.db = db
-    return  db
+    db = client[nome_banco]
+    # create_index é idempotente
+    garantir_indices(db)
+    garantir_resumo_mensal(db)
+    return db
+
+# Conexão definida por usar_conexao (linha de comando); None usa a conexão do Streamlit.
+# O Streamlit só é importado por conexao() sem conexão fixa e pelas funções que gravam no
+# session_state: a linha de comando usa este módulo sem carregá-lo.
+_conexao_fixa = None
+
+def usar_conexao(db):
+    """Faz todas as funções deste módulo usarem a conexão informada (None volta ao padrão)"""
+    global _conexao_fixa
+    _conexao_fixa = db
+
+def conexao():
+    """Conexão usada pelas funções deste módulo"""
+    if _conexao_fixa is not None:
+        return _conexao_fixa
+    from conexao_streamlit import conexao_streamlit
+    return conexao_streamlit()
 
 
 def calcular_valor_mensal(plano, valor):
     """Calcula o valor mensal baseado no tipo de plano"""
     if pd.isna(plano) or pd.isna(valor):
         return valor
-    plano_str = str(plano).upper()
-    if "15 MESES" in plano_str:
-        return valor / 15
-    elif "ANUAL" in plano_str or "12 MESES" in plano_str:
-        return valor / 12
-    elif "SEMESTRAL" in plano_str:
-        return valor / 6
-    elif "TRIMESTRAL" in plano_str:
-        return valor / 3
-    else:
-        return valor
+    return valor / meses_do_plano(plano)
 
-def cadastrar_contrato(id_cliente, nome_completo, contratos, valor, inicio, vencimento, valor_mensal, professor, modalidade, mes_abrev, ano):
-    """Cadastra um contrato no MongoDB"""
-    db = conexao()
-    contratos_collection = db["contratos"]
-    
-    # Tratar professor: garantir que seja None se vazio ou NaN
-    professor_final = None
-    if professor is not None:
-        if isinstance(professor, str):
-            professor_final = professor.strip() if professor.strip() else None
-        elif not pd.isna(professor):
-            professor_final = str(professor).strip() if str(professor).strip() else None
-    
+def _normalizar_professor(professor):
+    """Retorna o nome do professor sem espaços extras ou None se vazio/NaN"""
+    if professor is None:
+        return None
+    if isinstance(professor, str):
+        return professor.strip() if professor.strip() else None
+    if pd.isna(professor):
+        return None
+    return str(professor).strip() if str(professor).strip() else None
+
+def _filtro_contrato(contrato):
+    """Filtro da chave de upsert de um documento de contrato"""
+    return {campo: contrato[campo] for campo in CHAVE_CONTRATO}
+
+def montar_contrato(id_cliente, nome_completo, contratos, valor, inicio, vencimento, valor_mensal, professor, modalidade, mes_abrev, ano):
+    """Monta o documento do contrato e o filtro da chave de upsert (id_cliente, modalidade, mês e ano)"""
     contrato = {
         "id_cliente": str(id_cliente),
         "nome_completo": nome_completo,
@@ -71,20 +229,40 @@ def cadastrar_contrato(id_cliente, nome_completo, contratos, valor, inicio, venc
         "inicio": inicio,
         "vencimento": vencimento,
         "valor_mensal": float(valor_mensal) if not pd.isna(valor_mensal) else 0.0,
-        "professor": professor_final,
+        "professor": _normalizar_professor(professor),
         "modalidade": modalidade,
         "mes": mes_abrev,
         "ano": int(ano),
         "criado_em": datetime.now()
     }
     
+    return contrato, _filtro_contrato(contrato)
+
+def _registrar_escrita(modalidade, mes_abrev, ano, altera_catalogo=True):
+    """Invalida os caches e atualiza o resumo mensal após uma escrita nos contratos do período"""
+    cache_contratos.invalidar_periodo(modalidade, mes_abrev, ano)
+    cache_visao_geral.invalidar_periodo(None, mes_abrev, ano)
+    if altera_catalogo:
+        catalogo_modalidades.invalidar(modalidade)
+    db = conexao()
+    try:
+        # Resumo ainda não construído: montar todos os períodos, não só o que foi alterado
+        if not garantir_resumo_mensal(db):
+            atualizar_resumo_periodo(db, modalidade, mes_abrev, ano)
+    except PyMongoError as e:
+        # Não impede a escrita dos contratos; reconstruir_resumo_mensal corrige o resumo
+        logger.warning("Erro ao atualizar o resumo mensal de %s %s/%s: %s", modalidade, mes_abrev, ano, e)
+
+def cadastrar_contrato(id_cliente, nome_completo, contratos, valor, inicio, vencimento, valor_mensal, professor, modalidade, mes_abrev, ano):
+    """Cadastra um contrato no MongoDB"""
+    db = conexao()
+    contratos_collection = db["contratos"]
+    
     # Verificar se já existe contrato com mesmo id_cliente, modalidade, mês e ano
-    filtro_existente = {
-        "id_cliente": str(id_cliente),
-        "modalidade": modalidade,
-        "mes": mes_abrev,
-        "ano": int(ano)
-    }
+    contrato, filtro_existente = montar_contrato(
+        id_cliente, nome_completo, contratos, valor, inicio, vencimento,
+        valor_mensal, professor, modalidade, mes_abrev, ano
+    )
     
     # Atualizar se existir, inserir se não existir
     contratos_collection.update_one(
@@ -92,114 +270,522 @@ def cadastrar_contrato(id_cliente, nome_completo, contratos, valor, inicio, venc
         {"$set": contrato},
         upsert=True
     )
+    _registrar_escrita(modalidade, mes_abrev, ano)
     
     return contrato
 
-def importar_planilha_para_mongodb(arquivo_path, modalidade, mes_abrev, ano):
-    """Importa dados de uma planilha Excel para o MongoDB"""
+def importar_planilha_em_lote(arquivo_path, modalidade, mes_abrev, ano, tamanho_lote=500, ordenado=False):
+    """Importa uma planilha enviando os upserts em lotes com bulk_write
+    
+    A planilha é lida em blocos de tamanho_lote linhas (blocos_documentos_planilha) e cada
+    bloco é gravado assim que lido, sem carregar a planilha inteira na memória. Ao contrário de
+    substituir_periodo_por_planilha, os contratos do período que não estão na planilha são mantidos.
+    
+    Args:
+        arquivo_path: Caminho da planilha
+        modalidade: Modalidade dos contratos
+        mes_abrev: Mês abreviado
+        ano: Ano
+        tamanho_lote: Quantidade de operações enviadas em cada bulk_write
+        ordenado: Se True, o lote para no primeiro erro (ordered=True)
+    
+    Returns:
+        dict com inseridos, atualizados, ignorados (linhas sem ID), total de linhas lidas
+        e preview (primeiras linhas da planilha)
+    """
+    if tamanho_lote < 1:
+        raise ValueError("tamanho_lote deve ser maior que zero")
+    
     try:
-        # Colunas padrão para todas as modalidades
-        colunas_base = ['ID do cliente', 'Nome', 'Sobrenome', 'Contratos', 'Início', 'Vencimento', 'Valor']
-        
-        # Primeiro, ler apenas para verificar quais colunas existem
-        df_temp = pd.read_excel(arquivo_path, nrows=0)
-        colunas_disponiveis = df_temp.columns.tolist()
-        
-        # Adicionar Professor se existir na planilha
-        colunas = colunas_base.copy()
-        if 'Professor' in colunas_disponiveis:
-            colunas.append('Professor')
-        
-        # Ler planilha com as colunas corretas
-        df = pd.read_excel(arquivo_path, usecols=colunas)
+        db = conexao()
+        contratos_collection = db["contratos"]
         
-        # Processar dados
-        df['nome_completo'] = df['Nome'].fillna('') + ' ' + df['Sobrenome'].fillna('')
-        df['nome_completo'] = df['nome_completo'].str.strip()
+        resumo = {
+            "inseridos": 0,
+            "atualizados": 0,
+            "total": 0
+        }
+        leitura = {}
         
-        # Converter datas para string
-        if 'Início' in df.columns:
-            df['Início'] = pd.to_datetime(df['Início'], errors='coerce').dt.strftime("%d/%m/%Y")
-        if 'Vencimento' in df.columns:
-            df['Vencimento'] = pd.to_datetime(df['Vencimento'], errors='coerce').dt.strftime("%d/%m/%Y")
+        for documentos in blocos_documentos_planilha(arquivo_path, modalidade, mes_abrev, ano, tamanho_lote, leitura):
+            resumo["total"] += len(documentos)
+            operacoes = [
+                UpdateOne(_filtro_contrato(contrato), {"$set": contrato}, upsert=True)
+                for contrato in documentos
+            ]
+            resultado = contratos_collection.bulk_write(operacoes, ordered=ordenado)
+            resumo["inseridos"] += resultado.upserted_count
+            resumo["atualizados"] += resultado.matched_count
         
-        # Calcular valor mensal
-        df['valor_mensal'] = df.apply(
-            lambda row: calcular_valor_mensal(row.get('Contratos', ''), row.get('Valor', 0)), 
-            axis=1
-        )
-        
-        # Preparar professor (None se não existir ou se for NaN)
-        professor_col = 'Professor' if 'Professor' in df.columns else None
-        
-        # Inserir no banco
-        contratos_inseridos = 0
-        for _, row in df.iterrows():
-            id_cliente = row.get('ID do cliente', '')
-            if pd.isna(id_cliente) or id_cliente == '':
-                continue
-            
-            # Tratar professor: converter NaN para None
-            professor_valor = None
-            if professor_col and professor_col in df.columns:
-                professor_valor = row.get(professor_col)
-                if pd.isna(professor_valor) or professor_valor == '':
-                    professor_valor = None
-                else:
-                    professor_valor = str(professor_valor).strip()
-                    if professor_valor == '':
-                        professor_valor = None
-                
-            cadastrar_contrato(
-                id_cliente=str(id_cliente),
-                nome_completo=row.get('nome_completo', ''),
-                contratos=str(row.get('Contratos', '')),
-                valor=row.get('Valor', 0),
-                inicio=row.get('Início', ''),
-                vencimento=row.get('Vencimento', ''),
-                valor_mensal=row.get('valor_mensal', 0),
-                professor=professor_valor,
-                modalidade=modalidade,
-                mes_abrev=mes_abrev,
-                ano=ano
+        resumo["ignorados"] = leitura["ignorados"]
+        resumo["total"] += leitura["ignorados"]
+        resumo["preview"] = leitura["preview"]
+        return resumo
+    except BulkWriteError as e:
+        raise Exception(f"Erro ao importar planilha em lote: {e.details.get('writeErrors', [])[:3]}")
+    except Exception as e:
+        raise Exception(f"Erro ao importar planilha: {str(e)}")
+    finally:
+        _registrar_escrita(modalidade, mes_abrev, ano)
+
+def _suporta_transacoes(client):
+    """Indica se o servidor aceita transações (replica set ou cluster shardado)"""
+    try:
+        # Força a descoberta da topologia antes de consultá-la
+        client.admin.command("ping")
+        tipo = client.topology_description.topology_type_name
+    except (AttributeError, PyMongoError):
+        return False
+    return tipo in ("ReplicaSetWithPrimary", "Sharded")
+
+def _deduplicar_contratos(documentos):
+    """Mantém apenas o último documento de cada chave de contrato (mesma regra do upsert)"""
+    por_chave = {}
+    for contrato in documentos:
+        por_chave[_chave_contrato(contrato)] = contrato
+    return list(por_chave.values())
+
+def _chave_contrato(contrato):
+    """Valores da chave do upsert (id_cliente, modalidade, mês e ano)"""
+    return tuple(contrato[campo] for campo in CHAVE_CONTRATO)
+
+def _blocos_da_lista(documentos, tamanho_lote):
+    """Divide uma lista de documentos em blocos de tamanho_lote"""
+    for inicio in range(0, len(documentos), tamanho_lote):
+        yield documentos[inicio:inicio + tamanho_lote]
+
+def _substituir_periodo_transacao(db, filtro_periodo, gerar_blocos):
+    """Remove o período e insere os novos contratos dentro de uma única transação
+    
+    Se a transação for repetida (erro transitório), gerar_blocos() é chamado de novo.
+    """
+    contratos_collection = db["contratos"]
+    
+    def operacao(sessao):
+        removidos = contratos_collection.delete_many(filtro_periodo, session=sessao).deleted_count
+        gravados = set()
+        for bloco in gerar_blocos():
+            # Período vazio dentro da transação: insert direto, sem busca pela chave do upsert;
+            # só chaves repetidas de blocos anteriores são substituídas (o último documento vence)
+            novos, repetidos = [], []
+            for contrato in _deduplicar_contratos(bloco):
+                chave = _chave_contrato(contrato)
+                (repetidos if chave in gravados else novos).append(contrato)
+                gravados.add(chave)
+            if novos:
+                contratos_collection.insert_many(novos, ordered=False, session=sessao)
+            if repetidos:
+                contratos_collection.bulk_write(
+                    [ReplaceOne(_filtro_contrato(contrato), contrato) for contrato in repetidos],
+                    ordered=False, session=sessao
+                )
+        return removidos, len(gravados)
+    
+    with db.client.start_session() as sessao:
+        return sessao.with_transaction(operacao)
+
+def _substituir_periodo_versionado(db, filtro_periodo, gerar_blocos):
+    """Grava os novos contratos marcados com um lote e depois remove os que não são do lote
+    
+    Não é atômico: o período nunca fica vazio, mas enquanto a troca acontece os leitores
+    podem ver uma mistura de contratos antigos e novos (cada contrato é trocado pela nova
+    versão e só no final saem os que não existem na nova planilha). Se a gravação falhar no
+    meio, o período continua completo com versões misturadas e reimportar corrige. Ao final
+    (ou na falha) o campo 'lote' é removido dos contratos.
+    """
+    contratos_collection = db["contratos"]
+    lote = ObjectId()
+    gravados = set()
+    
+    try:
+        for bloco in gerar_blocos():
+            # Deduplicado no bloco: a ordem de um bulk_write não ordenado não é garantida
+            bloco = _deduplicar_contratos(bloco)
+            gravados.update(_chave_contrato(contrato) for contrato in bloco)
+            contratos_collection.bulk_write(
+                [
+                    ReplaceOne(_filtro_contrato(contrato), dict(contrato, lote=lote), upsert=True)
+                    for contrato in bloco
+                ],
+                ordered=False
             )
-            contratos_inseridos += 1
         
-        return contratos_inseridos
+        filtro_antigos = dict(filtro_periodo, lote={"$ne": lote})
+        removidos = contratos_collection.delete_many(filtro_antigos).deleted_count
+    finally:
+        contratos_collection.update_many(dict(filtro_periodo, lote=lote), {"$unset": {"lote": ""}})
+    return removidos, len(gravados)
+
+def _substituir_periodo_em_blocos(gerar_blocos, modalidade, mes_abrev, ano):
+    """Troca o período pelos documentos dos blocos (ver substituir_periodo)"""
+    db = conexao()
+    filtro_periodo = {
+        "modalidade": modalidade,
+        "mes": mes_abrev,
+        "ano": int(ano)
+    }
+    
+    try:
+        if _suporta_transacoes(db.client):
+            removidos, inseridos = _substituir_periodo_transacao(db, filtro_periodo, gerar_blocos)
+            modo = "transacao"
+        else:
+            removidos, inseridos = _substituir_periodo_versionado(db, filtro_periodo, gerar_blocos)
+            modo = "versionado"
+    finally:
+        _registrar_escrita(modalidade, mes_abrev, ano)
+    
+    return {"removidos": removidos, "inseridos": inseridos, "modo": modo}
+
+def substituir_periodo(documentos, modalidade, mes_abrev, ano, tamanho_lote=500):
+    """Substitui todos os contratos de um período pelos documentos informados
+    
+    Os documentos são gravados em blocos de tamanho_lote; se houver mais de um com a mesma
+    chave, o último vence. Se o servidor suporta transações, a troca é um delete + insert
+    atômico; caso contrário usa lotes versionados (campo 'lote', removido ao final), que não
+    são atômicos: durante a troca os leitores podem ver contratos antigos e novos
+    misturados. Em nenhum caso leitores veem o período vazio.
+    
+    Returns:
+        dict com removidos, inseridos e modo ('transacao' ou 'versionado')
+    """
+    if tamanho_lote < 1:
+        raise ValueError("tamanho_lote deve ser maior que zero")
+    
+    documentos = list(documentos)
+    return _substituir_periodo_em_blocos(
+        lambda: _blocos_da_lista(documentos, tamanho_lote), modalidade, mes_abrev, ano
+    )
+
+def substituir_periodo_por_planilha(arquivo_path, modalidade, mes_abrev, ano, tamanho_lote=500):
+    """Substitui o período inteiro pelos contratos da planilha (ver substituir_periodo)
+    
+    A planilha é lida e gravada bloco a bloco (blocos_documentos_planilha): a memória usada
+    não depende do tamanho do arquivo. Com transação, uma nova tentativa relê o arquivo.
+    
+    Returns:
+        dict com removidos, inseridos, ignorados (linhas sem ID), modo e preview
+    """
+    if tamanho_lote < 1:
+        raise ValueError("tamanho_lote deve ser maior que zero")
+    
+    leitura = {}
+    try:
+        resumo = _substituir_periodo_em_blocos(
+            lambda: blocos_documentos_planilha(arquivo_path, modalidade, mes_abrev, ano, tamanho_lote, leitura),
+            modalidade, mes_abrev, ano
+        )
     except Exception as e:
-        raise Exception(f"Erro ao importar planilha: {str(e)}")
+        raise Exception(f"Erro ao substituir período: {str(e)}")
+    
+    resumo["ignorados"] = leitura["ignorados"]
+    resumo["preview"] = leitura["preview"]
+    return resumo
 
-def buscar_contratos(modalidade, mes_abrev, ano, professor=None):
-    """Busca contratos do MongoDB filtrados por modalidade, mês e ano"""
+def _vazio(valor):
+    """None, NaN/NaT ou texto em branco"""
+    if valor is None:
+        return True
+    if isinstance(valor, str):
+        return not valor.strip()
+    return bool(pd.isna(valor)) if pd.api.types.is_scalar(valor) else False
+
+def _id_normalizado(id_cliente):
+    """ID como a importação atual grava: texto, sem o '.0' de IDs lidos como float ('21441.0')"""
+    if _vazio(id_cliente):
+        return None
+    if isinstance(id_cliente, float) and id_cliente.is_integer():
+        return str(int(id_cliente))
+    texto = str(id_cliente).strip()
+    if re.fullmatch(r"\d+\.0+", texto):
+        return texto.split(".")[0]
+    return texto
+
+def _data_normalizada(valor):
+    """Data como DD/MM/AAAA (formato da importação atual), None se vazia ou inválida"""
+    if _vazio(valor):
+        return None
+    if isinstance(valor, str):
+        valor = valor.strip()
+        if re.fullmatch(r"\d{2}/\d{2}/\d{4}", valor):
+            return valor
+    data = pd.to_datetime(valor, dayfirst=True, errors="coerce")
+    return None if pd.isna(data) else data.strftime("%d/%m/%Y")
+
+def _numero_normalizado(valor):
+    """Número em centavos (0.0 se vazio ou inválido), sem diferenças de ponto flutuante"""
+    try:
+        numero = float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if pd.isna(numero) else round(numero, 2)
+
+def _campos_negocio_normalizados(contrato):
+    """Campos de negócio com as regras de preparar_documentos_contratos
+    
+    Documentos antigos (datas NaN ou em datetime, textos com espaços, valores em texto)
+    ficam iguais aos gerados hoje a partir da mesma linha da planilha.
+    """
+    return [
+        str(contrato.get("nome_completo") or "").strip() if not _vazio(contrato.get("nome_completo")) else "",
+        str(contrato.get("contratos")).strip() if not _vazio(contrato.get("contratos")) else "",
+        _numero_normalizado(contrato.get("valor")),
+        _data_normalizada(contrato.get("inicio")),
+        _data_normalizada(contrato.get("vencimento")),
+        _numero_normalizado(contrato.get("valor_mensal")),
+        _normalizar_professor(contrato.get("professor")),
+    ]
+
+def _hash_contrato(contrato):
+    """Hash dos campos de negócio normalizados (ignora _id, criado_em e lote)"""
+    conteudo = json.dumps(_campos_negocio_normalizados(contrato), default=str, ensure_ascii=False)
+    return hashlib.sha1(conteudo.encode("utf-8")).hexdigest()
+
+def calcular_diff_periodo(documentos, modalidade, mes_abrev, ano):
+    """Compara os documentos novos com os contratos já gravados no período
+    
+    O período é lido uma única vez e de cada contrato gravado fica só o ID, o nome e o hash
+    dos campos de negócio normalizados. Os documentos novos podem vir de um gerador (por
+    exemplo blocos_documentos_planilha): só os novos e os alterados ficam na memória. Os IDs
+    também são comparados normalizados: um contrato antigo gravado como '21441.0'
+    corresponde à linha '21441'. Se um ID se repete, o último documento vence.
+    
+    Returns:
+        dict com 'inserir' e 'atualizar' (documentos novos), 'remover' (contratos gravados
+        que não estão nos novos: id_cliente e nome_completo), 'inalterados' (quantidade),
+        'ids_gravados' (ID novo -> ID gravado, quando diferem) e o período (modalidade, mes, ano)
+    """
     db = conexao()
     contratos_collection = db["contratos"]
     
+    filtro_periodo = {
+        "modalidade": modalidade,
+        "mes": mes_abrev,
+        "ano": int(ano)
+    }
+    projecao = dict({"_id": 0, "id_cliente": 1}, **{campo: 1 for campo in CAMPOS_NEGOCIO})
+    existentes, repetidos = {}, []
+    for doc in contratos_collection.find(filtro_periodo, projecao):
+        gravado = {"id_cliente": doc.get("id_cliente"), "nome_completo": doc.get("nome_completo"), "hash": _hash_contrato(doc)}
+        chave = _id_normalizado(gravado["id_cliente"])
+        anterior = existentes.get(chave)
+        if anterior is not None:
+            # '21441.0' e '21441' gravados no mesmo período: fica o de ID normalizado
+            if anterior["id_cliente"] == chave:
+                repetidos.append(gravado)
+                continue
+            repetidos.append(anterior)
+        existentes[chave] = gravado
+    
+    inserir, atualizar, vistos = {}, {}, set()
+    for contrato in documentos:
+        chave = _id_normalizado(contrato["id_cliente"])
+        vistos.add(chave)
+        inserir.pop(chave, None)
+        atualizar.pop(chave, None)
+        gravado = existentes.get(chave)
+        if gravado is None:
+            inserir[chave] = contrato
+        elif gravado["hash"] != _hash_contrato(contrato):
+            atualizar[chave] = contrato
+    
+    # A atualização de um contrato antigo substitui o documento gravado (e grava o ID normalizado)
+    ids_gravados = {
+        contrato["id_cliente"]: existentes[chave]["id_cliente"]
+        for chave, contrato in atualizar.items()
+        if existentes[chave]["id_cliente"] != contrato["id_cliente"]
+    }
+    inalterados = sum(1 for chave in vistos if chave in existentes and chave not in atualizar)
+    remover = [
+        {"id_cliente": gravado["id_cliente"], "nome_completo": gravado["nome_completo"]}
+        for chave, gravado in existentes.items()
+        if chave not in vistos
+    ]
+    remover += [{"id_cliente": gravado["id_cliente"], "nome_completo": gravado["nome_completo"]} for gravado in repetidos]
+    
+    return {
+        "modalidade": modalidade,
+        "mes": mes_abrev,
+        "ano": int(ano),
+        "inserir": list(inserir.values()),
+        "atualizar": list(atualizar.values()),
+        "remover": remover,
+        "inalterados": inalterados,
+        "ids_gravados": ids_gravados
+    }
+
+def aplicar_diff_periodo(diff, tamanho_lote=500):
+    """Grava somente as diferenças calculadas por calcular_diff_periodo
+    
+    Returns:
+        dict com inseridos, atualizados e removidos
+    """
+    db = conexao()
+    contratos_collection = db["contratos"]
+    
+    operacoes = [InsertOne(contrato) for contrato in diff["inserir"]]
+    ids_gravados = diff.get("ids_gravados", {})
+    operacoes += [
+        ReplaceOne(
+            dict(_filtro_contrato(contrato), id_cliente=ids_gravados.get(contrato["id_cliente"], contrato["id_cliente"])),
+            contrato,
+            upsert=True
+        )
+        for contrato in diff["atualizar"]
+    ]
+    if diff["remover"]:
+        operacoes.append(DeleteMany({
+            "modalidade": diff["modalidade"],
+            "mes": diff["mes"],
+            "ano": diff["ano"],
+            "id_cliente": {"$in": [contrato["id_cliente"] for contrato in diff["remover"]]}
+        }))
+    
+    resumo = {"inseridos": 0, "atualizados": 0, "removidos": 0}
+    try:
+        for inicio in range(0, len(operacoes), tamanho_lote):
+            resultado = contratos_collection.bulk_write(operacoes[inicio:inicio + tamanho_lote], ordered=False)
+            resumo["inseridos"] += resultado.inserted_count + resultado.upserted_count
+            resumo["atualizados"] += resultado.modified_count
+            resumo["removidos"] += resultado.deleted_count
+    finally:
+        if operacoes:
+            _registrar_escrita(diff["modalidade"], diff["mes"], diff["ano"])
+    
+    return resumo
+
+def diff_periodo_por_planilha(arquivo_path, modalidade, mes_abrev, ano):
+    """Lê a planilha em blocos e calcula o diff com o período gravado (ver calcular_diff_periodo)"""
+    leitura = {}
+    try:
+        documentos = (
+            contrato
+            for bloco in blocos_documentos_planilha(arquivo_path, modalidade, mes_abrev, ano, resumo=leitura)
+            for contrato in bloco
+        )
+        diff = calcular_diff_periodo(documentos, modalidade, mes_abrev, ano)
+    except Exception as e:
+        raise Exception(f"Erro ao comparar planilha: {str(e)}")
+    
+    diff["ignorados"] = leitura["ignorados"]
+    diff["preview"] = leitura["preview"]
+    return diff
+
+def _consultar_contratos(db, modalidade, mes_abrev, ano, professor=None):
+    """Consulta os contratos no MongoDB (sem cache)
+    
+    Só os campos de COLUNAS_EXIBICAO saem do servidor, já com os nomes de exibição
+    ($project). O DataFrame é montado coluna a coluna enquanto o cursor entrega os lotes,
+    sem guardar a lista de documentos.
+    """
+    contratos_collection = db["contratos"]
+    
     filtro = {
         "modalidade": modalidade,
         "mes": mes_abrev,
         "ano": int(ano)
     }
     
-    if professor is not None:
+    if professor == SEM_PROFESSOR:
+        # Casa professor nulo e campo ausente
+        filtro["professor"] = None
+    elif professor is not None:
         filtro["professor"] = professor
     
-    contratos = list(contratos_collection.find(filtro))
+    pipeline = [
+        {"$match": filtro},
+        {"$project": dict({"_id": 0}, **{nome: f"${campo}" for campo, nome in COLUNAS_EXIBICAO.items()})}
+    ]
+    
+    colunas = {nome: [] for nome in COLUNAS_EXIBICAO.values()}
+    for contrato in contratos_collection.aggregate(pipeline, batchSize=TAMANHO_LOTE_LEITURA):
+        for nome, valores in colunas.items():
+            valores.append(contrato.get(nome))
     
-    if not contratos:
+    if not colunas["ID do cliente"]:
         return pd.DataFrame()
     
-    # Converter para DataFrame
-    df = pd.DataFrame(contratos)
+    # Definir índice como ID do cliente
+    return _tipar_contratos(pd.DataFrame(colunas).set_index("ID do cliente"))
+
+def _datas_contratos(serie):
+    """Converte as datas gravadas como DD/MM/AAAA (ou em formatos antigos) para datetime"""
+    datas = pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+    restantes = datas.isna() & serie.notna()
+    if restantes.any():
+        datas[restantes] = pd.to_datetime(serie[restantes], format="mixed", dayfirst=True, errors="coerce")
+    return datas
+
+def _tipar_contratos(df):
+    """Tipos compactos: categorias para planos e professores, datetime para as datas e
+    valores numéricos sem NaN"""
+    for coluna in COLUNAS_CATEGORICAS:
+        df[coluna] = df[coluna].astype("category")
+    for coluna in COLUNAS_DATAS:
+        df[coluna] = _datas_contratos(df[coluna])
+    for coluna in COLUNAS_VALORES:
+        df[coluna] = pd.to_numeric(df[coluna], errors="coerce").fillna(0.0)
+    return df
+
+def buscar_contratos(modalidade, mes_abrev, ano, professor=None):
+    """Busca contratos do MongoDB filtrados por modalidade, mês, ano e opcionalmente professor
     
-    # Remover campos que não devem aparecer na exibição
-    colunas_para_remover = ['_id', 'mes', 'ano', 'criado_em', 'modalidade', 'pago']
-    df = df.drop(columns=[col for col in colunas_para_remover if col in df.columns])
+    professor=SEM_PROFESSOR busca os contratos sem professor; o filtro é aplicado na
+    consulta (índice periodo_professor).
     
-    # Definir índice como ID do cliente
-    if 'id_cliente' in df.columns:
-        df = df.set_index('id_cliente')
+    Retorna as colunas com os nomes de exibição (COLUNAS_EXIBICAO), indexadas por
+    'ID do cliente', com planos e professores categóricos e datas em datetime. O resultado fica em cache por (modalidade, mês, ano, professor) até expirar ou até
+    uma escrita no período (cadastro, edição, exclusão ou importação) invalidá-lo.
+    """
+    db = conexao()
+    chave = cache_contratos.chave(modalidade, mes_abrev, ano, professor)
     
-    return df
+    # Se o período está sendo pré-carregado, espera a leitura em andamento em vez de repeti-la
+    with _lock_precarga:
+        precarga = _precargas_em_andamento.get(chave)
+    if precarga is not None:
+        precarga.result()
+    
+    return cache_contratos.obter(
+        chave,
+        lambda: _consultar_contratos(db, modalidade, mes_abrev, ano, professor)
+    )
+
+# Pré-carregamento em segundo plano dos períodos vizinhos (páginas das modalidades).
+# Poucas threads: as consultas esperam o banco e não devem disputar a CPU com a página.
+_executor_precarga = ThreadPoolExecutor(max_workers=2, thread_name_prefix="precarga")
+_precargas_em_andamento = {}
+_lock_precarga = threading.Lock()
+
+def _precarregar(db, chave, geracao):
+    """Lê um período e guarda no cache (executado nas threads do pré-carregamento)"""
+    try:
+        cache_contratos.guardar(chave, _consultar_contratos(db, *chave), geracao)
+    except Exception:
+        # Pré-carga é só otimização: se falhar, a página consulta o período normalmente
+        pass
+    finally:
+        with _lock_precarga:
+            _precargas_em_andamento.pop(chave, None)
+
+def precarregar_contratos(periodos):
+    """Agenda a leitura em segundo plano dos períodos que ainda não estão no cache de contratos
+    
+    A conexão e a geração de cada período são obtidas aqui, na thread da página: se o período
+    for alterado antes de a leitura terminar, o resultado é descartado (como em obter).
+    
+    Args:
+        periodos: Tuplas (modalidade, mes_abrev, ano, professor)
+    """
+    db = conexao()
+    for modalidade, mes_abrev, ano, professor in periodos:
+        chave = cache_contratos.chave(modalidade, mes_abrev, ano, professor)
+        with _lock_precarga:
+            if chave in _precargas_em_andamento or cache_contratos.contem(chave):
+                continue
+            _precargas_em_andamento[chave] = _executor_precarga.submit(
+                _precarregar, db, chave, cache_contratos.geracao(chave)
+            )
 
 def deletar_contratos_por_periodo(modalidade, mes_abrev, ano):
     """Deleta todos os contratos de um período específico"""
@@ -213,6 +799,7 @@ def deletar_contratos_por_periodo(modalidade, mes_abrev, ano):
     }
     
     resultado = contratos_collection.delete_many(filtro)
+    _registrar_escrita(modalidade, mes_abrev, ano)
     return resultado.deleted_count
 
 def atualizar_contrato(id_cliente, modalidade, mes_abrev, ano, nome_completo=None, contratos=None, valor=None, inicio=None, vencimento=None, valor_mensal=None, professor=None):
@@ -245,86 +832,115 @@ def atualizar_contrato(id_cliente, modalidade, mes_abrev, ano, nome_completo=Non
     
     # Tratar professor
     if professor is not None:
-        professor_final = None
-        if isinstance(professor, str):
-            professor_final = professor.strip() if professor.strip() else None
-        elif not pd.isna(professor):
-            professor_final = str(professor).strip() if str(professor).strip() else None
-        atualizacao["professor"] = professor_final
+        atualizacao["professor"] = _normalizar_professor(professor)
     
     if not atualizacao:
         return False
     
     resultado = contratos_collection.update_one(filtro, {"$set": atualizacao})
+    _registrar_escrita(
+        modalidade, mes_abrev, ano,
+        altera_catalogo="contratos" in atualizacao or "professor" in atualizacao
+    )
     return resultado.modified_count > 0
 
-def buscar_professores_unicos(modalidade):
-    """Busca todos os professores únicos de uma modalidade"""
-    db = conexao()
+def _valores_distintos(db, modalidade, campo):
+    """Valores distintos e não vazios de um campo na modalidade, agrupados no servidor"""
     contratos_collection = db["contratos"]
     
-    filtro = {
-        "modalidade": modalidade,
-        "professor": {"$ne": None, "$exists": True}
-    }
-    
-    # Buscar apenas o campo professor usando find (compatível com API Version 1)
-    cursor = contratos_collection.find(filtro, {"professor": 1})
-    
-    # Extrair valores únicos manualmente
-    professores = set()
-    for doc in cursor:
-        professor = doc.get("professor")
-        if professor and str(professor).strip():
-            professores.add(str(professor).strip())
+    # $sort antes do $group permite ao MongoDB usar o índice (modalidade, campo) sem ler os documentos
+    # (aggregate é compatível com API Version 1, o comando distinct não)
+    pipeline = [
+        {"$match": {"modalidade": modalidade, campo: {"$ne": None, "$exists": True}}},
+        {"$sort": {"modalidade": 1, campo: 1}},
+        {"$group": {"_id": f"${campo}"}}
+    ]
     
-    # Ordenar e retornar
-    professores_validos = sorted(list(professores))
+    valores = {str(doc["_id"]).strip() for doc in contratos_collection.aggregate(pipeline)}
+    valores.discard("")
     
-    return professores_validos
+    return sorted(valores)
 
-def buscar_planos_unicos(modalidade):
-    """Busca todos os planos (contratos) únicos de uma modalidade"""
+def buscar_professores_unicos(modalidade):
+    """Busca todos os professores únicos de uma modalidade"""
     db = conexao()
-    contratos_collection = db["contratos"]
-    
-    filtro = {
-        "modalidade": modalidade,
-        "contratos": {"$ne": None, "$exists": True}
-    }
-    
-    # Buscar apenas o campo contratos usando find (compatível com API Version 1)
-    cursor = contratos_collection.find(filtro, {"contratos": 1})
-    
-    # Extrair valores únicos manualmente
-    planos = set()
-    for doc in cursor:
-        contrato = doc.get("contratos")
-        if contrato and str(contrato).strip():
-            planos.add(str(contrato).strip())
+    return catalogo_modalidades.obter(
+        modalidade, "professor", lambda: _valores_distintos(db, modalidade, "professor")
+    )
+
+def _professores_do_periodo(db, modalidade, mes_abrev, ano):
+    """Professores com contratos no período, mais SEM_PROFESSOR se houver contratos sem professor"""
+    pipeline = [
+        {"$match": {"modalidade": modalidade, "mes": mes_abrev, "ano": int(ano)}},
+        {"$group": {"_id": "$professor"}}
+    ]
     
-    # Ordenar e retornar
-    planos_validos = sorted(list(planos))
+    professores = set()
+    sem_professor = False
+    for doc in db["contratos"].aggregate(pipeline):
+        nome = str(doc["_id"]).strip() if doc["_id"] is not None else ""
+        if nome:
+            professores.add(nome)
+        else:
+            sem_professor = True
     
-    return planos_validos
+    return sorted(professores) + ([SEM_PROFESSOR] if sem_professor else [])
 
-def buscar_dados_dashboard(ano=None):
-    """Busca dados agregados de todas as modalidades para o dashboard
-    
-    Args:
-        ano: Ano para filtrar (opcional). Se None, busca todos os anos.
+def buscar_professores_periodo(modalidade, mes_abrev, ano):
+    """Lista (em cache) dos professores do período para o filtro, sem carregar os contratos
     
     Returns:
-        DataFrame com colunas: modalidade, mes, ano, total_valor_mensal, total_50_percent, num_registros
+        Lista ordenada de professores, terminando com SEM_PROFESSOR se houver contratos
+        sem professor; vazia se o período não tem contratos
     """
     db = conexao()
-    contratos_collection = db["contratos"]
+    return catalogo_modalidades.obter(
+        modalidade, ("professor", mes_abrev, int(ano)),
+        lambda: _professores_do_periodo(db, modalidade, mes_abrev, ano)
+    )
+
+def buscar_planos_unicos(modalidade):
+    """Busca todos os planos (contratos) únicos de uma modalidade"""
+    db = conexao()
+    return catalogo_modalidades.obter(
+        modalidade, "contratos", lambda: _valores_distintos(db, modalidade, "contratos")
+    )
+
+COLUNAS_DASHBOARD = ['modalidade', 'mes', 'ano', 'total_valor_mensal', 'total_50_percent', 'num_registros']
+
+def _pipeline_dashboard(filtro):
+    """Pipeline que agrega valor mensal e número de registros por modalidade, mês e ano"""
+    return [
+        {"$match": filtro},
+        {"$group": {
+            "_id": {"modalidade": "$modalidade", "mes": "$mes", "ano": "$ano"},
+            "total_valor_mensal": {"$sum": "$valor_mensal"},
+            "num_registros": {"$sum": 1}
+        }},
+        {"$project": {
+            "_id": 0,
+            "modalidade": "$_id.modalidade",
+            "mes": "$_id.mes",
+            "ano": "$_id.ano",
+            "total_valor_mensal": 1,
+            "num_registros": 1
+        }}
+    ]
+
+def _agregar_dashboard_no_servidor(contratos_collection, filtro):
+    """Agrega valor mensal e número de registros por modalidade, mês e ano no MongoDB"""
+    agregados = list(contratos_collection.aggregate(_pipeline_dashboard(filtro)))
     
-    # Filtro por ano se fornecido
-    filtro = {}
-    if ano is not None:
-        filtro["ano"] = int(ano)
+    if not agregados:
+        return pd.DataFrame()
+    
+    df_agregado = pd.DataFrame(agregados)
+    df_agregado['total_50_percent'] = df_agregado['total_valor_mensal'] / 2
     
+    return df_agregado[COLUNAS_DASHBOARD]
+
+def _agregar_dashboard_no_cliente(contratos_collection, filtro):
+    """Busca os contratos e agrega com pandas (caminho antigo, usado como alternativa)"""
     # Buscar todos os contratos
     cursor = contratos_collection.find(filtro)
     
@@ -351,34 +967,199 @@ def buscar_dados_dashboard(ano=None):
     }).reset_index()
     
     # Renomear colunas
-    df_agregado.columns = ['modalidade', 'mes', 'ano', 'total_valor_mensal', 'total_50_percent', 'num_registros']
+    df_agregado.columns = COLUNAS_DASHBOARD
     
     return df_agregado
 
-def df_desp():
+def _filtro_anos(ano=None, ano_final=None):
+    """Filtro por um ano ou, com ano_final, pelo intervalo de anos (inclusive)"""
+    if ano_final is None:
+        return {} if ano is None else {"ano": int(ano)}
+    intervalo = {"$lte": int(ano_final)}
+    if ano is not None:
+        intervalo["$gte"] = int(ano)
+    return {"ano": intervalo}
+
+def _documento_resumo(agregado, atualizado_em):
+    """Documento da coleção resumo_mensal a partir de uma linha de _pipeline_dashboard"""
+    return {
+        "modalidade": agregado["modalidade"],
+        "mes": agregado["mes"],
+        "ano": agregado["ano"],
+        "total_valor_mensal": agregado["total_valor_mensal"],
+        "total_50_percent": agregado["total_valor_mensal"] / 2,
+        "num_registros": agregado["num_registros"],
+        "atualizado_em": atualizado_em
+    }
+
+def atualizar_resumo_periodo(db, modalidade, mes_abrev, ano):
+    """Recalcula o documento de resumo_mensal de um período a partir dos seus contratos
+    
+    A agregação lê só o período (índice 'periodo_professor'). Período sem contratos tem o resumo removido.
+    """
+    filtro_periodo = {
+        "modalidade": modalidade,
+        "mes": mes_abrev,
+        "ano": int(ano)
+    }
+    agregados = list(db["contratos"].aggregate(_pipeline_dashboard(filtro_periodo)))
+    
+    if not agregados:
+        db["resumo_mensal"].delete_one(filtro_periodo)
+        return None
+    
+    resumo = _documento_resumo(agregados[0], datetime.now())
+    db["resumo_mensal"].replace_one(filtro_periodo, resumo, upsert=True)
+    return resumo
+
+def reconstruir_resumo_mensal(ano=None, tamanho_lote=500, db=None):
+    """Recalcula a coleção resumo_mensal inteira (ou de um ano) a partir dos contratos
+    
+    Os resumos são regravados por upsert e só depois saem os períodos que não têm mais
+    contratos, então o dashboard nunca lê a coleção vazia durante a reconstrução.
+    
+    Returns:
+        dict com periodos (resumos gravados) e removidos (resumos sem contratos)
+    """
+    db = db if db is not None else conexao()
+    resumo_collection = db["resumo_mensal"]
+    filtro = _filtro_anos(ano)
+    
+    inicio = datetime.now()
+    operacoes = [
+        ReplaceOne(
+            {"modalidade": agregado["modalidade"], "mes": agregado["mes"], "ano": agregado["ano"]},
+            _documento_resumo(agregado, inicio),
+            upsert=True
+        )
+        for agregado in db["contratos"].aggregate(_pipeline_dashboard(filtro))
+    ]
+    for posicao in range(0, len(operacoes), tamanho_lote):
+        resumo_collection.bulk_write(operacoes[posicao:posicao + tamanho_lote], ordered=False)
+    
+    # Escritas concorrentes durante a reconstrução têm atualizado_em posterior e são mantidas
+    removidos = resumo_collection.delete_many(dict(filtro, atualizado_em={"$lt": inicio})).deleted_count
+    return {"periodos": len(operacoes), "removidos": removidos}
+
+def garantir_resumo_mensal(db):
+    """Constrói a coleção resumo_mensal se ela estiver vazia e já houver contratos
+    
+    Sem isso, a primeira escrita depois da implantação gravaria só o resumo do seu período
+    e o dashboard passaria a mostrar apenas esse período.
+    
+    Returns:
+        True se o resumo foi construído
+    """
+    if db["resumo_mensal"].find_one({}, {"_id": 1}) is not None:
+        return False
+    if db["contratos"].find_one({}, {"_id": 1}) is None:
+        return False
+    reconstruir_resumo_mensal(db=db)
+    return True
+
+def _ler_resumo_mensal(db, filtro):
+    """Lê os totais já agregados da coleção resumo_mensal"""
+    projecao = dict({"_id": 0}, **{coluna: 1 for coluna in COLUNAS_DASHBOARD})
+    resumos = list(db["resumo_mensal"].find(filtro, projecao))
+    
+    if not resumos:
+        return pd.DataFrame()
+    
+    return pd.DataFrame(resumos)[COLUNAS_DASHBOARD]
+
+def buscar_dados_dashboard(ano=None, agregar_no_servidor=True, usar_resumo=True, ano_final=None):
+    """Busca dados agregados de todas as modalidades para o dashboard
+    
+    Args:
+        ano: Ano para filtrar (opcional). Se None, busca todos os anos.
+        ano_final: Se informado, busca todos os anos de ano até ano_final numa única
+            consulta (visão de vários anos do dashboard).
+        agregar_no_servidor: Se True, agrega com pipeline ($match/$group) no MongoDB e
+            só trafegam as linhas agregadas. Se False (ou se o servidor recusar o pipeline),
+            busca os contratos e agrega com pandas.
+        usar_resumo: Se True, lê a coleção resumo_mensal (no máximo um documento por
+            modalidade e mês, mantida a cada escrita e construída por garantir_resumo_mensal
+            ao conectar). Se o resumo estiver vazio, agrega a partir dos contratos.
+    
+    Returns:
+        DataFrame com colunas: modalidade, mes, ano, total_valor_mensal, total_50_percent, num_registros
+    """
     db = conexao()
-    despesas = db["despesas"]
-    data_desp = despesas.find(filtro_despesas)
-    df_desp =  pd.DataFrame(list(data_desp)) 
-    df_desp_agrupado = df_desp.groupby(['data'])['valor'].sum().reset_index()
-    st.session_state.df_desp = df_desp_agrupado
-    return df_desp_agrupado
+    contratos_collection = db["contratos"]
+    
+    # Filtro por ano (ou intervalo de anos) se fornecido
+    filtro = _filtro_anos(ano, ano_final)
+    
+    if usar_resumo:
+        df_resumo = _ler_resumo_mensal(db, filtro)
+        if not df_resumo.empty:
+            return df_resumo
+    
+    if agregar_no_servidor:
+        try:
+            return _agregar_dashboard_no_servidor(contratos_collection, filtro)
+        except OperationFailure:
+            pass
+    
+    return _agregar_dashboard_no_cliente(contratos_collection, filtro)
 
+def _pipeline_planos_periodo(mes_abrev, ano):
+    """Pipeline com os totais por plano e por modalidade do mês numa única resposta ($facet)"""
+    return [
+        {"$match": {"mes": mes_abrev, "ano": int(ano)}},
+        {"$facet": {
+            "planos": [
+                {"$group": {
+                    "_id": {"modalidade": "$modalidade", "plano": "$contratos"},
+                    "total_valor_mensal": {"$sum": "$valor_mensal"},
+                    "num_registros": {"$sum": 1}
+                }}
+            ],
+            "modalidades": [
+                {"$group": {"_id": "$modalidade", "total_valor_mensal": {"$sum": "$valor_mensal"}}}
+            ]
+        }}
+    ]
+
+def _consultar_planos_periodo(db, mes_abrev, ano):
+    """Executa _pipeline_planos_periodo e monta o DataFrame da visão geral"""
+    resultado = next(db["contratos"].aggregate(_pipeline_planos_periodo(mes_abrev, ano)), None)
+    colunas = ["modalidade", "Contratos", "VALOR_MENSAL", "num_registros", "participacao"]
+    if not resultado or not resultado["planos"]:
+        return pd.DataFrame(columns=colunas)
+    
+    totais = {doc["_id"]: doc["total_valor_mensal"] for doc in resultado["modalidades"]}
+    df = pd.DataFrame({
+        "modalidade": [doc["_id"].get("modalidade") for doc in resultado["planos"]],
+        "Contratos": [doc["_id"].get("plano") or "" for doc in resultado["planos"]],
+        "VALOR_MENSAL": [doc["total_valor_mensal"] or 0.0 for doc in resultado["planos"]],
+        "num_registros": [doc["num_registros"] for doc in resultado["planos"]],
+    })
+    total_modalidade = df["modalidade"].map(totais).astype(float)
+    df["participacao"] = (df["VALOR_MENSAL"] / total_modalidade.where(total_modalidade != 0)).fillna(0.0)
     
+    return df.sort_values(["modalidade", "VALOR_MENSAL"], ascending=[True, False], ignore_index=True)[colunas]
 
-def df_rec():
+def buscar_planos_periodo(mes_abrev, ano):
+    """Valor mensal e quantidade de contratos por plano de todas as modalidades no mês
+    
+    Uma única agregação no MongoDB ($match no mês + $facet com os $group por plano e por
+    modalidade), em cache por período e invalidada pelas escritas em qualquer modalidade do mês.
+    
+    Returns:
+        DataFrame com colunas modalidade, Contratos (plano), VALOR_MENSAL, num_registros e
+        participacao (fração do valor mensal da modalidade), ordenado por modalidade e valor
+    """
     db = conexao()
-    receitas = db["receitas"]
-    data_rec = receitas.find(filtro)
-    df_rec =  pd.DataFrame(list(data_rec)) 
-    df_rec_agrupado = df_rec.groupby(['data'])['valor'].sum().reset_index()
-    st.session_state.df_rec = df_rec_agrupado   
-    return df_rec_agrupado
+    chave = cache_visao_geral.chave(None, mes_abrev, ano)
+    return cache_visao_geral.obter(chave, lambda: _consultar_planos_periodo(db, mes_abrev, ano))
 
-def df_receitas():
+def df_receitas(inicio=None, fim=None):
+    """Lançamentos de receitas no intervalo [inicio, fim) (padrão: todos os lançamentos)"""
+    from fluxo_caixa import filtro_intervalo
     db = conexao()
     receitas = db["receitas"]
-    data_rec = receitas.find()
+    data_rec = receitas.find(filtro_intervalo(inicio, fim))
     df_rec =  pd.DataFrame(list(data_rec)) 
     return df_rec
 
@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+from pymongo.errors import OperationFailure
+
+from cache import cache_fluxo_caixa
+from db import conexao
+
+# Granularidade aceita -> unidade do $dateTrunc
+GRANULARIDADES = {"dia": "day", "semana": "week", "mes": "month"}
+
+# Período do pandas equivalente, usado quando o servidor não tem $dateTrunc (MongoDB < 5.0)
+_PERIODOS_PANDAS = {"dia": "D", "semana": "W-SUN", "mes": "M"}
+
+# Filtro fixo de cada coleção: despesas só contam se pagas (ou sem o campo, lançamentos antigos)
+FILTROS_COLECOES = {
+    "despesas": {"$or": [{"pago": True}, {"pago": {"$exists": False}}]},
+    "receitas": {},
+}
+
+# Meses de histórico quando o início do intervalo não é informado
+MESES_PADRAO = 12
+
+COLUNAS_FLUXO = ["data", "valor", "lancamentos"]
+
+def inicio_padrao(hoje=None):
+    """Primeiro dia do mês de MESES_PADRAO meses atrás"""
+    hoje = hoje or datetime.now()
+    mes = hoje.year * 12 + hoje.month - 1 - MESES_PADRAO
+    return datetime(mes // 12, mes % 12 + 1, 1)
+
+def inicio_do_periodo(data, granularidade):
+    """Início do dia, da semana (segunda-feira) ou do mês que contém a data"""
+    data = datetime(data.year, data.month, data.day)
+    if granularidade == "semana":
+        return data - timedelta(days=data.weekday())
+    if granularidade == "mes":
+        return data.replace(day=1)
+    return data
+
+def filtro_intervalo(inicio=None, fim=None):
+    """Filtro de data do intervalo [inicio, fim) (sem inicio ou sem fim: sem limite desse lado)"""
+    intervalo = {}
+    if inicio is not None:
+        intervalo["$gte"] = inicio
+    if fim is not None:
+        intervalo["$lt"] = fim
+    return {"data": intervalo} if intervalo else {}
+
+def _pipeline_fluxo(filtro, granularidade):
+    """Pipeline que soma valor e conta lançamentos por dia, semana ou mês"""
+    truncar = {"date": "$data", "unit": GRANULARIDADES[granularidade]}
+    if granularidade == "semana":
+        truncar["startOfWeek"] = "monday"
+    return [
+        {"$match": filtro},
+        {"$group": {
+            "_id": {"$dateTrunc": truncar},
+            "valor": {"$sum": "$valor"},
+            "lancamentos": {"$sum": 1}
+        }},
+        {"$sort": {"_id": 1}},
+        {"$project": {"_id": 0, "data": "$_id", "valor": 1, "lancamentos": 1}}
+    ]
+
+def _agregar_no_cliente(colecao, filtro, granularidade):
+    """Busca só data e valor e agrupa com pandas (servidores sem $dateTrunc)"""
+    lancamentos = list(colecao.find(filtro, {"_id": 0, "data": 1, "valor": 1}))
+    if not lancamentos:
+        return pd.DataFrame(columns=COLUNAS_FLUXO)
+
+    df = pd.DataFrame(lancamentos)
+    periodo = pd.to_datetime(df["data"]).dt.to_period(_PERIODOS_PANDAS[granularidade]).dt.start_time
+    agrupado = df.groupby(periodo)["valor"].agg(valor="sum", lancamentos="count")
+    return agrupado.rename_axis("data").reset_index()[COLUNAS_FLUXO]
+
+def _agregar(nome_colecao, inicio, fim, granularidade):
+    """Agrega a coleção no intervalo [inicio, fim) no MongoDB ou, sem $dateTrunc, no pandas"""
+    colecao = conexao()[nome_colecao]
+    filtro = dict(filtro_intervalo(inicio, fim), **FILTROS_COLECOES[nome_colecao])
+    try:
+        agregados = list(colecao.aggregate(_pipeline_fluxo(filtro, granularidade)))
+    except OperationFailure:
+        return _agregar_no_cliente(colecao, filtro, granularidade)
+    return pd.DataFrame(agregados, columns=COLUNAS_FLUXO)
+
+def agregar_lancamentos(nome_colecao, inicio=None, fim=None, granularidade="mes"):
+    """Soma os lançamentos de receitas ou despesas por dia, semana ou mês
+
+    Os períodos encerrados (antes do dia, semana ou mês atual) ficam em cache_fluxo_caixa;
+    a cada chamada só o período em andamento é consultado. Lançamentos retroativos aparecem
+    quando a entrada expira ou depois de cache_fluxo_caixa.limpar().
+
+    Args:
+        nome_colecao: 'receitas' ou 'despesas' (só as pagas)
+        inicio: Início do intervalo (padrão: primeiro dia do mês de MESES_PADRAO meses atrás)
+        fim: Fim do intervalo, exclusivo (padrão: sem limite)
+        granularidade: 'dia', 'semana' (começando na segunda-feira) ou 'mes'
+
+    Returns:
+        DataFrame com colunas data (início do período), valor e lancamentos, ordenado por data
+    """
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(f"Granularidade inválida: {granularidade} (use {', '.join(GRANULARIDADES)})")
+    if nome_colecao not in FILTROS_COLECOES:
+        raise ValueError(f"Coleção sem fluxo de caixa: {nome_colecao}")
+
+    inicio = inicio or inicio_padrao()
+    limite = inicio_do_periodo(datetime.now(), granularidade)
+    partes = []
+
+    if inicio < limite:
+        fim_encerrado = min(fim, limite) if fim is not None else limite
+        chave = (nome_colecao, granularidade, inicio, fim_encerrado)
+        partes.append(cache_fluxo_caixa.obter(
+            chave,
+            lambda: _agregar(nome_colecao, inicio, fim_encerrado, granularidade)
+        ))
+    if fim is None or fim > limite:
+        partes.append(_agregar(nome_colecao, max(inicio, limite), fim, granularidade))
+
+    partes = [parte for parte in partes if not parte.empty]
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_FLUXO)
+    return pd.concat(partes, ignore_index=True)
+
+def fluxo_caixa(inicio=None, fim=None, granularidade="mes"):
+    """Receitas, despesas pagas e saldo por dia, semana ou mês no intervalo
+
+    Returns:
+        DataFrame com colunas data, receitas, despesas, saldo e saldo_acumulado
+    """
+    receitas = agregar_lancamentos("receitas", inicio, fim, granularidade)
+    despesas = agregar_lancamentos("despesas", inicio, fim, granularidade)
+
+    df = pd.merge(
+        receitas[["data", "valor"]].rename(columns={"valor": "receitas"}),
+        despesas[["data", "valor"]].rename(columns={"valor": "despesas"}),
+        on="data", how="outer"
+    ).sort_values("data", ignore_index=True)
+    df[["receitas", "despesas"]] = df[["receitas", "despesas"]].astype(float).fillna(0.0)
+    df["saldo"] = df["receitas"] - df["despesas"]
+    df["saldo_acumulado"] = df["saldo"].cumsum()
+    return df
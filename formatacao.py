@@ -0,0 +1,86 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Acima deste valor o produto por 100 perde precisão: formatado pelo caminho escalar
+_LIMITE_VETORIZADO = 1e13
+
+# Textos de todos os grupos de milhar ('000' a '999') e dos centavos ('00' a '99'),
+# indexados pelos próprios valores em vez de converter cada inteiro para texto
+_GRUPOS = np.array([f'{numero:03d}' for numero in range(1000)])
+_CENTAVOS = np.array([f'{numero:02d}' for numero in range(100)])
+
+def _formatar_escalar(valor):
+    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def formatar_moeda_coluna(valores, prefixo=''):
+    """Formata uma coluna numérica no padrão brasileiro (1.234,56) com operações de array
+
+    Produz o mesmo texto que f"{x:,.2f}" com vírgula e ponto trocados, mas calcula os
+    centavos e os grupos de milhar como inteiros no numpy em vez de chamar uma função
+    Python por célula. Valores a menos de 1e-6 de meio centavo (onde o arredondamento
+    do produto por 100 poderia divergir), NaN e infinitos usam o caminho escalar.
+
+    Args:
+        valores: Series, array ou lista de números
+        prefixo: Texto antes do número (por exemplo 'R$ ')
+
+    Returns:
+        Series de textos (com o mesmo índice, se valores for uma Series)
+    """
+    indice = valores.index if isinstance(valores, pd.Series) else None
+    numeros = np.asarray(valores, dtype=float)
+    if numeros.size == 0:
+        return pd.Series([], index=indice, dtype=object)
+
+    escalar = ~np.isfinite(numeros) | (np.abs(numeros) >= _LIMITE_VETORIZADO)
+    escala = np.abs(np.where(escalar, 0.0, numeros)) * 100
+    escalar |= np.abs(escala - np.floor(escala) - 0.5) < 1e-6
+
+    centavos = np.rint(escala).astype(np.int64)
+    inteiros = centavos // 100
+
+    # Todos os grupos de milhar com 3 dígitos, depois remove zeros e pontos à esquerda
+    num_grupos = max(1, (len(str(int(inteiros.max()))) + 2) // 3)
+    texto = _GRUPOS[inteiros % 1000]
+    for expoente in range(1, num_grupos):
+        texto = np.char.add(np.char.add(_GRUPOS[inteiros // 1000 ** expoente % 1000], '.'), texto)
+    texto = np.char.lstrip(texto, '0.')
+    texto = np.where(np.char.str_len(texto) == 0, '0', texto)
+    texto = np.char.add(np.char.add(texto, ','), _CENTAVOS[centavos % 100])
+    texto = np.where(np.signbit(numeros), np.char.add('-', texto), texto).astype(object)
+
+    for posicao in np.flatnonzero(escalar):
+        texto[posicao] = _formatar_escalar(numeros[posicao])
+
+    texto = pd.Series(texto, index=indice, dtype=object)
+    if prefixo:
+        texto = prefixo + texto
+    return texto
+
+@lru_cache(maxsize=1024)
+def formatar_moeda(valor, prefixo=''):
+    """Formata um único valor no padrão brasileiro (métricas e totais), memorizado"""
+    return prefixo + _formatar_escalar(valor)
+
+def formatar_data_coluna(datas):
+    """Formata uma coluna datetime como DD/MM/AAAA ('' para datas vazias)
+
+    Só as datas distintas passam pelo strftime; o texto é espalhado pelos códigos do factorize.
+    """
+    codigos, datas_unicas = pd.factorize(pd.Series(datas))
+    textos = np.append(np.asarray(pd.DatetimeIndex(datas_unicas).strftime('%d/%m/%Y'), dtype=object), '')
+    return pd.Series(textos[codigos], index=getattr(datas, 'index', None), dtype=object)
+
+def formatar_data(valor):
+    """Formata uma data como DD/MM/AAAA ('' se vazia; textos são mantidos)"""
+    if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+        return ''
+    if isinstance(valor, str):
+        return valor
+    return pd.Timestamp(valor).strftime('%d/%m/%Y')
+
+def formatar_inteiro(valor):
+    """Formata um inteiro com ponto como separador de milhar (1.234)"""
+    return f"{valor:,}".replace(",", ".")
@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from planilhas import LeitorPlanilha, documentos_da_planilha
+
+PASTA_BASE = Path(__file__).parent
+
+# Pastas onde ficam as planilhas mensais de cada modalidade
+PASTAS_MODALIDADES = ['judo', 'krav', 'kravmaga', 'muay', 'pilates', 'prime']
+
+# Prefixo do nome do arquivo -> modalidade gravada no banco
+ALIASES_MODALIDADES = {
+    'judo': 'judo',
+    'pilates': 'pilates',
+    'prime': 'prime',
+    'muay': 'muay',
+    'muai': 'muay',
+    'krav': 'krav',
+    'kravmaga': 'krav',
+}
+
+# Mesmas abreviações de utils.MESES (sem importar o Streamlit nos processos de leitura)
+MESES_ABREV = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+
+# .csv é o formato salvo por pages/0_Importar.py para uploads em CSV
+EXTENSOES_PLANILHA = ('.xlsx', '.xls', '.csv')
+
+# <modalidade>_<mes>_<ano>, o padrão gravado por pages/0_Importar.py
+PADRAO_ARQUIVO = re.compile(r'^(?P<prefixo>[a-z]+)_(?P<mes>[a-z]{3})_(?P<ano>\d{4})$', re.IGNORECASE)
+
+def identificar_planilha(caminho):
+    """Retorna (modalidade, mes_abrev, ano) a partir do nome do arquivo ou None se fora do padrão"""
+    caminho = Path(caminho)
+    if caminho.suffix.lower() not in EXTENSOES_PLANILHA:
+        return None
+    encontrado = PADRAO_ARQUIVO.match(caminho.stem.strip())
+    if not encontrado:
+        return None
+    modalidade = ALIASES_MODALIDADES.get(encontrado['prefixo'].lower())
+    mes_abrev = encontrado['mes'].lower()
+    if modalidade is None or mes_abrev not in MESES_ABREV:
+        return None
+    return modalidade, mes_abrev, int(encontrado['ano'])
+
+def _csv_de_contratos(caminho):
+    """Indica se o CSV tem as colunas de uma planilha de contratos (só o cabeçalho é lido)
+
+    As pastas também guardam CSVs exportados dos relatórios (nome, contrato e 50%), com o
+    mesmo padrão de nome mas sem o ID do cliente.
+    """
+    try:
+        with LeitorPlanilha(caminho, tamanho_bloco=1, linhas_preview=0):
+            return True
+    except ValueError:
+        return False
+
+def descobrir_planilhas(pasta_base=PASTA_BASE, ano=None, modalidades=None):
+    """Procura as planilhas nas pastas das modalidades e associa cada uma a um período
+
+    Args:
+        pasta_base: Pasta que contém as pastas das modalidades
+        ano: Considerar apenas este ano (opcional)
+        modalidades: Considerar apenas estas modalidades (opcional)
+
+    Returns:
+        Tupla (periodos, ignorados, conflitos):
+        periodos: dict (modalidade, mes_abrev, ano) -> caminho da planilha
+        ignorados: planilhas cujo nome não segue o padrão e CSVs sem as colunas de contratos
+        conflitos: lista de (periodo, caminho usado, caminhos descartados) quando mais de
+            um arquivo aponta para o mesmo período (o modificado por último é usado; no
+            empate, .xlsx antes de .xls e .csv)
+    """
+    candidatos = {}
+    ignorados = []
+    for pasta in PASTAS_MODALIDADES:
+        pasta_modalidade = Path(pasta_base) / pasta
+        if not pasta_modalidade.is_dir():
+            continue
+        for caminho in sorted(pasta_modalidade.iterdir()):
+            if caminho.name.startswith('~$') or caminho.suffix.lower() not in EXTENSOES_PLANILHA:
+                continue
+            periodo = identificar_planilha(caminho)
+            if periodo is None:
+                ignorados.append(caminho)
+                continue
+            if ano is not None and periodo[2] != int(ano):
+                continue
+            if modalidades and periodo[0] not in modalidades:
+                continue
+            if caminho.suffix.lower() == '.csv' and not _csv_de_contratos(caminho):
+                ignorados.append(caminho)
+                continue
+            candidatos.setdefault(periodo, []).append(caminho)
+
+    periodos = {}
+    conflitos = []
+    for periodo, caminhos in candidatos.items():
+        # Mais recente primeiro; no empate, a extensão que vem antes em EXTENSOES_PLANILHA
+        caminhos = sorted(
+            caminhos,
+            key=lambda caminho: (caminho.stat().st_mtime, -EXTENSOES_PLANILHA.index(caminho.suffix.lower())),
+            reverse=True
+        )
+        periodos[periodo] = caminhos[0]
+        if len(caminhos) > 1:
+            conflitos.append((periodo, caminhos[0], caminhos[1:]))
+
+    return periodos, ignorados, conflitos
+
+def _ler_planilha(arquivo_path, modalidade, mes_abrev, ano):
+    """Lê e prepara os documentos de uma planilha (executado nos processos do pool, sem banco)"""
+    inicio = time.perf_counter()
+    documentos, ignorados, _ = documentos_da_planilha(arquivo_path, modalidade, mes_abrev, ano)
+    return documentos, ignorados, time.perf_counter() - inicio
+
+def importar_pastas(pasta_base=PASTA_BASE, ano=None, modalidades=None, processos=None, simular=False, tamanho_lote=500):
+    """Importa todas as planilhas das pastas das modalidades
+
+    As planilhas são lidas em paralelo num pool de processos; cada período é gravado pelo
+    processo principal com substituir_periodo (operações em lote, o mês nunca fica vazio)
+    assim que sua planilha fica pronta.
+
+    Args:
+        pasta_base: Pasta que contém as pastas das modalidades
+        ano: Importar apenas este ano (opcional)
+        modalidades: Importar apenas estas modalidades (opcional)
+        processos: Quantidade de processos de leitura (padrão: número de CPUs)
+        simular: Apenas ler as planilhas, sem gravar no banco
+        tamanho_lote: Documentos por operação em lote
+
+    Returns:
+        dict com importados (resumo por período), erros, ignorados e conflitos
+    """
+    periodos, ignorados, conflitos = descobrir_planilhas(pasta_base, ano, modalidades)
+    resultado = {"importados": [], "erros": [], "ignorados": ignorados, "conflitos": conflitos}
+    if not periodos:
+        return resultado
+
+    if not simular:
+        from db import substituir_periodo
+
+    processos = processos or os.cpu_count() or 1
+    # spawn: os processos de leitura começam um interpretador novo em vez de copiar o
+    # principal (fork), que já tem um MongoClient aberto e não pode ser compartilhado
+    with ProcessPoolExecutor(
+        max_workers=min(processos, len(periodos)),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futuros = {
+            executor.submit(_ler_planilha, str(caminho), *periodo): (periodo, caminho)
+            for periodo, caminho in periodos.items()
+        }
+        for futuro in as_completed(futuros):
+            (modalidade, mes_abrev, ano_periodo), caminho = futuros[futuro]
+            try:
+                documentos, linhas_ignoradas, tempo_leitura = futuro.result()
+                resumo = {
+                    "modalidade": modalidade,
+                    "mes": mes_abrev,
+                    "ano": ano_periodo,
+                    "arquivo": caminho,
+                    "inseridos": len(documentos),
+                    "ignorados": linhas_ignoradas,
+                    "tempo_leitura": tempo_leitura,
+                }
+                if not simular:
+                    resumo.update(substituir_periodo(documentos, modalidade, mes_abrev, ano_periodo, tamanho_lote))
+                resultado["importados"].append(resumo)
+            except Exception as e:
+                resultado["erros"].append({"arquivo": caminho, "erro": str(e)})
+
+    resultado["importados"].sort(key=lambda resumo: (resumo["modalidade"], resumo["ano"], MESES_ABREV.index(resumo["mes"])))
+    return resultado
+
+def imprimir_relatorio(resultado, pasta_base=PASTA_BASE):
+    """Mostra no terminal o resumo de importar_pastas"""
+    def relativo(caminho):
+        return os.path.relpath(caminho, pasta_base)
+
+    for resumo in resultado["importados"]:
+        removidos = f" | removidos {resumo['removidos']}" if "removidos" in resumo else ""
+        print(
+            f"{resumo['modalidade']:<8} {resumo['mes']}/{resumo['ano']}  "
+            f"{resumo['inseridos']:>5} contratos{removidos} | sem ID {resumo['ignorados']} | "
+            f"leitura {resumo['tempo_leitura']:.2f}s  ({relativo(resumo['arquivo'])})"
+        )
+    for conflito in resultado["conflitos"]:
+        (modalidade, mes_abrev, ano), usado, descartados = conflito
+        print(f"Conflito em {modalidade} {mes_abrev}/{ano}: usado {relativo(usado)}, descartados {', '.join(relativo(c) for c in descartados)}")
+    for caminho in resultado["ignorados"]:
+        print(f"Ignorado (nome fora do padrão ou CSV sem colunas de contratos): {relativo(caminho)}")
+    for erro in resultado["erros"]:
+        print(f"Erro em {relativo(erro['arquivo'])}: {erro['erro']}")
@@ -2,6 +2,8 @@ import streamlit as st
 import pandas as pd
 from pathlib import Path
 import sys
+import hashlib
+import tempfile
 from datetime import datetime
 
 # Adicionar raiz do projeto ao path para imports
@@ -10,10 +12,11 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 from utils import MESES, obter_ano_atual
+from planilhas import ler_preview_planilha
 
 st.set_page_config(page_title='Importar Arquivos', layout='wide')
 
-st.header('📥 Importar Arquivos Excel')
+st.header('📥 Importar Arquivos Excel e CSV')
 
 MODALIDADES = {
     'Judo': 'judo',
@@ -28,6 +31,14 @@ def obter_pasta_modalidade(modalidade):
     base_path = Path(__file__).parent.parent
     return base_path / modalidade
 
+def calcular_diff_upload(arquivo_upload, extensao, modalidade, mes_abrev, ano):
+    """Calcula o diff do upload lendo uma cópia temporária (a pasta da modalidade só recebe o arquivo depois de gravar)"""
+    from db import diff_periodo_por_planilha
+    with tempfile.TemporaryDirectory() as pasta_temporaria:
+        caminho = Path(pasta_temporaria) / f"upload{extensao}"
+        caminho.write_bytes(arquivo_upload.getvalue())
+        return diff_periodo_por_planilha(caminho, modalidade, mes_abrev, ano)
+
 # Seleção de modalidade
 modalidade_nome = st.selectbox(
     'Selecione a modalidade',
@@ -53,11 +64,19 @@ mes_nome = st.selectbox(
 )
 mes_abrev = MESES[mes_nome]
 
+# Modo de importação
+modo_importacao = st.radio(
+    'Modo de importação',
+    options=['Substituir período', 'Somente alterações'],
+    horizontal=True,
+    help='"Somente alterações" compara a planilha com o período já importado e grava apenas os contratos novos, alterados ou removidos.'
+)
+
 # Upload de arquivo
 st.divider()
 arquivo_upload = st.file_uploader(
-    f'Faça upload do arquivo Excel para {modalidade_nome} - {mes_nome}/{ano}',
-    type=['xlsx', 'xls'],
+    f'Faça upload do arquivo Excel ou CSV para {modalidade_nome} - {mes_nome}/{ano}',
+    type=['xlsx', 'xls', 'csv'],
     key=f'upload_{modalidade}_{mes_abrev}_{ano}'
 )
 
@@ -68,63 +87,126 @@ if arquivo_upload is not None:
     # Criar pasta se não existir
     pasta_modalidade.mkdir(parents=True, exist_ok=True)
     
-    # Salvar arquivo na pasta da modalidade
-    nome_arquivo_sugerido = f"{modalidade}_{mes_abrev}_{ano}.xlsx"
+    # Nome do arquivo na pasta da modalidade
+    extensao = Path(arquivo_upload.name).suffix.lower() or '.xlsx'
+    nome_arquivo_sugerido = f"{modalidade}_{mes_abrev}_{ano}{extensao}"
     arquivo_destino = pasta_modalidade / nome_arquivo_sugerido
     
-    # Verificar se arquivo já existe
-    if arquivo_destino.exists():
-        st.warning(f"⚠️ Arquivo já existe: {nome_arquivo_sugerido}")
-        sobrescrever = st.checkbox('Sobrescrever arquivo existente?')
-        if not sobrescrever:
-            st.stop()
+    # Preview retornado pela importação (a planilha é lida uma única vez)
+    df_preview = None
     
-    # Salvar arquivo e importar para MongoDB
-    try:
-        with open(arquivo_destino, 'wb') as f:
-            f.write(arquivo_upload.getvalue())
+    if modo_importacao == 'Substituir período':
+        # Verificar se arquivo já existe
+        if arquivo_destino.exists():
+            st.warning(f"⚠️ Arquivo já existe: {nome_arquivo_sugerido}")
+            sobrescrever = st.checkbox('Sobrescrever arquivo existente?')
+            if not sobrescrever:
+                st.stop()
         
-        st.success(f"✅ Arquivo salvo com sucesso: {nome_arquivo_sugerido}")
-        st.info(f"📁 Localização: {arquivo_destino}")
+        # Salvar arquivo e importar para MongoDB
+        try:
+            with open(arquivo_destino, 'wb') as f:
+                f.write(arquivo_upload.getvalue())
+            
+            st.success(f"✅ Arquivo salvo com sucesso: {nome_arquivo_sugerido}")
+            st.info(f"📁 Localização: {arquivo_destino}")
+        except Exception as e:
+            st.error(f"Erro ao salvar arquivo: {str(e)}")
+            st.exception(e)
+            st.stop()
         
         # Importar automaticamente para MongoDB
         try:
             # Importar função do db.py
             sys.path.insert(0, str(Path(__file__).parent.parent))
-            from db import importar_planilha_para_mongodb, deletar_contratos_por_periodo
+            from db import substituir_periodo_por_planilha
             
             with st.spinner('Importando dados para MongoDB...'):
-                # Deletar contratos existentes do mesmo período antes de importar
-                deletados = deletar_contratos_por_periodo(modalidade, mes_abrev, ano)
-                if deletados > 0:
-                    st.info(f'🗑️ {deletados} contratos antigos removidos')
-                
-                # Importar novos contratos
-                contratos_inseridos = importar_planilha_para_mongodb(
+                # Substituir o período inteiro de uma vez (o mês nunca fica vazio ou parcial)
+                resumo = substituir_periodo_por_planilha(
                     arquivo_destino, 
                     modalidade, 
                     mes_abrev, 
                     ano
                 )
                 
-                st.success(f"✅ {contratos_inseridos} contratos importados com sucesso para o MongoDB!")
+                if resumo['removidos'] > 0:
+                    st.info(f"🗑️ {resumo['removidos']} contratos antigos removidos")
+                st.success(f"✅ {resumo['inseridos']} contratos importados com sucesso para o MongoDB!")
+                if resumo['ignorados'] > 0:
+                    st.info(f"⏭️ {resumo['ignorados']} linhas ignoradas (sem ID do cliente)")
                 st.info(f"📊 Modalidade: {modalidade_nome} | Mês: {mes_nome}/{ano}")
+                df_preview = resumo['preview']
         except Exception as e:
             st.error(f"Erro ao importar para MongoDB: {str(e)}")
             st.exception(e)
-        
-        # Mostrar preview do arquivo
-        st.divider()
-        st.subheader('Preview do arquivo importado')
+    else:
+        # O diff fica na sessão: o clique em "Gravar" (um novo rerun) aplica exatamente o diff
+        # mostrado, e a planilha só é salva na pasta depois de gravada
+        chave_diff = f'diff_{modalidade}_{mes_abrev}_{ano}'
+        assinatura = (arquivo_upload.name, hashlib.sha1(arquivo_upload.getvalue()).hexdigest())
         try:
-            df_preview = pd.read_excel(arquivo_destino, nrows=5)
-            st.dataframe(df_preview)
-        except Exception as e:
-            st.error(f"Erro ao ler preview: {str(e)}")
+            sys.path.insert(0, str(Path(__file__).parent.parent))
+            from db import aplicar_diff_periodo
+            
+            calculado = st.session_state.get(chave_diff)
+            if calculado is None or calculado['assinatura'] != assinatura:
+                with st.spinner('Comparando planilha com os dados do período...'):
+                    diff = calcular_diff_upload(arquivo_upload, extensao, modalidade, mes_abrev, ano)
+                calculado = {'assinatura': assinatura, 'diff': diff}
+                st.session_state[chave_diff] = calculado
+            diff = calculado['diff']
+            df_preview = diff['preview']
             
+            # Mostrar o diff antes de gravar
+            st.subheader('Alterações encontradas')
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric('Novos', len(diff['inserir']))
+            col2.metric('Alterados', len(diff['atualizar']))
+            col3.metric('Removidos', len(diff['remover']))
+            col4.metric('Inalterados', diff['inalterados'])
+            
+            colunas_diff = ['id_cliente', 'nome_completo', 'contratos', 'valor', 'professor']
+            if diff['inserir']:
+                with st.expander(f"➕ Novos ({len(diff['inserir'])})"):
+                    st.dataframe(pd.DataFrame(diff['inserir'])[colunas_diff], hide_index=True)
+            if diff['atualizar']:
+                with st.expander(f"🔄 Alterados ({len(diff['atualizar'])})"):
+                    st.dataframe(pd.DataFrame(diff['atualizar'])[colunas_diff], hide_index=True)
+            if diff['remover']:
+                with st.expander(f"🗑️ Removidos ({len(diff['remover'])})"):
+                    st.dataframe(pd.DataFrame(diff['remover']), hide_index=True)
+            
+            total_alteracoes = len(diff['inserir']) + len(diff['atualizar']) + len(diff['remover'])
+            if total_alteracoes == 0:
+                st.info('Nenhuma alteração em relação aos dados já importados.')
+            else:
+                if arquivo_destino.exists():
+                    st.warning(f"⚠️ Ao gravar, o arquivo existente {nome_arquivo_sugerido} será substituído")
+                if st.button(f'✅ Gravar {total_alteracoes} alterações', type='primary'):
+                    with st.spinner('Gravando alterações...'):
+                        resumo = aplicar_diff_periodo(diff)
+                    del st.session_state[chave_diff]
+                    st.success(
+                        f"✅ Inseridos: {resumo['inseridos']} | Atualizados: {resumo['atualizados']} | "
+                        f"Removidos: {resumo['removidos']}"
+                    )
+                    
+                    with open(arquivo_destino, 'wb') as f:
+                        f.write(arquivo_upload.getvalue())
+                    st.info(f"📁 Arquivo salvo em: {arquivo_destino}")
+        except Exception as e:
+            st.error(f"Erro ao importar para MongoDB: {str(e)}")
+            st.exception(e)
+    
+    # Mostrar preview do arquivo
+    st.divider()
+    st.subheader('Preview do arquivo importado')
+    try:
+        if df_preview is None:
+            df_preview = ler_preview_planilha(arquivo_destino, linhas=5)
+        st.dataframe(df_preview)
     except Exception as e:
-        st.error(f"Erro ao salvar arquivo: {str(e)}")
-        st.exception(e)
+        st.error(f"Erro ao ler preview: {str(e)}")
 else:
-    st.info("👆 Selecione a modalidade, ano e mês, depois faça upload do arquivo Excel.")
-
+    st.info("👆 Selecione a modalidade, ano e mês, depois faça upload do arquivo Excel ou CSV.")
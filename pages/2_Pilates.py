@@ -9,7 +9,11 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from utils import selecionar_arquivo_excel, obter_ano_atual, carregar_dados_do_mongodb, MESES, adicionar_interface_edicao, criar_dialog_edicao, exportar_para_pdf, criar_dialog_cadastro_aluno
+from utils import selecionar_arquivo_excel, obter_ano_atual, carregar_dados_do_mongodb, MESES, adicionar_interface_edicao, criar_dialog_edicao, exportar_para_pdf, criar_dialog_cadastro_aluno, exibir_uso_memoria
+from planos import calcular_valor_mensal_serie
+from db import buscar_professores_periodo
+from formatacao import formatar_data_coluna, formatar_moeda, formatar_moeda_coluna
+from relatorios import nome_arquivo_professor
 
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 
@@ -25,69 +29,39 @@ mes_nome = st.sidebar.selectbox(
 )
 mes_abrev = MESES[mes_nome]
 
-# Carregar dados do MongoDB
-tabela_pilates = carregar_dados_do_mongodb('pilates', mes_abrev, mes_nome, ano)
+# Filtro por Professor: a lista vem do banco (em cache por período), sem carregar os contratos
+professores_disponiveis = buscar_professores_periodo('pilates', mes_abrev, ano)
 
-if tabela_pilates is None or tabela_pilates.empty:
+if not professores_disponiveis:
     st.warning("Nenhum dado encontrado no banco de dados para este período.")
     st.info("💡 Use a página 'Importar Arquivos' para importar dados.")
     st.stop()
 
-# Filtro por Professor
-if 'Professor' in tabela_pilates.columns:
-    # Obter lista de professores únicos (incluindo NaN como "Sem Professor")
-    professores_disponiveis = tabela_pilates['Professor'].dropna().unique().tolist()
-    professores_disponiveis.sort()
-    
-    # Adicionar opção "Todos" e "Sem Professor"
-    opcoes_professor = ['Todos'] + professores_disponiveis
-    if tabela_pilates['Professor'].isna().any():
-        opcoes_professor.append('Sem Professor')
-    
-    professor_selecionado = st.sidebar.selectbox(
-        'Filtrar por Professor',
-        options=opcoes_professor,
-        index=0
-    )
-    
-    # Aplicar filtro
-    if professor_selecionado == 'Todos':
-        tabela_pilates_filtrada = tabela_pilates.copy()
-    elif professor_selecionado == 'Sem Professor':
-        tabela_pilates_filtrada = tabela_pilates[tabela_pilates['Professor'].isna()].copy()
-    else:
-        tabela_pilates_filtrada = tabela_pilates[tabela_pilates['Professor'] == professor_selecionado].copy()
-    
-    tabela_pilates = tabela_pilates_filtrada
-    
-    if tabela_pilates.empty:
-        st.warning(f"Nenhum dado encontrado para o professor '{professor_selecionado}'.")
-        st.stop()
-else:
-    professor_selecionado = None
-
-def calcular_valor_mensal(plano, valor):
-    if "15 MESES" in plano:
-        return valor / 15
-    elif "ANUAL" in plano or "12 MESES" in plano:
-        return valor / 12
-    elif "SEMESTRAL" in plano:
-        return valor / 6
-    elif "TRIMESTRAL" in plano:
-        return valor / 3
-    else:
-        return valor 
+professor_selecionado = st.sidebar.selectbox(
+    'Filtrar por Professor',
+    options=['Todos'] + professores_disponiveis,
+    index=0
+)
+
+# Carregar do MongoDB só os contratos do professor selecionado (filtro aplicado na consulta)
+tabela_pilates = carregar_dados_do_mongodb(
+    'pilates', mes_abrev, mes_nome, ano,
+    professor=None if professor_selecionado == 'Todos' else professor_selecionado
+)
+
+if tabela_pilates is None or tabela_pilates.empty:
+    st.warning(f"Nenhum dado encontrado para o professor '{professor_selecionado}'.")
+    st.stop()
 
 def processar_valores_pilates(tabela):
     """Processa os valores e adiciona colunas calculadas"""
     # Calcular valor mensal baseado no tipo de plano
-    tabela.loc[:,"VALOR_MENSAL"] = tabela.apply(lambda row: calcular_valor_mensal(row["Contratos"], row["Valor"]), axis=1)    
+    tabela["VALOR_MENSAL"] = calcular_valor_mensal_serie(tabela["Contratos"], tabela["Valor"])
     # Calcular 50% do VALOR_MENSAL (metade do valor mensal)
-    tabela.loc[:,"50%"] = tabela["VALOR_MENSAL"] / 2
+    tabela["50%"] = tabela["VALOR_MENSAL"] / 2
     
-    # Salvar uma cópia antes da formatação para session_state
-    tabela_state = tabela.copy()
-    st.session_state["pilates"] = tabela_state
+    # Guardar a própria tabela (a formatação para exibição monta outro DataFrame)
+    st.session_state["pilates"] = tabela
     
     return tabela
 
@@ -97,10 +71,12 @@ def formatar_valores_para_exibicao_pilates(tabela):
     total_50_percent = tabela["50%"].sum()
     
     # Formatar valores numéricos
-    tabela_formatada = tabela.copy()
-    tabela_formatada.loc[:,"Valor"] = tabela_formatada["Valor"].apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-    tabela_formatada.loc[:,"VALOR_MENSAL"] = tabela_formatada["VALOR_MENSAL"].apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-    tabela_formatada.loc[:,"50%"] = tabela_formatada["50%"].apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+    tabela_formatada = tabela.copy(deep=False)
+    tabela_formatada["Início"] = formatar_data_coluna(tabela_formatada["Início"])
+    tabela_formatada["Vencimento"] = formatar_data_coluna(tabela_formatada["Vencimento"])
+    tabela_formatada["Valor"] = formatar_moeda_coluna(tabela_formatada["Valor"])
+    tabela_formatada["VALOR_MENSAL"] = formatar_moeda_coluna(tabela_formatada["VALOR_MENSAL"])
+    tabela_formatada["50%"] = formatar_moeda_coluna(tabela_formatada["50%"])
     
     # Criar uma nova linha para o total
     linha_total = pd.DataFrame({
@@ -110,7 +86,7 @@ def formatar_valores_para_exibicao_pilates(tabela):
         'Início': [''],
         'Vencimento': [''],
         'VALOR_MENSAL': [''],
-        '50%': [f"{total_50_percent:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")],
+        '50%': [formatar_moeda(total_50_percent)],
         'Professor': ['']
     }, index=['Total a Pagar'])
     
@@ -127,18 +103,11 @@ def formatar_valor_para_csv(valor):
 
 def exportar_tabela_pilates(mes_abrev, ano, professor_selecionado=None):
     """Exporta a tabela para PDF com resumo e tabela detalhada"""
-    tabela_original = st.session_state.get("pilates", tabela_pilates)
-    
-    # Se há filtro por professor, usar a tabela filtrada
+    # A tabela já vem filtrada pelo professor na consulta
+    tabela_filtrada = st.session_state.get("pilates", tabela_pilates)
     if professor_selecionado and professor_selecionado != 'Todos':
-        if professor_selecionado == 'Sem Professor':
-            tabela_filtrada = tabela_original[tabela_original["Professor"].isna()].copy()
-            nome_professor_export = "Sem Professor"
-        else:
-            tabela_filtrada = tabela_original[tabela_original["Professor"] == professor_selecionado].copy()
-            nome_professor_export = professor_selecionado
+        nome_professor_export = professor_selecionado
     else:
-        tabela_filtrada = tabela_original.copy()
         nome_professor_export = "Todos"
     
     # Calcular totais
@@ -147,13 +116,11 @@ def exportar_tabela_pilates(mes_abrev, ano, professor_selecionado=None):
     
     # Preparar tabela para PDF (nome, início, vencimento e 50%)
     colunas_para_pdf = ['nome_completo', 'Início', 'Vencimento', '50%']
-    tabela_para_pdf = tabela_filtrada[[col for col in colunas_para_pdf if col in tabela_filtrada.columns]].copy()
+    tabela_para_pdf = tabela_filtrada[[col for col in colunas_para_pdf if col in tabela_filtrada.columns]]
     
     # Criar nome do arquivo base
     if professor_selecionado and professor_selecionado != 'Todos':
-        # Normalizar nome do professor para nome de arquivo
-        nome_arquivo_prof = nome_professor_export.lower().replace(" ", "_").replace("ã", "a").replace("õ", "o")
-        nome_arquivo_base = f'pilates_{nome_arquivo_prof}_{mes_abrev}_{ano}'
+        nome_arquivo_base = f'pilates_{nome_arquivo_professor(nome_professor_export)}_{mes_abrev}_{ano}'
     else:
         nome_arquivo_base = f'pilates_{mes_abrev}_{ano}'
     
@@ -191,6 +158,9 @@ if tabela_pilates is not None and not tabela_pilates.empty:
         if st.button('📥 Exportar PDF', use_container_width=True):
             exportar_tabela_pilates(mes_abrev, ano, professor_selecionado)
 
+    # Uso de memória da sessão e do processo
+    exibir_uso_memoria()
+    
     # Abrir dialog de cadastro se necessário
     if st.session_state.get('dialog_cadastro_aberto', False):
         criar_dialog_cadastro_aluno('pilates', mes_abrev, ano, tem_professor=True)
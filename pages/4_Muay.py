@@ -8,7 +8,9 @@ project_root = Path(__file__).parent.parent
 if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
-from utils import selecionar_arquivo_excel, obter_ano_atual, carregar_dados_do_mongodb, MESES, adicionar_interface_edicao, exportar_para_pdf, criar_dialog_cadastro_aluno
+from utils import selecionar_arquivo_excel, obter_ano_atual, carregar_dados_do_mongodb, MESES, adicionar_interface_edicao, exportar_para_pdf, criar_dialog_cadastro_aluno, exibir_uso_memoria
+from planos import calcular_valor_mensal_serie
+from formatacao import formatar_data_coluna, formatar_moeda, formatar_moeda_coluna
 
 st.set_page_config(page_title='Muay', layout='wide')
 pasta_atual = Path(__file__).parent.parent / 'muay'
@@ -30,28 +32,15 @@ if tabela_muay is None or tabela_muay.empty:
     st.info("💡 Use a página 'Importar Arquivos' para importar dados.")
     st.stop()
 
-def calcular_valor_mensal(plano, valor):
-    if "15 MESES" in plano:
-        return valor / 15
-    elif "ANUAL" in plano or "12 MESES" in plano:
-        return valor / 12
-    elif "SEMESTRAL" in plano:
-        return valor / 6
-    elif "TRIMESTRAL" in plano:
-        return valor / 3
-    else:
-        return valor 
-
 def processar_valores_muay(tabela):
     """Processa os valores e adiciona colunas calculadas"""
     # Calcular valor mensal baseado no tipo de plano
-    tabela.loc[:,"VALOR_MENSAL"] = tabela.apply(lambda row: calcular_valor_mensal(row["Contratos"], row["Valor"]), axis=1)    
+    tabela["VALOR_MENSAL"] = calcular_valor_mensal_serie(tabela["Contratos"], tabela["Valor"])
     # Calcular 50% do VALOR_MENSAL (metade do valor mensal)
-    tabela.loc[:,"50%"] = tabela["VALOR_MENSAL"] / 2
+    tabela["50%"] = tabela["VALOR_MENSAL"] / 2
     
-    # Salvar uma cópia antes da formatação para session_state
-    tabela_state = tabela.copy()
-    st.session_state["muay"] = tabela_state
+    # Guardar a própria tabela (a formatação para exibição monta outro DataFrame)
+    st.session_state["muay"] = tabela
     
     return tabela
 
@@ -61,10 +50,12 @@ def formatar_valores_para_exibicao_muay(tabela):
     total_50_percent = tabela["50%"].sum()
     
     # Formatar valores numéricos
-    tabela_formatada = tabela.copy()
-    tabela_formatada.loc[:,"Valor"] = tabela_formatada["Valor"].apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-    tabela_formatada.loc[:,"VALOR_MENSAL"] = tabela_formatada["VALOR_MENSAL"].apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
-    tabela_formatada.loc[:,"50%"] = tabela_formatada["50%"].apply(lambda x: f"{x:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+    tabela_formatada = tabela.copy(deep=False)
+    tabela_formatada["Início"] = formatar_data_coluna(tabela_formatada["Início"])
+    tabela_formatada["Vencimento"] = formatar_data_coluna(tabela_formatada["Vencimento"])
+    tabela_formatada["Valor"] = formatar_moeda_coluna(tabela_formatada["Valor"])
+    tabela_formatada["VALOR_MENSAL"] = formatar_moeda_coluna(tabela_formatada["VALOR_MENSAL"])
+    tabela_formatada["50%"] = formatar_moeda_coluna(tabela_formatada["50%"])
     
     # Criar uma nova linha para o total
     linha_total = pd.DataFrame({
@@ -74,7 +65,7 @@ def formatar_valores_para_exibicao_muay(tabela):
         'Início': [''],
         'Vencimento': [''],
         'VALOR_MENSAL': [''],
-        '50%': [f"{total_50_percent:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")]
+        '50%': [formatar_moeda(total_50_percent)]
     }, index=['Total a Pagar'])
     
     # Concatenar com a tabela formatada
@@ -135,6 +126,9 @@ if tabela_muay is not None:
         if st.button('📥 Exportar PDF', use_container_width=True):
             exportar_tabela_muay(mes_abrev, ano)
         
+    # Uso de memória da sessão e do processo
+    exibir_uso_memoria()
+    
     # Abrir dialog de cadastro se necessário
     if st.session_state.get('dialog_cadastro_aberto', False):
         criar_dialog_cadastro_aluno('muay', mes_abrev, ano, tem_professor=False)
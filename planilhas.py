@@ -0,0 +1,413 @@
+from datetime import datetime
+from functools import lru_cache
+from itertools import islice
+from pathlib import Path
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from planos import divisores_planos
+
+# Colunas canônicas usadas na importação de contratos
+COLUNAS_OBRIGATORIAS = ['ID do cliente', 'Contratos']
+COLUNAS_OPCIONAIS = ['Nome', 'Sobrenome', 'nome_completo', 'Valor', 'Início', 'Vencimento', 'Professor', 'VALOR_MENSAL', '50%']
+
+# Pelo menos uma coluna de cada grupo precisa existir
+GRUPOS_OBRIGATORIOS = [
+    ['Nome', 'nome_completo'],
+    # Sem Valor, o valor do contrato é reconstruído a partir do valor mensal ou dos 50%
+    ['Valor', 'VALOR_MENSAL', '50%'],
+]
+
+# Variações de cabeçalho conhecidas (normalizadas: maiúsculas, sem acentos) -> coluna canônica
+ALIASES_COLUNAS = {
+    'ID DO CLIENTE': 'ID do cliente',
+    'ID': 'ID do cliente',
+    'ID_CLIENTE': 'ID do cliente',
+    'NOME': 'Nome',
+    'SOBRENOME': 'Sobrenome',
+    'NOME_COMPLETO': 'nome_completo',
+    'NOME COMPLETO': 'nome_completo',
+    'CONTRATOS': 'Contratos',
+    'PLANO ATIVO': 'Contratos',
+    'VALOR': 'Valor',
+    'VALORES': 'Valor',
+    'INICIO': 'Início',
+    'VENCIMENTO': 'Vencimento',
+    'PROFESSOR': 'Professor',
+    'VALOR_MENSAL': 'VALOR_MENSAL',
+    'VALOR MENSAL': 'VALOR_MENSAL',
+    '50%': '50%',
+}
+
+# Colunas numéricas e de data tipadas na leitura de CSV (float64 e datetime DD/MM/AAAA)
+COLUNAS_NUMERICAS = ['Valor', 'VALOR_MENSAL', '50%']
+COLUNAS_DATA = ['Início', 'Vencimento']
+
+# Linhas examinadas para decidir a vírgula ou o ponto decimal do CSV
+LINHAS_AMOSTRA_CSV = 200
+
+# Quantidade máxima de linhas examinadas para encontrar o cabeçalho
+LINHAS_BUSCA_CABECALHO = 20
+
+def _normalizar_nome_coluna(nome):
+    """Nome da coluna em maiúsculas, sem acentos e sem espaços repetidos"""
+    nome = unicodedata.normalize('NFKD', str(nome)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(nome.upper().split())
+
+@lru_cache(maxsize=128)
+def mapear_colunas(cabecalho):
+    """Associa as colunas do cabeçalho às colunas canônicas (memorizado por cabeçalho)
+    
+    Args:
+        cabecalho: Tupla com os nomes das colunas do arquivo
+    
+    Returns:
+        Tupla de pares (posição no cabeçalho, coluna canônica), na ordem das colunas canônicas
+    """
+    posicoes = {}
+    for posicao, nome in enumerate(cabecalho):
+        canonica = ALIASES_COLUNAS.get(_normalizar_nome_coluna(nome))
+        if canonica is not None and canonica not in posicoes:
+            posicoes[canonica] = posicao
+    ordem = COLUNAS_OBRIGATORIAS + COLUNAS_OPCIONAIS
+    return tuple((posicoes[coluna], coluna) for coluna in ordem if coluna in posicoes)
+
+def _colunas_faltando(colunas):
+    """Colunas obrigatórias (ou grupos) ausentes, para a mensagem de erro"""
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in colunas]
+    for grupo in GRUPOS_OBRIGATORIOS:
+        if not any(coluna in colunas for coluna in grupo):
+            faltando.append(' ou '.join(grupo))
+    return faltando
+
+def _detectar_formato_csv(arquivo_path):
+    """Retorna (separador, encoding) examinando o início do arquivo"""
+    with open(arquivo_path, 'rb') as arquivo:
+        amostra = arquivo.read(65536)
+    try:
+        texto = amostra.decode('utf-8-sig')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # Erro apenas no fim da amostra: caractere cortado ao meio
+        if e.start < len(amostra) - 4:
+            texto = amostra.decode('latin-1')
+            encoding = 'latin-1'
+        else:
+            texto = amostra[:e.start].decode('utf-8-sig')
+            encoding = 'utf-8-sig'
+    primeira_linha = texto.splitlines()[0] if texto else ''
+    separador = ';' if primeira_linha.count(';') > primeira_linha.count(',') else ','
+    return separador, encoding
+
+class LeitorPlanilha:
+    """Lê uma planilha de contratos abrindo o arquivo uma única vez
+
+    Arquivos .xlsx são lidos com openpyxl em modo read-only, linha a linha, e arquivos .csv
+    com o leitor C do pandas (separador ; ou , e vírgula decimal); ambos são entregues em
+    blocos (DataFrames) de no máximo tamanho_bloco linhas, então a memória usada não
+    depende do tamanho do arquivo. Os cabeçalhos são associados às colunas canônicas por
+    mapear_colunas. As primeiras linhas_preview linhas ficam guardadas em preview para
+    exibição. Outros formatos são lidos pelo pandas num único bloco.
+
+    Uso:
+        with LeitorPlanilha(caminho) as leitor:
+            for bloco in leitor.blocos():
+                ...
+            leitor.preview
+    """
+
+    def __init__(self, arquivo_path, tamanho_bloco=1000, linhas_preview=5):
+        if tamanho_bloco < 1:
+            raise ValueError("tamanho_bloco deve ser maior que zero")
+        self.arquivo_path = Path(arquivo_path)
+        self.tamanho_bloco = tamanho_bloco
+        self.linhas_preview = linhas_preview
+        self.preview = pd.DataFrame()
+        self.cabecalho = []
+        self._workbook = None
+        self._linhas = None
+        self._df_completo = None
+        self._csv = None
+        self._colunas_csv = []
+
+        sufixo = self.arquivo_path.suffix.lower()
+        if sufixo in ('.xlsx', '.xlsm'):
+            from openpyxl import load_workbook
+            self._workbook = load_workbook(self.arquivo_path, read_only=True, data_only=True)
+            self._linhas = self._workbook.active.iter_rows(values_only=True)
+            self.cabecalho = self._detectar_cabecalho()
+        elif sufixo in ('.csv', '.txt'):
+            self._csv = _detectar_formato_csv(self.arquivo_path)
+            separador, encoding = self._csv
+            cabecalho = pd.read_csv(self.arquivo_path, sep=separador, encoding=encoding, nrows=0, engine='c')
+            self.cabecalho = [str(coluna).strip() for coluna in cabecalho.columns]
+            self._colunas_csv = list(cabecalho.columns)
+        else:
+            self._df_completo = pd.read_excel(self.arquivo_path)
+            self._df_completo.columns = [str(coluna).strip() for coluna in self._df_completo.columns]
+            self.cabecalho = list(self._df_completo.columns)
+
+        self.mapeamento = mapear_colunas(tuple(self.cabecalho))
+        self.colunas = [coluna for _, coluna in self.mapeamento]
+
+        faltando = _colunas_faltando(self.colunas)
+        if faltando:
+            self.fechar()
+            raise ValueError(f"Colunas não encontradas na planilha: {', '.join(faltando)}")
+
+    def _detectar_cabecalho(self):
+        """Avança até a linha de cabeçalho (a que tem a coluna de ID do cliente ou a primeira não vazia)"""
+        primeira_nao_vazia = None
+        for linha in islice(self._linhas, LINHAS_BUSCA_CABECALHO):
+            valores = ['' if valor is None else str(valor).strip() for valor in linha]
+            if not any(valores):
+                continue
+            if any(coluna == 'ID do cliente' for _, coluna in mapear_colunas(tuple(valores))):
+                return valores
+            if primeira_nao_vazia is None:
+                primeira_nao_vazia = valores
+        return primeira_nao_vazia or []
+
+    def _linhas_validas(self):
+        """Linhas de dados, ignorando linhas totalmente vazias"""
+        for linha in self._linhas:
+            if any(valor is not None and valor != '' for valor in linha):
+                yield linha
+
+    def _decimal_csv(self, colunas_numericas):
+        """Separadores (decimal, milhar) das colunas numéricas, a partir das primeiras linhas
+
+        Exportações com ; usam vírgula decimal ('1.530,00'); algumas com , usam ponto ('1530.0').
+        """
+        if not colunas_numericas:
+            return ',', '.'
+        separador, encoding = self._csv
+        amostra = pd.read_csv(
+            self.arquivo_path, sep=separador, encoding=encoding, usecols=colunas_numericas,
+            dtype=str, nrows=LINHAS_AMOSTRA_CSV, engine='c'
+        )
+        if amostra.apply(lambda coluna: coluna.str.contains(',', regex=False)).any().any():
+            return ',', '.'
+        return '.', None
+
+    def _blocos_csv(self):
+        """Blocos do CSV lidos pelo motor C só com as colunas mapeadas, já tipados
+
+        Os valores são lidos como float64 (com o separador decimal do arquivo) e as datas
+        como datetime DD/MM/AAAA; as demais colunas ficam como texto.
+        """
+        separador, encoding = self._csv
+        originais = {self._colunas_csv[posicao]: coluna for posicao, coluna in self.mapeamento}
+        numericas = [original for original, coluna in originais.items() if coluna in COLUNAS_NUMERICAS]
+        datas = [original for original, coluna in originais.items() if coluna in COLUNAS_DATA]
+        decimal, milhar = self._decimal_csv(numericas)
+        leitor = pd.read_csv(
+            self.arquivo_path,
+            sep=separador,
+            encoding=encoding,
+            usecols=list(originais),
+            dtype={original: 'float64' if original in numericas else str for original in originais if original not in datas},
+            decimal=decimal,
+            thousands=milhar,
+            parse_dates=datas,
+            date_format='%d/%m/%Y',
+            skipinitialspace=True,
+            skip_blank_lines=True,
+            engine='c',
+            chunksize=self.tamanho_bloco
+        )
+        inicio = 0
+        with leitor:
+            for bloco in leitor:
+                if inicio < self.linhas_preview:
+                    preview = bloco.head(self.linhas_preview - inicio)
+                    preview.columns = [str(coluna).strip() for coluna in preview.columns]
+                    self.preview = pd.concat([self.preview, preview], ignore_index=True)
+                bloco = bloco.rename(columns=originais)[self.colunas]
+                for coluna in COLUNAS_DATA:
+                    # Com alguma data fora do formato o leitor devolve a coluna como texto
+                    if coluna in bloco.columns and not pd.api.types.is_datetime64_any_dtype(bloco[coluna]):
+                        bloco[coluna] = pd.to_datetime(bloco[coluna], format='%d/%m/%Y', errors='coerce')
+                bloco.index = pd.RangeIndex(inicio, inicio + len(bloco))
+                inicio += len(bloco)
+                yield bloco
+
+    def blocos(self):
+        """Gera DataFrames com as colunas canônicas, com no máximo tamanho_bloco linhas"""
+        if self._csv is not None:
+            yield from self._blocos_csv()
+            return
+
+        if self._df_completo is not None:
+            self.preview = self._df_completo.head(self.linhas_preview)
+            renomear = {self.cabecalho[posicao]: coluna for posicao, coluna in self.mapeamento}
+            yield self._df_completo.rename(columns=renomear)[self.colunas]
+            return
+
+        linhas = self._linhas_validas()
+        largura = len(self.cabecalho)
+        indices = [posicao for posicao, _ in self.mapeamento]
+        inicio = 0
+
+        while True:
+            lote = list(islice(linhas, self.tamanho_bloco))
+            if not lote:
+                break
+            # Completar linhas mais curtas que o cabeçalho
+            lote = [tuple(linha) + (None,) * (largura - len(linha)) for linha in lote]
+            if inicio < self.linhas_preview:
+                restantes = self.linhas_preview - inicio
+                self.preview = pd.concat(
+                    [self.preview, pd.DataFrame.from_records(lote[:restantes], columns=self.cabecalho)],
+                    ignore_index=True
+                )
+            bloco = pd.DataFrame.from_records(
+                [[linha[indice] for indice in indices] for linha in lote],
+                columns=self.colunas,
+                index=pd.RangeIndex(inicio, inicio + len(lote))
+            )
+            inicio += len(lote)
+            yield bloco
+
+        self.fechar()
+
+    def fechar(self):
+        """Fecha o arquivo (necessário no modo read-only do openpyxl)"""
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+def ler_preview_planilha(arquivo_path, linhas=5):
+    """Lê apenas as primeiras linhas da planilha para exibição"""
+    with LeitorPlanilha(arquivo_path, tamanho_bloco=max(linhas, 1), linhas_preview=linhas) as leitor:
+        next(leitor.blocos(), None)
+        return leitor.preview
+
+def _texto_ou_none(serie):
+    """Converte a coluna para texto sem espaços extras, com None para vazios/NaN"""
+    texto = serie.astype(object).where(serie.notna(), '').astype(str).str.strip()
+    return texto.astype(object).where(texto != '', None)
+
+def _datas_para_texto(serie):
+    """Converte a coluna de datas para DD/MM/AAAA, com None para datas inválidas"""
+    # Formata apenas as datas distintas (strftime é caro por elemento)
+    codigos, datas_unicas = pd.factorize(pd.to_datetime(serie, errors='coerce'))
+    textos = np.append(np.asarray(datas_unicas.strftime("%d/%m/%Y"), dtype=object), None)
+    return pd.Series(textos[codigos], index=serie.index, dtype=object)
+
+def preparar_documentos_contratos(df, modalidade, mes_abrev, ano):
+    """Transforma as linhas da planilha em documentos de contrato com operações de coluna
+    
+    Args:
+        df: DataFrame com as colunas canônicas lidas por LeitorPlanilha ('ID do cliente',
+            'Nome' e 'Sobrenome' ou 'nome_completo', 'Contratos', 'Início', 'Vencimento',
+            'Valor' ou 'VALOR_MENSAL'/'50%' e opcionalmente 'Professor')
+        modalidade: Modalidade dos contratos
+        mes_abrev: Mês abreviado
+        ano: Ano
+    
+    Returns:
+        Tupla (documentos, ignorados) com a lista de documentos prontos para gravação
+        e a quantidade de linhas descartadas por não terem ID do cliente
+    """
+    vazio = pd.Series([None] * len(df), index=df.index, dtype=object)
+    
+    # Filtrar linhas sem ID do cliente
+    ids = df['ID do cliente'] if 'ID do cliente' in df.columns else vazio
+    if pd.api.types.is_float_dtype(ids):
+        # Planilhas com IDs em branco são lidas como float (21441.0)
+        ids = ids.astype('Int64')
+    ids = _texto_ou_none(ids)
+    validos = ids.notna()
+    ignorados = int((~validos).sum())
+    
+    df = df[validos]
+    if df.empty:
+        return [], ignorados
+    
+    if 'Nome' not in df.columns and 'nome_completo' in df.columns:
+        nome_completo = df['nome_completo'].fillna('').astype(str).str.strip()
+    else:
+        nome = df['Nome'].fillna('').astype(str) if 'Nome' in df.columns else ''
+        sobrenome = df['Sobrenome'].fillna('').astype(str) if 'Sobrenome' in df.columns else ''
+        nome_completo = (nome + ' ' + sobrenome).str.strip()
+    contratos = df['Contratos'].fillna('').astype(str) if 'Contratos' in df.columns else pd.Series('', index=df.index)
+    
+    # Cada plano distinto é analisado uma única vez
+    divisores = divisores_planos(contratos)
+    if 'Valor' in df.columns:
+        valor = pd.to_numeric(df['Valor'], errors='coerce')
+    elif 'VALOR_MENSAL' in df.columns:
+        # Exportações sem o valor do contrato: reconstruído a partir do valor mensal
+        valor = (pd.to_numeric(df['VALOR_MENSAL'], errors='coerce') * divisores).round(2)
+    elif '50%' in df.columns:
+        valor = (pd.to_numeric(df['50%'], errors='coerce') * 2 * divisores).round(2)
+    else:
+        valor = pd.Series(0.0, index=df.index)
+    valor_mensal = valor / divisores
+    
+    colunas = pd.DataFrame({
+        "id_cliente": ids[validos],
+        "nome_completo": nome_completo,
+        "contratos": contratos,
+        "valor": valor.fillna(0.0).astype(float),
+        "inicio": _datas_para_texto(df['Início']) if 'Início' in df.columns else vazio[validos],
+        "vencimento": _datas_para_texto(df['Vencimento']) if 'Vencimento' in df.columns else vazio[validos],
+        "valor_mensal": valor_mensal.fillna(0.0).astype(float),
+        "professor": _texto_ou_none(df['Professor']) if 'Professor' in df.columns else vazio[validos],
+    })
+    
+    campos_periodo = {
+        "modalidade": modalidade,
+        "mes": mes_abrev,
+        "ano": int(ano),
+        "criado_em": datetime.now()
+    }
+    campos = list(colunas.columns)
+    valores_colunas = [colunas[campo].tolist() for campo in campos]
+    documentos = [dict(zip(campos, valores), **campos_periodo) for valores in zip(*valores_colunas)]
+    
+    return documentos, ignorados
+
+def blocos_documentos_planilha(arquivo_path, modalidade, mes_abrev, ano, tamanho_bloco=1000, resumo=None):
+    """Gera os documentos da planilha bloco a bloco (listas de até tamanho_bloco documentos)
+    
+    Só um bloco fica na memória por vez, qualquer que seja o tamanho do arquivo.
+    
+    Args:
+        resumo: dict opcional que recebe 'ignorados' (linhas sem ID) e 'preview' durante a leitura
+    """
+    if resumo is not None:
+        resumo.update(ignorados=0, preview=pd.DataFrame())
+    with LeitorPlanilha(arquivo_path, tamanho_bloco=tamanho_bloco) as leitor:
+        for bloco in leitor.blocos():
+            documentos, ignorados = preparar_documentos_contratos(bloco, modalidade, mes_abrev, ano)
+            if resumo is not None:
+                resumo["ignorados"] += ignorados
+                resumo["preview"] = leitor.preview
+            if documentos:
+                yield documentos
+
+def documentos_da_planilha(arquivo_path, modalidade, mes_abrev, ano):
+    """Lê a planilha em blocos (arquivo aberto uma única vez) e prepara todos os documentos
+    
+    Para gravar sem manter a planilha inteira na memória use blocos_documentos_planilha.
+    
+    Returns:
+        Tupla (documentos, ignorados, preview)
+    """
+    resumo = {}
+    documentos = [
+        contrato
+        for bloco in blocos_documentos_planilha(arquivo_path, modalidade, mes_abrev, ano, resumo=resumo)
+        for contrato in bloco
+    ]
+    return documentos, resumo["ignorados"], resumo["preview"]
@@ -0,0 +1,54 @@
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Regras de duração dos planos (termo no nome do plano -> quantidade de meses)
+# A ordem importa: a primeira regra que casar com o nome do plano é usada.
+# Para suportar uma nova duração basta adicionar uma linha aqui.
+REGRAS_DURACAO = [
+    ("24 MESES", 24),
+    ("18 MESES", 18),
+    ("15 MESES", 15),
+    ("ANUAL", 12),
+    ("12 MESES", 12),
+    ("SEMESTRAL", 6),
+    ("6 MESES", 6),
+    ("TRIMESTRAL", 3),
+    ("3 MESES", 3),
+    ("BIMESTRAL", 2),
+    ("2 MESES", 2),
+]
+
+# Termos compilados uma única vez; não casam dentro de outras palavras/números ("12 MESES" não casa "2 MESES")
+_REGRAS_COMPILADAS = [
+    (re.compile(r"(?<!\w)" + re.escape(termo).replace(r"\ ", r"\s+") + r"(?!\w)"), meses)
+    for termo, meses in REGRAS_DURACAO
+]
+
+@lru_cache(maxsize=2048)
+def meses_do_plano(plano):
+    """Retorna a duração do plano em meses (1 para planos mensais ou não reconhecidos)"""
+    if plano is None or pd.isna(plano):
+        return 1
+    plano_str = str(plano).upper()
+    for padrao, meses in _REGRAS_COMPILADAS:
+        if padrao.search(plano_str):
+            return meses
+    return 1
+
+def divisores_planos(contratos):
+    """Retorna um array com o divisor (meses) de cada plano da Series de contratos
+
+    Cada nome de plano distinto é analisado uma única vez; o resultado é espalhado
+    para todas as linhas pelos códigos do factorize.
+    """
+    codigos, planos_unicos = pd.factorize(pd.Series(contratos), use_na_sentinel=True)
+    # Última posição atende o código -1 (plano vazio/NaN)
+    meses = np.array([meses_do_plano(plano) for plano in planos_unicos] + [1], dtype=float)
+    return meses[codigos]
+
+def calcular_valor_mensal_serie(contratos, valores):
+    """Calcula o valor mensal de todas as linhas (valor / meses do plano)"""
+    return pd.to_numeric(valores, errors='coerce') / divisores_planos(contratos)
@@ -0,0 +1,380 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from formatacao import formatar_data_coluna, formatar_moeda, formatar_moeda_coluna
+from planos import calcular_valor_mensal_serie
+
+PASTA_BASE = Path(__file__).parent
+
+# Pasta onde cada modalidade guarda planilhas e PDFs (mesmas das páginas)
+PASTAS_MODALIDADES = {
+    'judo': 'judo',
+    'pilates': 'pilates',
+    'prime': 'prime',
+    'muay': 'muay',
+    'krav': 'kravmaga',
+}
+
+# Modalidades com um PDF por professor além do PDF geral
+MODALIDADES_POR_PROFESSOR = ['pilates']
+
+# Mesmos nomes de utils.MESES (sem importar o Streamlit nos processos do pool)
+NOMES_MESES = {
+    'jan': 'Janeiro', 'fev': 'Fevereiro', 'mar': 'Março', 'abr': 'Abril',
+    'mai': 'Maio', 'jun': 'Junho', 'jul': 'Julho', 'ago': 'Agosto',
+    'set': 'Setembro', 'out': 'Outubro', 'nov': 'Novembro', 'dez': 'Dezembro'
+}
+
+# Alturas fixas das linhas da tabela de registros (pontos): dispensam medir cada célula
+# e permitem calcular quantas linhas cabem em cada página
+ALTURA_CABECALHO = 28
+ALTURA_LINHA = 18
+ALTURA_TOTAL = 24
+
+# Tamanho máximo do nome do cliente no PDF
+MAX_CARACTERES_NOME = 30
+
+@lru_cache(maxsize=1)
+def _estilos():
+    """Estilos de parágrafo e de tabela dos relatórios (criados uma vez por processo)"""
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import TableStyle
+
+    styles = getSampleStyleSheet()
+    cabecalho_tabela = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('TOPPADDING', (0, 0), (-1, 0), 8),
+        # Linhas de dados
+        ('ALIGN', (0, 1), (0, -1), 'LEFT'),  # Nome - esquerda
+        ('ALIGN', (1, 1), (2, -1), 'CENTER'),  # Início e vencimento - centro
+        ('ALIGN', (3, 1), (3, -1), 'RIGHT'),  # Valor 50% - direita
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 10),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]
+    linha_total = [
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E7E6E6')),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('ALIGN', (0, -1), (2, -1), 'LEFT'),
+        ('TOPPADDING', (0, -1), (-1, -1), 6),
+        ('BOTTOMPADDING', (0, -1), (-1, -1), 6),
+    ]
+    return {
+        "titulo": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=18,
+            textColor=colors.HexColor('#1f77b4'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=12,
+            alignment=TA_LEFT
+        ),
+        "titulo_tabela": ParagraphStyle(
+            'TableTitle', parent=styles['Heading2'], fontSize=14,
+            textColor=colors.HexColor('#1f77b4'), spaceAfter=10, alignment=TA_LEFT
+        ),
+        "rodape": ParagraphStyle(
+            'CustomFooter', parent=styles['Normal'], fontSize=9,
+            textColor=colors.grey, alignment=TA_CENTER
+        ),
+        "tabela_resumo": TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 14),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('FONTSIZE', (0, 1), (-1, -1), 12),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+        ]),
+        "tabela_registros": TableStyle(
+            cabecalho_tabela + [('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])]
+        ),
+        "tabela_registros_total": TableStyle(
+            cabecalho_tabela + [('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey])] + linha_total
+        ),
+    }
+
+def _linhas_registros(tabela_dados):
+    """Linhas (nome, início, vencimento, valor 50%) da tabela de registros, em operações de coluna"""
+    if 'nome_completo' in tabela_dados.columns:
+        nomes = tabela_dados['nome_completo']
+    else:
+        nomes = tabela_dados.index.to_series()
+    nomes = nomes.astype(str).str.upper().str.strip()
+    # Limitar tamanho do nome e adicionar '...' se necessário
+    longos = nomes.str.len() > MAX_CARACTERES_NOME
+    nomes = nomes.where(~longos, nomes.str[:MAX_CARACTERES_NOME - 3] + '...')
+
+    def texto(coluna):
+        if coluna not in tabela_dados.columns:
+            return [''] * len(tabela_dados)
+        if pd.api.types.is_datetime64_any_dtype(tabela_dados[coluna]):
+            return formatar_data_coluna(tabela_dados[coluna]).tolist()
+        return tabela_dados[coluna].fillna('').astype(str).tolist()
+
+    if '50%' in tabela_dados.columns:
+        valores = tabela_dados['50%']
+        numeros = pd.to_numeric(valores, errors='coerce')
+        valores_formatados = formatar_moeda_coluna(numeros.fillna(0), 'R$ ').tolist()
+        # Valores não numéricos (já formatados) são mantidos como texto
+        nao_numericos = numeros.isna().to_numpy()
+        if nao_numericos.any():
+            textos = valores.astype(str).tolist()
+            valores_formatados = [textos[i] if nao_numericos[i] else valor for i, valor in enumerate(valores_formatados)]
+    else:
+        valores_formatados = formatar_moeda_coluna(np.zeros(len(tabela_dados)), 'R$ ').tolist()
+
+    return [list(linha) for linha in zip(nomes.tolist(), texto('Início'), texto('Vencimento'), valores_formatados)]
+
+def _tabelas_registros(linhas, linha_total, altura_primeira_pagina, altura_pagina):
+    """Divide as linhas em tabelas do tamanho de uma página, cada uma com o cabeçalho
+    
+    A primeira tabela ocupa o espaço que sobra na primeira página; as demais, uma página
+    inteira. Assim o ReportLab não precisa dividir tabelas grandes (custo quadrático).
+    """
+    from reportlab.lib.units import cm
+    from reportlab.platypus import Table
+
+    estilos = _estilos()
+    cabecalho = ['Nome do Cliente', 'Início', 'Vencimento', 'Valor 50%']
+    larguras_colunas = [7*cm, 3.5*cm, 3.5*cm, 4*cm]
+
+    def capacidade(altura):
+        return max(1, int((altura - ALTURA_CABECALHO) // ALTURA_LINHA))
+
+    tabelas = []
+    inicio = 0
+    altura = altura_primeira_pagina
+    while True:
+        fim = inicio + capacidade(altura)
+        ultima = fim >= len(linhas)
+        dados = [cabecalho] + linhas[inicio:fim]
+        alturas = [ALTURA_CABECALHO] + [ALTURA_LINHA] * (len(dados) - 1)
+        if ultima:
+            dados.append(linha_total)
+            alturas.append(ALTURA_TOTAL)
+        tabela = Table(dados, colWidths=larguras_colunas, rowHeights=alturas, repeatRows=1)
+        tabela.setStyle(estilos["tabela_registros_total"] if ultima else estilos["tabela_registros"])
+        tabelas.append(tabela)
+        if ultima:
+            return tabelas
+        inicio = fim
+        altura = altura_pagina
+
+def gerar_pdf_pagamentos(total_50_percent, num_registros, nome_professor, mes_abrev, ano, pasta_destino, nome_arquivo_base, tabela_dados=None):
+    """Gera o PDF de pagamentos (resumo e detalhamento por cliente) e retorna o caminho
+    
+    Não depende do Streamlit; erros (inclusive ImportError do reportlab) são propagados.
+    Parâmetros iguais aos de utils.exportar_para_pdf.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table
+
+    estilos = _estilos()
+
+    # Criar nome do arquivo PDF
+    nome_pdf = Path(pasta_destino) / f'{nome_arquivo_base}.pdf'
+
+    # Criar documento PDF
+    doc = SimpleDocTemplate(str(nome_pdf), pagesize=A4, 
+                           rightMargin=2*cm, leftMargin=2*cm, 
+                           topMargin=2*cm, bottomMargin=2*cm)
+    story = []
+
+    # Título
+    story.append(Paragraph("Relatório de Pagamentos", estilos["titulo"]))
+    story.append(Spacer(1, 0.5*cm))
+
+    # Informações do professor (apenas se fornecido)
+    if nome_professor:
+        story.append(Paragraph(f"<b>Professor:</b> {nome_professor}", estilos["normal"]))
+        story.append(Spacer(1, 0.3*cm))
+
+    # Período
+    mes_nome_completo = NOMES_MESES.get(mes_abrev, mes_abrev)
+    story.append(Paragraph(f"<b>Período:</b> {mes_nome_completo}/{ano}", estilos["normal"]))
+    story.append(Spacer(1, 0.5*cm))
+
+    # Tabela com os dados resumidos
+    total_formatado = formatar_moeda(total_50_percent, 'R$ ')
+    dados_resumo = [
+        ['Item', 'Valor'],
+        ['Total 50%', total_formatado],
+        ['Número de Registros', str(num_registros)]
+    ]
+    tabela_resumo = Table(dados_resumo, colWidths=[8*cm, 8*cm])
+    tabela_resumo.setStyle(estilos["tabela_resumo"])
+    story.append(tabela_resumo)
+    story.append(Spacer(1, 0.8*cm))
+
+    # Adicionar tabela com os dados dos registros se fornecida
+    if tabela_dados is not None and not tabela_dados.empty:
+        # Título da tabela de registros
+        story.append(Paragraph("<b>Detalhamento por Cliente</b>", estilos["titulo_tabela"]))
+        story.append(Spacer(1, 0.3*cm))
+
+        # Espaço livre na primeira página depois do resumo (com uma linha de folga)
+        altura_pagina = doc.height - 12  # padding do frame
+        ocupado = sum(
+            flowable.wrap(doc.width, altura_pagina)[1] + flowable.getSpaceBefore() + flowable.getSpaceAfter()
+            for flowable in story
+        )
+        altura_primeira_pagina = altura_pagina - ocupado - ALTURA_LINHA
+        if altura_primeira_pagina < ALTURA_CABECALHO + 3 * ALTURA_LINHA:
+            altura_primeira_pagina = altura_pagina
+
+        linha_total = ['TOTAL', '', '', total_formatado]
+        story.extend(_tabelas_registros(_linhas_registros(tabela_dados), linha_total, altura_primeira_pagina, altura_pagina))
+        story.append(Spacer(1, 0.5*cm))
+
+    # Rodapé
+    story.append(Paragraph(f"<i>Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</i>", estilos["rodape"]))
+
+    # Construir PDF
+    doc.build(story)
+
+    return str(nome_pdf)
+
+def nome_arquivo_professor(nome_professor):
+    """Nome do professor normalizado para nome de arquivo (PDFs da página Pilates e da CLI)"""
+    return nome_professor.lower().replace(" ", "_").replace("ã", "a").replace("õ", "o")
+
+def tabela_para_pdf(contratos):
+    """Tabela do PDF (nome, início, vencimento e 50%) a partir do DataFrame de buscar_contratos"""
+    valor_50 = calcular_valor_mensal_serie(contratos['Contratos'], contratos['Valor']) / 2
+    return pd.DataFrame({
+        'nome_completo': contratos['nome_completo'],
+        'Início': contratos['Início'],
+        'Vencimento': contratos['Vencimento'],
+        '50%': valor_50,
+    }, index=contratos.index)
+
+def montar_relatorios_modalidade(contratos, modalidade, mes_abrev, ano, pasta_destino):
+    """Lista os relatórios de uma modalidade (parâmetros de gerar_pdf_pagamentos)
+    
+    Gera um relatório geral e, nas modalidades de MODALIDADES_POR_PROFESSOR, um por
+    professor (incluindo 'Sem Professor'), todos a partir da mesma leitura do banco.
+    """
+    tabela = tabela_para_pdf(contratos)
+    por_professor = modalidade in MODALIDADES_POR_PROFESSOR
+
+    def relatorio(tabela_relatorio, nome_professor, nome_arquivo_base):
+        return {
+            "total_50_percent": float(tabela_relatorio['50%'].sum()),
+            "num_registros": len(tabela_relatorio),
+            "nome_professor": nome_professor,
+            "mes_abrev": mes_abrev,
+            "ano": ano,
+            "pasta_destino": pasta_destino,
+            "nome_arquivo_base": nome_arquivo_base,
+            "tabela_dados": tabela_relatorio,
+        }
+
+    relatorios = [relatorio(tabela, 'Todos' if por_professor else None, f'{modalidade}_{mes_abrev}_{ano}')]
+    if por_professor and 'Professor' in contratos.columns:
+        professores = contratos['Professor']
+        for nome_professor in sorted(professores.dropna().unique()):
+            relatorios.append(relatorio(
+                tabela[professores == nome_professor],
+                nome_professor,
+                f'{modalidade}_{nome_arquivo_professor(nome_professor)}_{mes_abrev}_{ano}'
+            ))
+        if professores.isna().any():
+            relatorios.append(relatorio(
+                tabela[professores.isna()],
+                'Sem Professor',
+                f'{modalidade}_{nome_arquivo_professor("Sem Professor")}_{mes_abrev}_{ano}'
+            ))
+    return relatorios
+
+def _gerar_pdf_cronometrado(parametros):
+    """Gera um PDF e mede o tempo (executado nos processos do pool)"""
+    inicio = time.perf_counter()
+    caminho = gerar_pdf_pagamentos(**parametros)
+    return caminho, time.perf_counter() - inicio
+
+def gerar_relatorios_mes(mes_abrev, ano, modalidades=None, processos=None, pasta_base=PASTA_BASE):
+    """Gera todos os PDFs de fechamento do mês em paralelo
+    
+    Cada modalidade é lida do banco uma única vez (no processo principal); os PDFs são
+    gerados num pool de processos e gravados na pasta da modalidade.
+    
+    Args:
+        mes_abrev: Mês abreviado
+        ano: Ano
+        modalidades: Modalidades a gerar (padrão: todas)
+        processos: Quantidade de processos (padrão: número de CPUs)
+        pasta_base: Pasta que contém as pastas das modalidades
+    
+    Returns:
+        dict com gerados (arquivo, modalidade, professor, registros e tempo de cada PDF),
+        vazios (modalidades sem contratos no período) e erros
+    """
+    from db import buscar_contratos
+
+    resultado = {"gerados": [], "vazios": [], "erros": []}
+    relatorios = []
+    for modalidade in modalidades or list(PASTAS_MODALIDADES):
+        contratos = buscar_contratos(modalidade, mes_abrev, ano)
+        if contratos.empty:
+            resultado["vazios"].append(modalidade)
+            continue
+        pasta_destino = Path(pasta_base) / PASTAS_MODALIDADES[modalidade]
+        pasta_destino.mkdir(parents=True, exist_ok=True)
+        for parametros in montar_relatorios_modalidade(contratos, modalidade, mes_abrev, ano, pasta_destino):
+            relatorios.append((modalidade, parametros))
+    if not relatorios:
+        return resultado
+
+    processos = processos or os.cpu_count() or 1
+    # spawn: os processos do pool começam um interpretador novo em vez de copiar o principal
+    # (fork), que já tem um MongoClient aberto e não pode ser compartilhado
+    with ProcessPoolExecutor(
+        max_workers=min(processos, len(relatorios)),
+        mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futuros = {
+            executor.submit(_gerar_pdf_cronometrado, parametros): (modalidade, parametros)
+            for modalidade, parametros in relatorios
+        }
+        for futuro in as_completed(futuros):
+            modalidade, parametros = futuros[futuro]
+            try:
+                caminho, tempo = futuro.result()
+                resultado["gerados"].append({
+                    "arquivo": caminho,
+                    "modalidade": modalidade,
+                    "professor": parametros["nome_professor"],
+                    "registros": parametros["num_registros"],
+                    "tempo": tempo,
+                })
+            except Exception as e:
+                resultado["erros"].append({"arquivo": f'{parametros["nome_arquivo_base"]}.pdf', "erro": str(e)})
+
+    resultado["gerados"].sort(key=lambda gerado: gerado["arquivo"])
+    return resultado
@@ -0,0 +1,47 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Adicionar raiz do projeto ao path para imports
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+import db
+from cache import cache_contratos, cache_fluxo_caixa, cache_visao_geral, catalogo_modalidades
+
+def _limpar_caches():
+    for cache in (cache_contratos, cache_fluxo_caixa, cache_visao_geral):
+        cache.limpar()
+    catalogo_modalidades._valores.clear()
+
+@pytest.fixture
+def banco():
+    """Banco mongomock vazio usado por todas as funções de db"""
+    mongomock = pytest.importorskip("mongomock")
+    banco = mongomock.MongoClient()["quattor_teste"]
+    db.usar_conexao(banco)
+    _limpar_caches()
+    yield banco
+    db.usar_conexao(None)
+    _limpar_caches()
+
+@pytest.fixture
+def banco_mongod():
+    """Banco num mongod real (MONGODB_URI_TESTE), para pipelines que o mongomock não executa"""
+    uri = os.environ.get("MONGODB_URI_TESTE")
+    if not uri:
+        pytest.skip("MONGODB_URI_TESTE não definida")
+    from pymongo import MongoClient
+    cliente = MongoClient(uri)
+    banco = cliente["quattor_teste"]
+    for nome in banco.list_collection_names():
+        banco.drop_collection(nome)
+    db.usar_conexao(banco)
+    _limpar_caches()
+    yield banco
+    cliente.drop_database("quattor_teste")
+    db.usar_conexao(None)
+    _limpar_caches()
@@ -0,0 +1,16 @@
+import pandas as pd
+
+from cache import CacheContratos
+
+def test_obter_isola_o_valor_em_cache_de_alteracoes_no_lugar():
+    cache = CacheContratos()
+    chave = cache.chave("pilates", "jan", 2025)
+    cache.guardar(chave, pd.DataFrame({"valor": [100.0, 200.0], "professor": ["BIA", None]}))
+
+    copia = cache.obter(chave, lambda: None)
+    copia.loc[0, "valor"] = 0.0
+    copia["professor"] = copia["professor"].fillna("SEM PROFESSOR")
+
+    original = cache.obter(chave, lambda: None)
+    assert original["valor"].tolist() == [100.0, 200.0]
+    assert pd.isna(original.loc[1, "professor"])
@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+import db
+from planilhas import preparar_documentos_contratos
+
+def _planilha(linhas):
+    return pd.DataFrame(linhas, columns=['ID do cliente', 'nome_completo', 'Contratos', 'Valor', 'Início', 'Vencimento', 'Professor'])
+
+@pytest.fixture
+def contratos(banco):
+    """Contratos de dois meses e duas modalidades, com professor ausente e plano desconhecido"""
+    periodos = [
+        ('pilates', 'jan', _planilha([
+            [1, 'ANA', 'PILATES STUDIO 2X ANUAL', 3480.0, '01/01/2025', '01/01/2026', 'BIA'],
+            [2, 'CAIO', 'PILATES STUDIO 2X SEMESTRAL', 1800.0, '05/01/2025', '05/07/2025', None],
+            [3, 'DANI', 'PLANO QUE NÃO EXISTE', 250.0, '10/01/2025', '10/02/2025', None],
+        ])),
+        ('pilates', 'fev', _planilha([
+            [1, 'ANA', 'PILATES STUDIO 2X ANUAL', 3480.0, '01/01/2025', '01/01/2026', 'BIA'],
+        ])),
+        ('judo', 'jan', _planilha([
+            [4, 'EDU', 'JUDÔ INFANTIL 2X ANUAL', 2400.0, '02/01/2025', '02/01/2026', None],
+            [5, 'FABI', 'Transferência de Dias', 120.0, '03/01/2025', '03/02/2025', 'GIL'],
+        ])),
+    ]
+    for modalidade, mes, planilha in periodos:
+        documentos, _ = preparar_documentos_contratos(planilha, modalidade, mes, 2025)
+        banco["contratos"].insert_many(documentos)
+    # Documento antigo sem o campo professor
+    banco["contratos"].insert_one({
+        "id_cliente": "6", "nome_completo": "GABI", "contratos": "PLANO QUE NÃO EXISTE", "valor": 90.0,
+        "inicio": "01/01/2025", "vencimento": "01/02/2025", "valor_mensal": 90.0,
+        "modalidade": "judo", "mes": "jan", "ano": 2025,
+    })
+    return banco
+
+def _ordenado(df):
+    return df.sort_values(['modalidade', 'ano', 'mes'], ignore_index=True)[db.COLUNAS_DASHBOARD]
+
+def test_agregacao_no_servidor_igual_ao_pandas(contratos):
+    filtro = db._filtro_anos(2025)
+    servidor = _ordenado(db._agregar_dashboard_no_servidor(contratos["contratos"], filtro))
+    cliente = _ordenado(db._agregar_dashboard_no_cliente(contratos["contratos"], filtro))
+
+    assert len(servidor) == 3
+    pd.testing.assert_frame_equal(servidor, cliente, check_dtype=False)
+
+def test_agregacao_conta_professor_ausente_e_plano_desconhecido(contratos):
+    df = db.buscar_dados_dashboard(2025, usar_resumo=False).set_index(['modalidade', 'mes'])
+
+    assert df.loc[('pilates', 'jan'), 'num_registros'] == 3
+    assert df.loc[('judo', 'jan'), 'num_registros'] == 3
+    # Plano desconhecido conta como 1 mês
+    esperado = 3480.0 / 12 + 1800.0 / 6 + 250.0
+    assert df.loc[('pilates', 'jan'), 'total_valor_mensal'] == pytest.approx(esperado)
+    assert df.loc[('pilates', 'jan'), 'total_50_percent'] == pytest.approx(esperado / 2)
+
+def test_filtro_por_ano_vazio(contratos):
+    assert db.buscar_dados_dashboard(2024, usar_resumo=False).empty
+    assert db.buscar_dados_dashboard(2024, agregar_no_servidor=False, usar_resumo=False).empty
+
+def test_primeira_escrita_constroi_o_resumo_de_todos_os_periodos(contratos):
+    assert contratos["resumo_mensal"].count_documents({}) == 0
+
+    db.cadastrar_contrato('7', 'HELO', 'PILATES STUDIO 2X ANUAL', 3480.0, '01/02/2025', '01/02/2026',
+                          290.0, 'BIA', 'pilates', 'fev', 2025)
+
+    resumo = _ordenado(db.buscar_dados_dashboard(2025))
+    direto = _ordenado(db.buscar_dados_dashboard(2025, usar_resumo=False))
+    assert len(resumo) == 3
+    pd.testing.assert_frame_equal(resumo, direto, check_dtype=False)
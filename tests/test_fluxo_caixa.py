@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import db
+import fluxo_caixa
+
+INICIO = datetime(2025, 1, 1)
+FIM = datetime(2025, 5, 1)
+
+def _inserir_lancamentos(banco):
+    banco["receitas"].insert_many([
+        {"data": datetime(2025, 3, 3, 10, 0), "valor": 100.0},   # segunda-feira
+        {"data": datetime(2025, 3, 9, 23, 30), "valor": 50.0},   # domingo: mesma semana
+        {"data": datetime(2025, 3, 10, 8, 0), "valor": 20.0},
+        {"data": datetime(2025, 4, 1, 12, 0), "valor": 30.0},
+        {"data": datetime(2024, 12, 31), "valor": 500.0},         # antes do intervalo
+    ])
+    banco["despesas"].insert_many([
+        {"data": datetime(2025, 3, 5), "valor": 40.0, "pago": True},
+        {"data": datetime(2025, 3, 6), "valor": 999.0, "pago": False},
+        {"data": datetime(2025, 4, 2), "valor": 10.0},             # lançamento antigo sem 'pago'
+    ])
+
+@pytest.fixture
+def lancamentos(banco):
+    _inserir_lancamentos(banco)
+    return banco
+
+@pytest.mark.parametrize("granularidade, esperado", [
+    ("mes", [(datetime(2025, 3, 1), 170.0, 3), (datetime(2025, 4, 1), 30.0, 1)]),
+    ("semana", [(datetime(2025, 3, 3), 150.0, 2), (datetime(2025, 3, 10), 20.0, 1), (datetime(2025, 3, 31), 30.0, 1)]),
+    ("dia", [(datetime(2025, 3, 3), 100.0, 1), (datetime(2025, 3, 9), 50.0, 1),
+             (datetime(2025, 3, 10), 20.0, 1), (datetime(2025, 4, 1), 30.0, 1)]),
+])
+def test_agregacao_no_pandas(lancamentos, granularidade, esperado):
+    # mongomock não tem $dateTrunc: agregar_lancamentos usa o caminho com pandas
+    df = fluxo_caixa.agregar_lancamentos("receitas", INICIO, FIM, granularidade)
+
+    assert [(linha.data.to_pydatetime(), linha.valor, linha.lancamentos) for linha in df.itertuples()] == esperado
+
+def test_fluxo_caixa_ignora_despesas_nao_pagas(lancamentos):
+    df = fluxo_caixa.fluxo_caixa(INICIO, FIM).set_index("data")
+
+    assert df.loc[datetime(2025, 3, 1), "despesas"] == 40.0
+    assert df.loc[datetime(2025, 4, 1), "despesas"] == 10.0
+    assert df["saldo_acumulado"].iloc[-1] == pytest.approx(200.0 - 50.0)
+
+def test_padroes_de_df_receitas(lancamentos):
+    assert len(db.df_receitas()) == 5
+    assert len(db.df_receitas(INICIO)) == 4
+
+@pytest.mark.parametrize("granularidade", list(fluxo_caixa.GRANULARIDADES))
+def test_servidor_igual_ao_pandas(banco_mongod, granularidade):
+    _inserir_lancamentos(banco_mongod)
+    for nome_colecao, filtro_colecao in fluxo_caixa.FILTROS_COLECOES.items():
+        colecao = banco_mongod[nome_colecao]
+        filtro = dict(fluxo_caixa.filtro_intervalo(INICIO, FIM), **filtro_colecao)
+
+        servidor = pd.DataFrame(
+            list(colecao.aggregate(fluxo_caixa._pipeline_fluxo(filtro, granularidade))),
+            columns=fluxo_caixa.COLUNAS_FLUXO
+        )
+        cliente = fluxo_caixa._agregar_no_cliente(colecao, filtro, granularidade)
+
+        assert not servidor.empty
+        pd.testing.assert_frame_equal(servidor, cliente, check_dtype=False)
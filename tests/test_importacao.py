@@ -0,0 +1,139 @@
+import os
+
+import pandas as pd
+
+import db
+
+def _contrato(id_cliente, valor=100.0, mes='jan'):
+    return {
+        "id_cliente": str(id_cliente), "nome_completo": f"ALUNO {id_cliente}", "contratos": "PILATES STUDIO 2X MENSAL",
+        "valor": valor, "inicio": "01/01/2025", "vencimento": "01/02/2025", "valor_mensal": valor,
+        "professor": None, "modalidade": "pilates", "mes": mes, "ano": 2025,
+    }
+
+def test_substituir_periodo_versionado_troca_o_periodo_e_remove_lote(banco):
+    banco["contratos"].insert_many([_contrato(1), _contrato(2), _contrato(9, mes='fev')])
+
+    resumo = db.substituir_periodo([_contrato(2, 200.0), _contrato(3), _contrato(3, 300.0)], "pilates", "jan", 2025)
+
+    assert resumo == {"removidos": 1, "inseridos": 2, "modo": "versionado"}
+    periodo = {doc["id_cliente"]: doc for doc in banco["contratos"].find({"mes": "jan"})}
+    assert sorted(periodo) == ["2", "3"]
+    assert periodo["2"]["valor"] == 200.0
+    # Último documento de cada chave vence
+    assert periodo["3"]["valor"] == 300.0
+    assert banco["contratos"].count_documents({"lote": {"$exists": True}}) == 0
+    assert banco["contratos"].count_documents({"mes": "fev"}) == 1
+
+def test_diff_normaliza_contratos_antigos(banco):
+    antigo = dict(_contrato(21441), id_cliente="21441.0", inicio=float("nan"), vencimento="01/02/2025 ", professor=float("nan"))
+    alterado = dict(_contrato(7), id_cliente=7.0)
+    banco["contratos"].insert_many([antigo, alterado, _contrato(8)])
+
+    novos = [dict(_contrato(21441), inicio=None), _contrato(7, 150.0), _contrato(9)]
+    diff = db.calcular_diff_periodo(novos, "pilates", "jan", 2025)
+
+    assert diff["inalterados"] == 1
+    assert [contrato["id_cliente"] for contrato in diff["atualizar"]] == ["7"]
+    assert [contrato["id_cliente"] for contrato in diff["inserir"]] == ["9"]
+    assert [contrato["id_cliente"] for contrato in diff["remover"]] == ["8"]
+
+    db.aplicar_diff_periodo(diff)
+    ids = sorted(str(doc["id_cliente"]) for doc in banco["contratos"].find({"mes": "jan"}))
+    # O contrato alterado substitui o documento antigo em vez de duplicá-lo
+    assert ids == ["21441.0", "7", "9"]
+    assert banco["contratos"].find_one({"id_cliente": "7"})["valor"] == 150.0
+
+class _SessaoSemTransacao:
+    """Executa a operação de with_transaction diretamente (mongomock não tem transações)"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def with_transaction(self, operacao):
+        return operacao(None)
+
+def test_substituir_periodo_transacao_ultimo_documento_vence_entre_blocos(banco, monkeypatch):
+    banco["contratos"].insert_many([_contrato(1), _contrato(2)])
+    monkeypatch.setattr(db, "_suporta_transacoes", lambda client: True)
+    monkeypatch.setattr(type(banco.client), "start_session", lambda self: _SessaoSemTransacao(), raising=False)
+
+    documentos = [_contrato(3), _contrato(4), _contrato(3, 330.0), _contrato(5), _contrato(4, 440.0)]
+    resumo = db.substituir_periodo(documentos, "pilates", "jan", 2025, tamanho_lote=2)
+
+    assert resumo == {"removidos": 2, "inseridos": 3, "modo": "transacao"}
+    valores = {doc["id_cliente"]: doc["valor"] for doc in banco["contratos"].find({"mes": "jan"})}
+    assert valores == {"3": 330.0, "4": 440.0, "5": 100.0}
+
+def test_substituir_periodo_por_planilha_grava_em_blocos(banco, tmp_path):
+    linhas = [[i, f'ALUNO {i}', 'PILATES STUDIO 2X MENSAL', 300.0, '01/01/2025', '01/02/2025', 'BIA'] for i in range(1, 26)]
+    linhas.append([None, 'SEM ID', 'PILATES STUDIO 2X MENSAL', 300.0, '01/01/2025', '01/02/2025', None])
+    planilha = pd.DataFrame(linhas, columns=['ID do cliente', 'nome_completo', 'Contratos', 'Valor', 'Início', 'Vencimento', 'Professor'])
+    caminho = tmp_path / 'pilates_jan_2025.csv'
+    planilha.to_csv(caminho, sep=';', decimal=',', index=False)
+    banco["contratos"].insert_one(_contrato(99))
+
+    resumo = db.substituir_periodo_por_planilha(caminho, "pilates", "jan", 2025, tamanho_lote=4)
+
+    assert (resumo["inseridos"], resumo["removidos"], resumo["ignorados"]) == (25, 1, 1)
+    assert len(resumo["preview"]) == 5
+    assert banco["contratos"].count_documents({"mes": "jan"}) == 25
+
+    diff = db.diff_periodo_por_planilha(caminho, "pilates", "jan", 2025)
+    assert (len(diff["inserir"]), len(diff["atualizar"]), len(diff["remover"]), diff["inalterados"]) == (0, 0, 0, 25)
+
+def test_importar_planilha_em_lote_insere_atualiza_e_mantem_o_periodo(banco, tmp_path):
+    linhas = [[i, f'ALUNO {i}', 'PILATES STUDIO 2X MENSAL', 300.0, '01/01/2025', '01/02/2025', 'BIA'] for i in range(1, 11)]
+    linhas.append([None, 'SEM ID', 'PILATES STUDIO 2X MENSAL', 300.0, '01/01/2025', '01/02/2025', None])
+    planilha = pd.DataFrame(linhas, columns=['ID do cliente', 'nome_completo', 'Contratos', 'Valor', 'Início', 'Vencimento', 'Professor'])
+    planilha['ID do cliente'] = planilha['ID do cliente'].astype('Int64')
+    caminho = tmp_path / 'pilates_jan_2025.csv'
+    planilha.to_csv(caminho, sep=';', decimal=',', index=False)
+    banco["contratos"].insert_many([_contrato(1), _contrato(99)])
+
+    resumo = db.importar_planilha_em_lote(caminho, "pilates", "jan", 2025, tamanho_lote=3, ordenado=True)
+
+    assert (resumo["inseridos"], resumo["atualizados"], resumo["ignorados"], resumo["total"]) == (9, 1, 1, 11)
+    assert banco["contratos"].count_documents({"mes": "jan"}) == 11
+    assert banco["contratos"].find_one({"id_cliente": "1"})["valor"] == 300.0
+
+def test_leitor_csv_converte_decimais_milhares_e_datas(tmp_path):
+    from planilhas import LeitorPlanilha
+
+    caminho = tmp_path / 'pilates_jan_2025.csv'
+    caminho.write_text(
+        'ID do cliente;nome_completo;Contratos;Valor;Início;Vencimento\n'
+        '1;ALUNO 1;PILATES STUDIO 2X MENSAL;"1.530,50";01/01/2025;01/02/2025\n'
+        '2;ALUNO 2;PILATES STUDIO 2X MENSAL;300;01/01/2025;31/02/2025\n',
+        encoding='utf-8'
+    )
+
+    bloco = next(LeitorPlanilha(caminho).blocos())
+
+    assert bloco['Valor'].tolist() == [1530.5, 300.0]
+    assert bloco['Vencimento'].iloc[0] == pd.Timestamp(2025, 2, 1)
+    assert pd.isna(bloco['Vencimento'].iloc[1])
+
+def test_descobrir_planilhas_inclui_csv_de_contratos_e_ignora_relatorios(tmp_path):
+    from ingestao import descobrir_planilhas
+    pasta = tmp_path / 'judo'
+    pasta.mkdir()
+    contratos = pd.DataFrame([[1, 'ANA', 'JUDÔ INFANTIL 2X ANUAL', 2400.0, '02/01/2025', '02/01/2026', 'GIL']],
+                             columns=['ID do cliente', 'nome_completo', 'Contratos', 'Valor', 'Início', 'Vencimento', 'Professor'])
+    contratos.to_csv(pasta / 'judo_jan_2025.csv', sep=';', decimal=',', index=False)
+    pd.DataFrame([['ANA', 'JUDÔ INFANTIL 2X ANUAL', '02/01/2026', 100.0]],
+                 columns=['nome_completo', 'Contratos', 'Vencimento', '50%']).to_csv(pasta / 'judo_fev_2025.csv', index=False)
+
+    contratos.to_excel(pasta / 'judo_mar_2025.xlsx', index=False)
+    contratos.to_csv(pasta / 'judo_mar_2025.csv', sep=';', decimal=',', index=False)
+    mtime = (pasta / 'judo_mar_2025.xlsx').stat().st_mtime
+    os.utime(pasta / 'judo_mar_2025.csv', (mtime, mtime))
+
+    periodos, ignorados, conflitos = descobrir_planilhas(tmp_path)
+
+    assert periodos == {('judo', 'jan', 2025): pasta / 'judo_jan_2025.csv', ('judo', 'mar', 2025): pasta / 'judo_mar_2025.xlsx'}
+    assert ignorados == [pasta / 'judo_fev_2025.csv']
+    # Mesma data de modificação: a planilha .xlsx vence o .csv
+    assert conflitos == [(('judo', 'mar', 2025), pasta / 'judo_mar_2025.xlsx', [pasta / 'judo_mar_2025.csv'])]
@@ -0,0 +1,22 @@
+from utils import _selecao_editada
+
+IDS = ['A', 'B', 'C']
+
+def test_linha_marcada_de_novo_e_a_nova_selecao():
+    # Marcou A e B; depois desmarcou A e marcou de novo: a posição de A em edited_rows não muda
+    linhas_editadas = {0: {'Selecionar': True}, 1: {'Selecionar': True}}
+
+    selecionados, marcado_agora = _selecao_editada(set(), IDS, linhas_editadas, anterior={'B'})
+
+    assert selecionados == {'A', 'B'}
+    assert marcado_agora == 'A'
+
+def test_sem_linha_nova_nao_ha_marcacao():
+    linhas_editadas = {0: {'Selecionar': True}, 1: {'Selecionar': False}}
+
+    assert _selecao_editada({'B'}, IDS, linhas_editadas, anterior={'A', 'B'}) == ({'A'}, None)
+
+def test_varias_linhas_novas_usa_a_ordem_de_edited_rows():
+    linhas_editadas = {2: {'Selecionar': True}, 0: {'Selecionar': True}}
+
+    assert _selecao_editada(set(), IDS, linhas_editadas)[1] == 'A'
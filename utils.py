@@ -3,6 +3,8 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime
 
+from formatacao import formatar_data, formatar_moeda
+
 MESES = {
     'Janeiro': 'jan',
     'Fevereiro': 'fev',
@@ -18,6 +20,9 @@ MESES = {
     'Dezembro': 'dez'
 }
 
+# Modalidades com página própria (pages/1_Judo.py a pages/5_kravmaga.py)
+MODALIDADES_PAGINAS = ['judo', 'pilates', 'prime', 'muay', 'krav']
+
 def obter_ano_atual():
     """Retorna o ano atual"""
     return datetime.now().year
@@ -66,51 +71,107 @@ def selecionar_arquivo_excel(modalidade, pasta_atual):
     
     return arquivo_selecionado, mes_abrev, mes_nome
 
-def carregar_dados_do_mongodb(modalidade, mes_abrev, mes_nome, ano):
-    """Carrega dados do MongoDB e retorna DataFrame formatado"""
+def carregar_dados_do_mongodb(modalidade, mes_abrev, mes_nome, ano, professor=None):
+    """Carrega dados do MongoDB e retorna DataFrame formatado
+    
+    professor filtra na consulta (db.SEM_PROFESSOR para contratos sem professor).
+    Depois da leitura, os períodos vizinhos são pré-carregados em segundo plano.
+    """
     import sys
     from pathlib import Path
     sys.path.insert(0, str(Path(__file__).parent.parent))
     
-    from db import buscar_contratos
+    from db import buscar_contratos, precarregar_contratos
     
-    # Buscar contratos do MongoDB
-    df = buscar_contratos(modalidade, mes_abrev, ano)
+    # Buscar contratos do MongoDB (nomes de exibição e tipos já aplicados pelo banco)
+    df = buscar_contratos(modalidade, mes_abrev, ano, professor)
+    
+    # Enquanto a página é montada, carrega no cache os períodos para onde o usuário costuma ir
+    precarregar_contratos(periodos_vizinhos(modalidade, mes_abrev, ano, professor))
     
     if df.empty:
         return None
     
-    # Renomear colunas para compatibilidade com código existente
-    colunas_renomear = {
-        'id_cliente': 'ID do cliente',
-        'nome_completo': 'nome_completo',
-        'contratos': 'Contratos',
-        'valor': 'Valor',
-        'inicio': 'Início',
-        'vencimento': 'Vencimento',
-        'valor_mensal': 'VALOR_MENSAL',
-        'professor': 'Professor'
-    }
+    return df
+
+def periodos_vizinhos(modalidade, mes_abrev, ano, professor=None):
+    """Períodos a pré-carregar a partir do período exibido
     
-    # Renomear apenas as colunas que existem
-    for old_name, new_name in colunas_renomear.items():
-        if old_name in df.columns:
-            df = df.rename(columns={old_name: new_name})
+    Meses anterior e seguinte da modalidade (no mesmo ano, como no seletor das páginas, e
+    com o mesmo filtro de professor) e o mesmo mês das outras modalidades.
     
-    # Garantir que o índice seja ID do cliente se não estiver já definido
-    if df.index.name != 'id_cliente' and 'ID do cliente' in df.columns:
-        df = df.set_index('ID do cliente')
-    elif df.index.name == 'id_cliente':
-        # Se o índice já é id_cliente mas queremos renomear para 'ID do cliente'
-        df.index.name = 'ID do cliente'
+    Returns:
+        Lista de tuplas (modalidade, mes_abrev, ano, professor)
+    """
+    meses = list(MESES.values())
+    posicao = meses.index(mes_abrev)
+    periodos = [
+        (modalidade, meses[vizinho], ano, professor)
+        for vizinho in (posicao - 1, posicao + 1)
+        if 0 <= vizinho < len(meses)
+    ]
+    periodos += [(outra, mes_abrev, ano, None) for outra in MODALIDADES_PAGINAS if outra != modalidade]
+    return periodos
+
+def _rss_processo():
+    """Memória residente do processo em bytes (None se não for possível medir)"""
+    try:
+        with open('/proc/self/status') as status:
+            for linha in status:
+                if linha.startswith('VmRSS:'):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        import sys
+        # Pico (ru_maxrss), em KB no Linux e em bytes no macOS
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+    except (ImportError, OSError):
+        return None
+
+def uso_memoria_sessao():
+    """Memória dos DataFrames guardados na sessão, do cache compartilhado e do processo
     
-    # Converter tipos numéricos se necessário
-    if 'Valor' in df.columns:
-        df['Valor'] = pd.to_numeric(df['Valor'], errors='coerce').fillna(0)
-    if 'VALOR_MENSAL' in df.columns:
-        df['VALOR_MENSAL'] = pd.to_numeric(df['VALOR_MENSAL'], errors='coerce').fillna(0)
+    Returns:
+        dict com sessao (chave -> bytes), total_sessao, cache_compartilhado e rss_processo
+    """
+    from cache import cache_contratos
     
-    return df
+    sessao = {
+        str(chave): int(valor.memory_usage(deep=True).sum())
+        for chave, valor in st.session_state.items()
+        if isinstance(valor, pd.DataFrame)
+    }
+    return {
+        'sessao': sessao,
+        'total_sessao': sum(sessao.values()),
+        'cache_compartilhado': cache_contratos.memoria(),
+        'rss_processo': _rss_processo()
+    }
+
+def exibir_uso_memoria():
+    """Mostra na barra lateral o uso de memória da sessão (uso_memoria_sessao)
+    
+    A medição (memory_usage(deep=True) de cada DataFrame) só roda ao clicar no botão,
+    não a cada rerun da página.
+    """
+    def tamanho(num_bytes):
+        if num_bytes < 1024 ** 2:
+            return f"{num_bytes / 1024:.0f} KB"
+        return f"{num_bytes / 1024 ** 2:.1f} MB".replace('.', ',')
+    
+    with st.sidebar.expander('🧠 Memória'):
+        if not st.button('Medir uso de memória', key='medir_uso_memoria'):
+            return
+        uso = uso_memoria_sessao()
+        for chave, num_bytes in sorted(uso['sessao'].items()):
+            st.caption(f"{chave}: {tamanho(num_bytes)}")
+        st.caption(f"Total da sessão: {tamanho(uso['total_sessao'])} (inclui colunas compartilhadas com o cache)")
+        st.caption(f"Cache de contratos (todas as sessões): {tamanho(uso['cache_compartilhado'])}")
+        if uso['rss_processo'] is not None:
+            st.caption(f"Processo: {tamanho(uso['rss_processo'])}")
 
 @st.dialog("Cadastrar Novo Aluno", width="medium")
 def dialog_cadastrar_aluno():
@@ -204,7 +265,7 @@ def dialog_cadastrar_aluno():
     contratos_para_calculo = str(contratos).strip() if contratos else ""
     novo_valor_mensal = calcular_valor_mensal(contratos_para_calculo, valor) if contratos_para_calculo and valor else 0.0
     if contratos_para_calculo and valor:
-        st.info(f"Valor Mensal Calculado: R$ {novo_valor_mensal:,.2f}")
+        st.info(f"Valor Mensal Calculado: {formatar_moeda(novo_valor_mensal, 'R$ ')}")
     
     col1, col2 = st.columns(2)
     
@@ -305,17 +366,19 @@ def dialog_editar_contrato():
     nome_completo = st.text_input("Nome Completo", value=str(linha_original.get('nome_completo', '')))
     contratos = st.text_input("Contratos", value=str(linha_original.get('Contratos', '')))
     valor = st.number_input("Valor", value=float(linha_original.get('Valor', 0)), step=0.01, format="%.2f")
-    inicio = st.text_input("Início", value=str(linha_original.get('Início', '')))
-    vencimento = st.text_input("Vencimento", value=str(linha_original.get('Vencimento', '')))
+    inicio = st.text_input("Início", value=formatar_data(linha_original.get('Início')))
+    vencimento = st.text_input("Vencimento", value=formatar_data(linha_original.get('Vencimento')))
     
     # Campo professor se existir
     professor_valor = None
     if 'Professor' in linha_original:
-        professor_valor = st.text_input("Professor", value=str(linha_original.get('Professor', '')) if linha_original.get('Professor') else '')
+        # Professor é categórico: ausente vem como NaN (verdadeiro em if), não como None
+        professor_original = linha_original.get('Professor')
+        professor_valor = st.text_input("Professor", value=str(professor_original) if pd.notna(professor_original) and professor_original else '')
     
     # Calcular novo valor mensal baseado no contrato
     novo_valor_mensal = calcular_valor_mensal(contratos, valor)
-    st.info(f"Valor Mensal Calculado: R$ {novo_valor_mensal:,.2f}")
+    st.info(f"Valor Mensal Calculado: {formatar_moeda(novo_valor_mensal, 'R$ ')}")
     
     col1, col2 = st.columns(2)
     
@@ -386,44 +449,77 @@ def criar_dialog_edicao(id_cliente, linha_original, modalidade, mes_abrev, ano):
     # Chamar a função dialog diretamente
     dialog_editar_contrato()
 
+def _selecao_editada(base, ids, linhas_editadas, anterior=frozenset()):
+    """Seleção atual a partir da seleção base do editor e das células alteradas
+    
+    Args:
+        base: Conjunto de IDs marcados quando o editor foi criado
+        ids: IDs na ordem das linhas do editor
+        linhas_editadas: edited_rows do st.data_editor (posição -> {coluna: valor})
+        anterior: Seleção lida na execução anterior
+    
+    Returns:
+        Tupla (selecionados, marcado_agora): conjunto de IDs marcados e o ID que passou a
+        estar marcado desde a execução anterior (None se nenhum). Se houver mais de um, vale
+        o último na ordem de edited_rows.
+    """
+    selecionados = set(base)
+    marcados = []
+    for posicao, alteracoes in linhas_editadas.items():
+        if 'Selecionar' not in alteracoes:
+            continue
+        id_linha = ids[int(posicao)]
+        if alteracoes['Selecionar']:
+            selecionados.add(id_linha)
+            marcados.append(id_linha)
+        else:
+            selecionados.discard(id_linha)
+    
+    # A posição de uma linha em edited_rows não muda quando ela é desmarcada e marcada de
+    # novo: a linha nova é a que não estava na seleção anterior
+    novos = selecionados - set(anterior)
+    if len(novos) == 1:
+        return selecionados, next(iter(novos))
+    novos_em_ordem = [id_linha for id_linha in marcados if id_linha in novos]
+    return selecionados, novos_em_ordem[-1] if novos_em_ordem else None
+
+def _recriar_editor(modalidade, selecionados):
+    """Troca a seleção base e a versão do editor (o data_editor volta sem alterações)"""
+    st.session_state[f'selecao_base_{modalidade}'] = set(selecionados)
+    st.session_state[f'selecionados_{modalidade}'] = set(selecionados)
+    st.session_state[f'versao_editor_{modalidade}'] = st.session_state.get(f'versao_editor_{modalidade}', 0) + 1
+
 def adicionar_interface_edicao(tabela_original, modalidade, mes_abrev, mes_nome, ano, nome_pagina):
-    """Adiciona interface de edição com checkboxes para qualquer página"""
+    """Adiciona interface de edição com checkboxes para qualquer página
     
-    # Criar cópia para exibição (sem formatação ainda)
-    tabela_para_exibicao = tabela_original.copy()
+    A seleção é um conjunto pequeno de IDs na sessão. A cada execução só as células
+    alteradas no editor (edited_rows) são lidas; desmarcar as outras linhas ou limpar a
+    seleção recria o editor com uma nova chave em vez de percorrer a tabela.
+    """
     
     # Remover linha "Total a Pagar" temporariamente para criar checkboxes
-    tabela_sem_total = tabela_para_exibicao[tabela_para_exibicao.index != 'Total a Pagar'].copy()
-    
-    # Inicializar estado de seleção (por modalidade)
-    key_selecionado = f'selecionado_{modalidade}'
-    if key_selecionado not in st.session_state:
-        st.session_state[key_selecionado] = {idx: False for idx in tabela_sem_total.index}
+    tabela_sem_total = tabela_original[tabela_original.index != 'Total a Pagar']
     
-    # Adicionar coluna de seleção com checkboxes
-    tabela_com_selecao = tabela_sem_total.copy()
-    tabela_com_selecao['Selecionar'] = [st.session_state[key_selecionado].get(idx, False) for idx in tabela_com_selecao.index]
-    
-    # Resetar checkboxes se necessário
-    key_reset = f'reset_checkboxes_{modalidade}'
-    if key_reset in st.session_state and st.session_state[key_reset]:
-        st.session_state[key_selecionado] = {idx: False for idx in tabela_sem_total.index}
-        st.session_state[key_reset] = False
+    # Estado de seleção (por modalidade): base do editor atual e última seleção lida
+    key_base = f'selecao_base_{modalidade}'
+    key_selecionados = f'selecionados_{modalidade}'
+    if key_base not in st.session_state:
+        st.session_state[key_base] = set()
+        st.session_state[key_selecionados] = set()
+    base = st.session_state[key_base]
     
     st.header(f'{nome_pagina} - {mes_nome}/{ano}')
     
-    # Criar interface com checkboxes
-    ids_para_editar = []
-    
     # Criar tabela com coluna de checkbox usando st.data_editor
-    colunas_disponiveis = ['Selecionar', 'nome_completo', 'Contratos', 'Valor', 'Início', 'Vencimento', 'VALOR_MENSAL', '50%']
-    if 'Professor' in tabela_com_selecao.columns:
+    colunas_disponiveis = ['nome_completo', 'Contratos', 'Valor', 'Início', 'Vencimento', 'VALOR_MENSAL', '50%']
+    if 'Professor' in tabela_sem_total.columns:
         colunas_disponiveis.insert(-1, 'Professor')
     
-    tabela_editavel = tabela_com_selecao[[col for col in colunas_disponiveis if col in tabela_com_selecao.columns]].copy()
-    
     # Converter para formato editável
-    tabela_editavel = tabela_editavel.reset_index()
+    tabela_editavel = tabela_sem_total[[col for col in colunas_disponiveis if col in tabela_sem_total.columns]].reset_index()
+    nome_coluna_id = "ID do cliente" if "ID do cliente" in tabela_editavel.columns else tabela_editavel.columns[0]
+    ids = tabela_editavel[nome_coluna_id].tolist()
+    tabela_editavel.insert(0, 'Selecionar', tabela_editavel[nome_coluna_id].isin(base) if base else False)
     
     # Configuração de colunas
     column_config = {
@@ -431,8 +527,8 @@ def adicionar_interface_edicao(tabela_original, modalidade, mes_abrev, mes_nome,
         "nome_completo": st.column_config.TextColumn("Nome Completo", disabled=True),
         "Contratos": st.column_config.TextColumn("Contratos", disabled=True),
         "Valor": st.column_config.NumberColumn("Valor", format="%.2f", disabled=True),
-        "Início": st.column_config.TextColumn("Início", disabled=True),
-        "Vencimento": st.column_config.TextColumn("Vencimento", disabled=True),
+        "Início": st.column_config.DateColumn("Início", format="DD/MM/YYYY", disabled=True),
+        "Vencimento": st.column_config.DateColumn("Vencimento", format="DD/MM/YYYY", disabled=True),
         "VALOR_MENSAL": st.column_config.NumberColumn("Valor Mensal", format="%.2f", disabled=True),
         "50%": st.column_config.NumberColumn("50%", format="%.2f", disabled=True),
     }
@@ -443,65 +539,56 @@ def adicionar_interface_edicao(tabela_original, modalidade, mes_abrev, mes_nome,
     if "Professor" in tabela_editavel.columns:
         column_config["Professor"] = st.column_config.TextColumn("Professor", disabled=True)
     
+    # A chave muda com a versão (seleção recriada) e com as linhas exibidas (período ou
+    # filtro diferente), pois edited_rows guarda posições de linha
+    versao = st.session_state.get(f'versao_editor_{modalidade}', 0)
+    key_editor = f'editor_{modalidade}_{versao}_{hash(tuple(ids))}'
+    
     # Usar st.data_editor para permitir edição de checkboxes
-    edited_df = st.data_editor(
+    st.data_editor(
         tabela_editavel,
         column_config=column_config,
         hide_index=True,
         use_container_width=True,
-        height=400
+        height=400,
+        key=key_editor
     )
     
     # Calcular e exibir total geral
-    if not tabela_com_selecao.empty and '50%' in tabela_com_selecao.columns:
-        total_50_percent = tabela_com_selecao['50%'].sum()
-        total_valor_mensal = tabela_com_selecao['VALOR_MENSAL'].sum() if 'VALOR_MENSAL' in tabela_com_selecao.columns else 0
+    if not tabela_sem_total.empty and '50%' in tabela_sem_total.columns:
+        total_50_percent = tabela_sem_total['50%'].sum()
+        total_valor_mensal = tabela_sem_total['VALOR_MENSAL'].sum() if 'VALOR_MENSAL' in tabela_sem_total.columns else 0
         
         # Criar linha de total formatada
         col1, col2, col3 = st.columns([2, 2, 2])
         with col1:
-            st.metric("Total Valor Mensal", f"R$ {total_valor_mensal:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+            st.metric("Total Valor Mensal", formatar_moeda(total_valor_mensal, 'R$ '))
         with col2:
-            st.metric("Total 50%", f"R$ {total_50_percent:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."))
+            st.metric("Total 50%", formatar_moeda(total_50_percent, 'R$ '))
         with col3:
-            num_registros = len(tabela_com_selecao)
+            num_registros = len(tabela_sem_total)
             st.metric("Registros", num_registros)
     
-    # Atualizar estado de seleção e verificar se alguma linha foi marcada
-    nome_coluna_id = "ID do cliente" if "ID do cliente" in edited_df.columns else edited_df.columns[0]
-    linha_marcada_agora = None
-    
-    for _, row in edited_df.iterrows():
-        idx = row[nome_coluna_id]
-        estava_selecionado = st.session_state[key_selecionado].get(idx, False)
-        esta_selecionado = row['Selecionar']
-        
-        st.session_state[key_selecionado][idx] = esta_selecionado
-        
-        # Se acabou de marcar (não estava selecionado antes, mas está agora)
-        if esta_selecionado and not estava_selecionado:
-            linha_marcada_agora = idx
-            ids_para_editar.append(idx)
-        elif esta_selecionado:
-            ids_para_editar.append(idx)
+    # Seleção atual: base do editor + células alteradas (apenas as linhas clicadas)
+    linhas_editadas = st.session_state.get(key_editor, {}).get('edited_rows', {})
+    selecionados, marcado_agora = _selecao_editada(base, ids, linhas_editadas, st.session_state[key_selecionados])
+    st.session_state[key_selecionados] = selecionados
     
     # Se marcou uma linha agora e não há dialog aberto, abrir automaticamente
     key_dialog_aberto = f'dialog_aberto_{modalidade}'
     key_dialog_cadastro = 'dialog_cadastro_aberto'
     
-    if linha_marcada_agora and not st.session_state.get(key_dialog_aberto, False) and not st.session_state.get(key_dialog_cadastro, False):
-        # Desmarcar outras linhas
-        for idx in st.session_state[key_selecionado]:
-            if idx != linha_marcada_agora:
-                st.session_state[key_selecionado][idx] = False
+    if marcado_agora is not None and not st.session_state.get(key_dialog_aberto, False) and not st.session_state.get(key_dialog_cadastro, False):
+        # Desmarcar outras linhas (editor recriado só com a linha marcada)
+        _recriar_editor(modalidade, {marcado_agora})
         
         st.session_state[key_dialog_aberto] = True
-        st.session_state[f'id_para_editar_{modalidade}'] = linha_marcada_agora
+        st.session_state[f'id_para_editar_{modalidade}'] = marcado_agora
         st.rerun()
     
     # Se marcou mais de uma linha, mostrar aviso
-    if len(ids_para_editar) > 1:
-        st.warning(f"⚠️ Você selecionou {len(ids_para_editar)} linhas. Selecione apenas uma para editar.")
+    if len(selecionados) > 1:
+        st.warning(f"⚠️ Você selecionou {len(selecionados)} linhas. Selecione apenas uma para editar.")
     
     # Abrir dialog de edição se necessário (e não há dialog de cadastro aberto)
     if st.session_state.get(key_dialog_aberto, False) and f'id_para_editar_{modalidade}' in st.session_state and not st.session_state.get(key_dialog_cadastro, False):
@@ -514,8 +601,8 @@ def adicionar_interface_edicao(tabela_original, modalidade, mes_abrev, mes_nome,
         if st.session_state.get(key_contrato_editado, False):
             st.session_state[key_contrato_editado] = False
             st.session_state[key_dialog_aberto] = False
-            st.session_state[key_selecionado][id_para_editar] = False
-            st.session_state[key_reset] = True
+            # Limpar a seleção
+            _recriar_editor(modalidade, set())
             # Limpar dados do dialog
             if 'dialog_data' in st.session_state:
                 del st.session_state['dialog_data']
@@ -537,166 +624,11 @@ def exportar_para_pdf(total_50_percent, num_registros, nome_professor, mes_abrev
         tabela_dados: DataFrame opcional com dados para incluir na tabela (colunas: nome_completo, 50%)
     """
     try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.lib.units import cm
-        from reportlab.lib import colors
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-        
-        # Criar nome do arquivo PDF
-        nome_pdf = pasta_destino / f'{nome_arquivo_base}.pdf'
-        
-        # Criar documento PDF
-        doc = SimpleDocTemplate(str(nome_pdf), pagesize=A4, 
-                               rightMargin=2*cm, leftMargin=2*cm, 
-                               topMargin=2*cm, bottomMargin=2*cm)
-        story = []
-        
-        # Estilos
-        styles = getSampleStyleSheet()
-        titulo_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=18,
-            textColor=colors.HexColor('#1f77b4'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=12,
-            alignment=TA_LEFT
+        from relatorios import gerar_pdf_pagamentos
+        return gerar_pdf_pagamentos(
+            total_50_percent, num_registros, nome_professor, mes_abrev, ano,
+            pasta_destino, nome_arquivo_base, tabela_dados
         )
-        
-        # Título
-        story.append(Paragraph("Relatório de Pagamentos", titulo_style))
-        story.append(Spacer(1, 0.5*cm))
-        
-        # Informações do professor (apenas se fornecido)
-        if nome_professor:
-            if nome_professor != 'Todos':
-                story.append(Paragraph(f"<b>Professor:</b> {nome_professor}", normal_style))
-            elif nome_professor == 'Sem Professor':
-                story.append(Paragraph("<b>Professor:</b> Sem Professor", normal_style))
-            else:
-                story.append(Paragraph("<b>Professor:</b> Todos", normal_style))
-            story.append(Spacer(1, 0.3*cm))
-        
-        # Período
-        mes_nome_completo = {v: k for k, v in MESES.items()}.get(mes_abrev, mes_abrev)
-        story.append(Paragraph(f"<b>Período:</b> {mes_nome_completo}/{ano}", normal_style))
-        story.append(Spacer(1, 0.5*cm))
-        
-        # Tabela com os dados resumidos
-        dados_resumo = [
-            ['Item', 'Valor'],
-            ['Total 50%', f"R$ {total_50_percent:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")],
-            ['Número de Registros', str(num_registros)]
-        ]
-        
-        tabela_resumo = Table(dados_resumo, colWidths=[8*cm, 8*cm])
-        tabela_resumo.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTSIZE', (0, 1), (-1, -1), 12),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ]))
-        
-        story.append(tabela_resumo)
-        story.append(Spacer(1, 0.8*cm))
-        
-        # Adicionar tabela com os dados dos registros se fornecida
-        if tabela_dados is not None and not tabela_dados.empty:
-            # Título da tabela de registros
-            story.append(Paragraph("<b>Detalhamento por Cliente</b>", ParagraphStyle(
-                'TableTitle', parent=styles['Heading2'], fontSize=14, 
-                textColor=colors.HexColor('#1f77b4'), spaceAfter=10, alignment=TA_LEFT
-            )))
-            story.append(Spacer(1, 0.3*cm))
-            
-            # Preparar dados da tabela (nome, início, vencimento e 50%)
-            dados_tabela_registros = [['Nome do Cliente', 'Início', 'Vencimento', 'Valor 50%']]
-            
-            # Função para limitar tamanho do nome
-            def limitar_nome(nome_completo, max_caracteres=30):
-                """Limita o tamanho do nome e adiciona '...' se necessário"""
-                nome = str(nome_completo).upper().strip()
-                if len(nome) > max_caracteres:
-                    return nome[:max_caracteres-3] + "..."
-                return nome
-            
-            for idx, row in tabela_dados.iterrows():
-                nome = limitar_nome(row.get('nome_completo', idx))
-                inicio = str(row.get('Início', ''))
-                vencimento = str(row.get('Vencimento', ''))
-                valor_50 = row.get('50%', 0)
-                if isinstance(valor_50, (int, float)):
-                    valor_formatado = f"R$ {valor_50:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                else:
-                    valor_formatado = str(valor_50)
-                dados_tabela_registros.append([nome, inicio, vencimento, valor_formatado])
-            
-            # Adicionar linha de total
-            dados_tabela_registros.append([
-                'TOTAL', '', '',
-                f"R$ {total_50_percent:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-            ])
-            
-            # Criar tabela com larguras ajustadas para as 4 colunas
-            larguras_colunas = [7*cm, 3.5*cm, 3.5*cm, 4*cm]
-            tabela_registros = Table(dados_tabela_registros, colWidths=larguras_colunas)
-            tabela_registros.setStyle(TableStyle([
-                # Cabeçalho
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4472C4')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                ('TOPPADDING', (0, 0), (-1, 0), 8),
-                # Linhas de dados
-                ('ALIGN', (0, 1), (0, -2), 'LEFT'),  # Nome - esquerda
-                ('ALIGN', (1, 1), (1, -2), 'CENTER'),  # Início - centro
-                ('ALIGN', (2, 1), (2, -2), 'CENTER'),  # Vencimento - centro
-                ('ALIGN', (3, 1), (3, -2), 'RIGHT'),  # Valor 50% - direita
-                ('FONTNAME', (0, 1), (-1, -2), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -2), 10),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -2), [colors.white, colors.lightgrey]),
-                # Limitar largura da coluna de nome para evitar sobreposição
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('WORDWRAP', (0, 1), (0, -2), True),  # Quebrar texto se necessário
-                # Linha de total
-                ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E7E6E6')),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, -1), (-1, -1), 10),
-                ('ALIGN', (0, -1), (2, -1), 'LEFT'),
-                ('ALIGN', (3, -1), (3, -1), 'RIGHT'),
-                ('TOPPADDING', (0, -1), (-1, -1), 6),
-                ('BOTTOMPADDING', (0, -1), (-1, -1), 6),
-            ]))
-            
-            story.append(tabela_registros)
-            story.append(Spacer(1, 0.5*cm))
-        
-        # Rodapé
-        story.append(Paragraph(f"<i>Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</i>", 
-                              ParagraphStyle('CustomFooter', parent=styles['Normal'], fontSize=9, 
-                                           textColor=colors.grey, alignment=TA_CENTER)))
-        
-        # Construir PDF
-        doc.build(story)
-        
-        return str(nome_pdf)
     except ImportError:
         # Se reportlab não estiver instalado, tentar com outra biblioteca ou retornar erro
         st.error("Biblioteca reportlab não encontrada. Instale com: pip install reportlab")